@@ -0,0 +1,91 @@
+"""Conformance and speed of every execution backend on the curriculum.
+
+Each exercise solution is run (run_code) and validated (validate) on
+every backend. Results are compared with the in-process backend, field
+by field, and the time per solution is reported:
+
+  inprocess   this process, under a step budget
+  subprocess  a local WorkerPool
+  zygote      a forked child of a pre-warmed zygote (POSIX only)
+  remote      a WorkerServer on 127.0.0.1, started by this script
+  subinterpreter
+              isolated subinterpreters (Python 3.12+; else a WorkerPool)
+
+Exits with status 1 if any backend disagrees with the in-process one.
+Pass backend names to check only those, e.g.:
+    python benchmarks/backends.py subprocess remote
+"""
+
+import sys
+import threading
+import time
+
+from common import iter_solutions
+
+from pylearn.engine.backends import BACKENDS, create_backend
+from pylearn.engine.forking import CAN_FORK
+from pylearn.engine.remote import WorkerCluster, WorkerServer
+
+
+def run_fields(result):
+    return (result.success, result.stdout, result.stderr, result.error, result.limit)
+
+
+def validation_fields(result):
+    if result is None:
+        return None
+    return (result.success, result.error, result.limit, result.summary,
+            [p["name"] for p in result.passed],
+            [(f["name"], f["expected"], f["actual"]) for f in result.failed])
+
+
+def check(backend, solutions):
+    """Run every solution; return (fields per exercise, seconds per solution)."""
+    fields = {}
+    start = time.perf_counter()
+    for module, exercise in solutions:
+        run = backend.run_code(exercise.solution, pre_code=exercise.pre_code,
+                               deterministic=exercise.deterministic)
+        validation = backend.validate(exercise, exercise.solution)
+        fields[f"{module.id}/{exercise.id}"] = (
+            run_fields(run), validation_fields(validation),
+        )
+    return fields, (time.perf_counter() - start) / len(solutions)
+
+
+def start_backend(name, server):
+    if name == "remote":
+        return WorkerCluster([server.address])
+    return create_backend(name)
+
+
+def main():
+    names = sys.argv[1:] or [name for name in BACKENDS
+                             if name != "zygote" or CAN_FORK]
+    solutions = list(iter_solutions())
+    print(f"Python {sys.version.split()[0]}, {len(solutions)} solutions")
+
+    server = WorkerServer("127.0.0.1:0")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        reference, _ = check(create_backend("inprocess"), solutions)
+        failures = 0
+        for name in names:
+            with start_backend(name, server) as backend:
+                check(backend, solutions[:3])  # Warm up workers and caches
+                fields, per_solution = check(backend, solutions)
+            mismatched = [key for key in reference if fields[key] != reference[key]]
+            failures += len(mismatched)
+            status = "ok" if not mismatched else f"{len(mismatched)} MISMATCHED"
+            print(f"{name:14} {per_solution * 1000:8.2f}ms per solution   {status}")
+            for key in mismatched:
+                print(f"    {key}")
+                print(f"        inprocess: {reference[key]}")
+                print(f"        {name}: {fields[key]}")
+    finally:
+        server.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""One batched round trip vs N+1 run_code() round trips per submission.
+
+For every exercise with test cases, the solution and its test inputs are
+run on a WorkerPool two ways:
+
+  separate  run_code(solution), then run_code(solution + input) per test
+            -- N+1 round trips, each pickling its own result
+  batch     run_batch(solution, inputs) -- one round trip
+
+Outputs are compared, and the time per submission and the round trips
+saved are reported.
+"""
+
+import sys
+
+from common import best_of, fmt_us, iter_solutions
+
+from pylearn.engine.pool import WorkerPool
+
+
+def run_separately(pool, exercise):
+    code = exercise.solution
+    results = [pool.run_code(code, pre_code=exercise.pre_code)]
+    for test in exercise.test_cases:
+        results.append(pool.run_code(code + "\n" + test["input_code"],
+                                     pre_code=exercise.pre_code))
+    return results
+
+
+def run_batched(pool, exercise):
+    inputs = [test["input_code"] for test in exercise.test_cases]
+    return pool.run_batch(exercise.solution, inputs, pre_code=exercise.pre_code)
+
+
+def main():
+    exercises = [exercise for _, exercise in iter_solutions() if exercise.test_cases]
+    print(f"Python {sys.version.split()[0]}, {len(exercises)} exercises with tests")
+
+    with WorkerPool(size=1) as pool:
+        saved = mismatched = 0
+        for exercise in exercises:
+            separate = run_separately(pool, exercise)
+            batch = run_batched(pool, exercise)
+            saved += batch.round_trips_saved
+            # A separate run repeats the solution's own output before the test's.
+            prefix = separate[0].stdout
+            expected = [r.stdout[len(prefix):] for r in separate[1:]]
+            if [r.stdout for r in batch.results] != expected:
+                mismatched += 1
+                print(f"  MISMATCH {exercise.id}")
+
+        separate_time = best_of(lambda: [run_separately(pool, e) for e in exercises],
+                                repeat=3, number=1) / len(exercises)
+        batch_time = best_of(lambda: [run_batched(pool, e) for e in exercises],
+                             repeat=3, number=1) / len(exercises)
+
+    print(f"separate {fmt_us(separate_time)} per submission")
+    print(f"batch    {fmt_us(batch_time)} per submission "
+          f"({separate_time / batch_time:.1f}x faster)")
+    print(f"round trips saved: {saved} over {len(exercises)} submissions, "
+          f"{mismatched} mismatched")
+
+
+if __name__ == "__main__":
+    main()
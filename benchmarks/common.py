@@ -0,0 +1,39 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the repository root, e.g.:
+    python benchmarks/step_budget.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pylearn.curriculum import discover_modules  # noqa: E402
+
+
+def iter_solutions(module_ids=None):
+    """Yield (module, exercise) for every exercise that has a solution."""
+    for module in discover_modules():
+        if module_ids and module.id not in module_ids:
+            continue
+        for exercise in module.exercises:
+            if exercise.solution:
+                yield module, exercise
+
+
+def best_of(func, repeat=5, number=20):
+    """Return the best per-call time of func() in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def fmt_us(seconds):
+    """Format seconds as microseconds."""
+    return f"{seconds * 1e6:9.1f}us"
@@ -0,0 +1,99 @@
+"""Cost and payoff of differential tests on generated inputs.
+
+For every exercise with a generator, validates the reference solution
+on a one-worker WorkerPool:
+
+  hand-written  only the exercise's own test cases
+  generated     plus its generated tests, in the same job
+  per case      each generated test in its own validation (one round
+                trip per case, what batching avoids)
+
+"reference" is the one-off cost of running the solution on the
+generated inputs; later validations reuse the cached outputs.
+
+Then grades buggy solutions that pass every hand-written test, to show
+what the generated tests catch.
+"""
+
+import sys
+import time
+from dataclasses import replace
+
+from common import iter_solutions
+
+from pylearn.engine.differential import generated_tests
+from pylearn.engine.pool import WorkerPool
+
+ROUNDS = 3
+
+# Plausible wrong answers that pass the hand-written tests.
+BUGGY = {
+    "anagram_check": (
+        "def is_anagram(s, t):\n"
+        "    return set(s) == set(t) and len(s) == len(t)\n"
+    ),
+    "remove_duplicates": (
+        "def remove_duplicates(nums):\n"
+        "    return sorted(set(nums))\n"
+    ),
+    "fibonacci": (
+        "def fib(n):\n"
+        "    known = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55]\n"
+        "    return known[n] if n < len(known) else 6765\n"
+    ),
+}
+
+
+def best_time(pool, exercise, code):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = pool.validate(exercise, code, fail_fast=False)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    exercises = [exercise for _, exercise in iter_solutions() if exercise.generator]
+    print(f"Python {sys.version.split()[0]}, {len(exercises)} exercises with generators")
+    print(f"{'exercise':18} {'reference':>10} {'hand-written':>13} {'generated':>13} "
+          f"{'per case':>10}")
+
+    with WorkerPool(size=1) as pool:
+        warm_up = replace(exercises[0], generator=None)
+        pool.validate(warm_up, warm_up.solution)
+        for exercise in exercises:
+            start = time.perf_counter()
+            tests = generated_tests(exercise)
+            reference = time.perf_counter() - start
+
+            hand, _ = best_time(pool, replace(exercise, generator=None), exercise.solution)
+            generated, result = best_time(pool, exercise, exercise.solution)
+            assert result.success, (exercise.id, result.summary)
+
+            start = time.perf_counter()
+            for test in tests:
+                pool.validate(replace(exercise, generator=None, test_cases=[test]),
+                              exercise.solution)
+            per_case = time.perf_counter() - start
+
+            print(f"{exercise.id:18} {reference * 1000:8.1f}ms "
+                  f"{hand * 1000:8.2f}ms/{len(exercise.test_cases):<3} "
+                  f"{generated * 1000:8.2f}ms/{result.total:<3} {per_case * 1000:8.1f}ms")
+
+        print()
+        by_id = {exercise.id: exercise for exercise in exercises}
+        for exercise_id, code in BUGGY.items():
+            exercise = by_id[exercise_id]
+            _, hand = best_time(pool, replace(exercise, generator=None), code)
+            _, full = best_time(pool, exercise, code)
+            print(f"buggy {exercise_id:18} hand-written {hand.summary:18} "
+                  f"generated {full.summary}")
+            if full.failed:
+                failure = full.failed[0]
+                print(f"    {failure['name']}: expected {failure['expected']}, "
+                      f"got {failure['actual']}")
+
+
+if __name__ == "__main__":
+    main()
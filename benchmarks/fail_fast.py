@@ -0,0 +1,70 @@
+"""Time to first feedback for a wrong answer: full vs fail-fast runs.
+
+Each interview problem's test cases are repeated into a suite of SUITE
+cases, and the "wrong answer" is the solution graded against a suite
+whose last case expects something else -- a bug only a late test finds.
+Validated on a WorkerPool three ways:
+
+  full      every test runs (final grading)
+  fail-fast stop at the first failing test, tests in curriculum order
+  adaptive  fail-fast, with tests ordered by the failure history of a
+            previous attempt (order_tests())
+
+Reports the latency per validation and how many tests ran.
+"""
+
+import sys
+import time
+from dataclasses import replace
+
+from common import iter_solutions
+
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.validator import order_tests
+
+SUITE = 120
+ROUNDS = 3
+
+
+def wrong_answer_suite(exercise):
+    tests = [dict(exercise.test_cases[i % len(exercise.test_cases)], name=f"Case {i}")
+             for i in range(SUITE)]
+    tests[-1]["expected"] = "not the answer"
+    return tests
+
+
+def main():
+    exercises = [replace(exercise, test_cases=wrong_answer_suite(exercise))
+                 for _, exercise in iter_solutions(["10_interview_prep"])
+                 if exercise.test_cases]
+    print(f"Python {sys.version.split()[0]}, {len(exercises)} exercises x {SUITE} tests")
+
+    totals = {"full": 0.0, "fail-fast": 0.0, "adaptive": 0.0}
+    with WorkerPool(size=1) as pool:
+        for exercise in exercises:
+            first = pool.validate(exercise, exercise.solution)
+            last_failed = [test["name"] for test in first.failed]
+            variants = {
+                "full": (exercise, False),
+                "fail-fast": (exercise, True),
+                "adaptive": (replace(exercise, test_cases=order_tests(
+                    exercise.test_cases, last_failed, {})), True),
+            }
+            line = f"{exercise.id:20}"
+            for mode, (variant, fail_fast) in variants.items():
+                best = float("inf")
+                for _ in range(ROUNDS):
+                    start = time.perf_counter()
+                    result = pool.validate(variant, exercise.solution, fail_fast=fail_fast)
+                    best = min(best, time.perf_counter() - start)
+                totals[mode] += best
+                line += f"  {mode} {best * 1000:6.1f}ms ({result.total:3} run)"
+            print(line)
+
+    for mode, total in totals.items():
+        print(f"{mode:10} {total / len(exercises) * 1000:7.2f}ms per wrong answer "
+              f"({totals['full'] / total:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Cost of line coverage, and exercises whose tests miss solution lines.
+
+Validates every curriculum solution with and without coverage, prints
+the overhead, then lists the exercises where the reference solution
+has lines that neither it nor any test case runs -- a sign the
+exercise's test_cases are too weak.
+"""
+
+import sys
+
+from common import iter_solutions, best_of, fmt_us
+
+from pylearn.engine.validator import validate_exercise
+
+
+def main():
+    print(f"Python {sys.version.split()[0]}")
+    solutions = list(iter_solutions())
+    off = sum(best_of(lambda: validate_exercise(ex, ex.solution))
+              for _, ex in solutions)
+    on = sum(best_of(lambda: validate_exercise(ex, ex.solution, coverage=True))
+             for _, ex in solutions)
+    print(f"off    {fmt_us(off)}")
+    print(f"on     {fmt_us(on)} {(on / off - 1) * 100:+7.1f}%")
+
+    print()
+    print(f"{'exercise':40} {'covered':>8}  missed lines")
+    for module, ex in solutions:
+        result = validate_exercise(ex, ex.solution, coverage=True)
+        if result is None or result.coverage is None or not result.coverage.missed:
+            continue
+        coverage = result.coverage
+        missed = ", ".join(str(line) for line in sorted(coverage.missed))
+        print(f"{module.id + '/' + ex.id:40} {coverage.percent:7.1f}%  {missed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Cost of comparing one test's output, by match mode.
+
+For each mode, an expected output is compared with a learner output
+that matches it but is not the same text:
+
+  precompiled  a Matcher from compile_matcher(), as graded tests use
+  per call     a new Matcher for every comparison (the expected value
+               parsed again each time)
+
+"small" cases are the size of curriculum outputs; "large" ones print
+a 1000-item collection.
+"""
+
+import random
+
+from common import best_of, fmt_us
+
+from pylearn.engine.matching import Matcher, compile_matcher
+
+random.seed(0)
+_NUMBERS = [random.randint(0, 10**6) for _ in range(1000)]
+_FLOATS = [random.random() for _ in range(1000)]
+
+CASES = [
+    ("exact", "small", "hello world", "hello world"),
+    ("literal", "small", "[1, 2, 3, 4, 5, 6, 9]", "[1,2,3,4,5,6,9]"),
+    ("literal", "large", repr(_NUMBERS), repr(_NUMBERS).replace(" ", "")),
+    ("float", "small", "[0.3, 2.5]", "[0.30000000000000004, 2.5]"),
+    ("float", "small", "Area: 78.54 cm2", "Area: 78.54000000000001 cm2"),
+    ("float", "large", repr(_FLOATS), repr([x + 1e-12 for x in _FLOATS])),
+    ("unordered", "small", "[1, 2, 2, 3]", "[3, 2, 1, 2]"),
+    ("unordered", "large", repr(_NUMBERS), repr(sorted(_NUMBERS))),
+    ("lines", "small", "a\nb\nc", "c\na\nb"),
+    ("lines", "large", "\n".join(map(str, _NUMBERS)),
+     "\n".join(map(str, reversed(_NUMBERS)))),
+]
+
+
+def main():
+    print(f"{'mode':10} {'size':6} {'precompiled':>12} {'per call':>12}")
+    for mode, size, expected, actual in CASES:
+        matcher = compile_matcher(expected, mode)
+        assert matcher(actual), (mode, size)
+        precompiled = best_of(lambda: matcher(actual))
+        per_call = best_of(lambda: Matcher(expected, mode)(actual))
+        print(f"{mode:10} {size:6} {fmt_us(precompiled):>12} {fmt_us(per_call):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Cost of resource accounting at each METRICS_LEVEL.
+
+Validates every curriculum solution with metrics "off", "basic" and
+"full" and prints the totals, plus the heaviest exercises by CPU time.
+"""
+
+import sys
+
+from common import iter_solutions, best_of, fmt_us
+
+from pylearn.engine.validator import validate_exercise
+
+
+def main():
+    print(f"Python {sys.version.split()[0]}")
+    solutions = list(iter_solutions())
+    totals = {}
+    for level in ("off", "basic", "full"):
+        totals[level] = sum(
+            best_of(lambda: validate_exercise(ex, ex.solution, metrics=level))
+            for _, ex in solutions
+        )
+    for level, total in totals.items():
+        overhead = (total / totals["off"] - 1) * 100
+        print(f"{level:6} {fmt_us(total)} {overhead:+7.1f}%")
+
+    print()
+    print(f"{'exercise':40} {'cpu':>11} {'peak':>10} {'runs':>5}")
+    usage = []
+    for module, ex in solutions:
+        result = validate_exercise(ex, ex.solution, metrics="full")
+        if result is not None and result.metrics is not None:
+            usage.append((result.metrics, f"{module.id}/{ex.id}"))
+    usage.sort(key=lambda item: item[0].cpu_time, reverse=True)
+    for metrics, name in usage[:10]:
+        print(f"{name:40} {fmt_us(metrics.cpu_time)} "
+              f"{metrics.peak_memory:>9,}B {metrics.runs:5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Sequential vs parallel validation of extended test suites.
+
+Each interview problem's test cases are repeated into a suite of SUITE
+cases (every seventh one given a wrong expected output, so `failed` is
+not empty) and validated on a WorkerPool of WORKERS processes:
+
+  sequential  parallel_tests=1, the whole suite in one job
+  parallel    parallel_tests=WORKERS, the suite split over the workers
+
+Checks that both give the same passed/failed lists in the same order,
+and reports the latency per validation. Parallel chunks only overlap
+with as many free cores as workers.
+
+    python benchmarks/parallel_tests.py [WORKERS]
+"""
+
+import os
+import sys
+import time
+from dataclasses import replace
+
+from common import iter_solutions
+
+from pylearn.engine.pool import WorkerPool
+
+SUITE = 120
+ROUNDS = 3
+
+
+def extended_suite(exercise):
+    tests = []
+    for i in range(SUITE):
+        test = dict(exercise.test_cases[i % len(exercise.test_cases)], name=f"Case {i}")
+        if i % 7 == 3:
+            test["expected"] = "not the answer"
+        tests.append(test)
+    return tests
+
+
+def outcome(result):
+    return (result.error, [t["name"] for t in result.passed],
+            [(t["name"], t["actual"]) for t in result.failed])
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    exercises = [replace(exercise, test_cases=extended_suite(exercise))
+                 for _, exercise in iter_solutions(["10_interview_prep"])
+                 if exercise.test_cases]
+    print(f"Python {sys.version.split()[0]}, {len(exercises)} exercises x {SUITE} "
+          f"tests, {workers} workers, {os.cpu_count()} CPUs")
+
+    with WorkerPool(size=workers) as pool:
+        for exercise in exercises:
+            times = {}
+            outcomes = {}
+            for mode, cap in (("sequential", 1), ("parallel", workers)):
+                variant = replace(exercise, parallel_tests=cap)
+                best = float("inf")
+                for _ in range(ROUNDS):
+                    start = time.perf_counter()
+                    result = pool.validate(variant, exercise.solution)
+                    best = min(best, time.perf_counter() - start)
+                times[mode] = best
+                outcomes[mode] = outcome(result)
+            status = "same order" if outcomes["sequential"] == outcomes["parallel"] \
+                else "MISMATCH"
+            print(f"{exercise.id:20} sequential {times['sequential'] * 1000:7.1f}ms   "
+                  f"parallel {times['parallel'] * 1000:7.1f}ms   "
+                  f"{len(result.failed)} failed   {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Several `pylearn worker` daemons on one box, one killed mid-run.
+
+Starts DAEMONS local worker daemons, then validates every curriculum
+solution ROUNDS times through a WorkerCluster with CONCURRENCY jobs in
+flight. Partway through, one daemon is killed: its jobs must be retried
+on the others and every validation must still pass. Reports throughput,
+how the jobs were spread (least outstanding requests) and which daemons
+the heartbeats still consider alive.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import iter_solutions
+
+from pylearn.engine.remote import WorkerCluster
+
+DAEMONS = 3
+WORKERS_PER_DAEMON = 2
+CONCURRENCY = 6
+ROUNDS = 5
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_daemon(address):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pylearn", "worker", address,
+         "--workers", str(WORKERS_PER_DAEMON)],
+        cwd=REPO, stdout=subprocess.PIPE, text=True,
+    )
+    process.stdout.readline()  # "PyLearn worker listening on ..."
+    return process
+
+
+def main():
+    addresses = [f"127.0.0.1:{free_port()}" for _ in range(DAEMONS)]
+    daemons = [start_daemon(address) for address in addresses]
+    jobs = [exercise for _, exercise in iter_solutions()] * ROUNDS
+    print(f"Python {sys.version.split()[0]}, {DAEMONS} daemons x "
+          f"{WORKERS_PER_DAEMON} workers, {len(jobs)} validations")
+
+    try:
+        with WorkerCluster(addresses, heartbeat_interval=0.5,
+                           heartbeat_timeout=1.0) as cluster, \
+                ThreadPoolExecutor(CONCURRENCY) as executor:
+            warm_up = [executor.submit(cluster.run_code, "pass")
+                       for _ in range(DAEMONS * WORKERS_PER_DAEMON)]
+            for future in warm_up:
+                future.result()
+
+            start = time.perf_counter()
+            futures = [executor.submit(cluster.validate, exercise, exercise.solution)
+                       for exercise in jobs]
+            futures[len(futures) // 3].result()
+            daemons[-1].kill()
+            print(f"killed {addresses[-1]} after ~{len(futures) // 3} jobs")
+            results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - start
+
+            time.sleep(1.5)  # Let the heartbeats notice the dead daemon
+            failed = [r for r in results if r is None or not r.success]
+            print(f"{len(jobs) / elapsed:8.1f} validations/s, {len(failed)} failed")
+            for address, count in cluster.served.items():
+                print(f"    {address:21} served {count:4}")
+            print(f"alive: {', '.join(cluster.alive)}")
+    finally:
+        for daemon in daemons:
+            daemon.kill()
+            daemon.wait()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
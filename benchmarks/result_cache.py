@@ -0,0 +1,110 @@
+"""Hit rate and correctness of the normalized-AST result cache.
+
+Simulates a cohort: every solution is submitted in several forms a
+learner might write it in, plus a wrong answer:
+
+  original    the solution as written
+  reformat    re-laid out by ast.unparse() (comments dropped)
+  commented   with comments and blank lines added
+  undocumented
+              with every docstring removed (validators may check them,
+              so these must not share a result with the original)
+  renamed     with every function's locals renamed
+  wrong       a solution that fails (the last line dropped)
+
+Each submission is graded through the cache and, separately, validated
+without it on the same WorkerPool; any difference is a wrong cache hit.
+Reports the hit rate and the time per submission with and without the
+cache.
+"""
+
+import ast
+import sys
+import time
+
+from common import iter_solutions
+
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.resultcache import ResultCache, validate_cached
+
+
+def outcome(result):
+    if result is None:
+        return None
+    return (result.error, [t["name"] for t in result.passed],
+            [(t["name"], t["actual"]) for t in result.failed])
+
+
+class _RenameLocals(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        params = {arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)}
+        stored = {n.id for n in ast.walk(node)
+                  if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+        for n in ast.walk(node):
+            if isinstance(n, ast.Name) and n.id in stored - params:
+                n.id = f"{n.id}_local"
+        return node
+
+
+def _without_docstrings(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef)) \
+                and ast.get_docstring(node, clean=False) is not None:
+            node.body = node.body[1:] or [ast.Pass()]
+    return tree
+
+
+def variants(code):
+    yield "original", code
+    yield "reformat", ast.unparse(ast.parse(code))
+    yield "commented", "# My solution\n\n" + code.replace("\n", "\n\n") + "\n# done\n"
+    yield "undocumented", ast.unparse(_without_docstrings(ast.parse(code)))
+    yield "renamed", ast.unparse(_RenameLocals().visit(ast.parse(code)))
+    lines = code.rstrip().splitlines()
+    yield "wrong", "\n".join(lines[:-1]) or "pass"
+
+
+def main():
+    exercises = [exercise for _, exercise in iter_solutions()]
+    submissions = [(exercise, kind, code) for exercise in exercises
+                   for kind, code in variants(exercise.solution)]
+    print(f"Python {sys.version.split()[0]}, {len(submissions)} submissions "
+          f"of {len(exercises)} exercises")
+
+    cache = ResultCache()
+    with WorkerPool(size=1) as pool:
+        for exercise in exercises:
+            pool.validate(exercise, exercise.solution)  # Warm up the worker
+
+        start = time.perf_counter()
+        cached = [validate_cached(pool, exercise, code, cache=cache)
+                  for exercise, _, code in submissions]
+        cached_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        direct = [pool.validate(exercise, code) for exercise, _, code in submissions]
+        direct_time = time.perf_counter() - start
+
+    stats = cache.stats()
+    start = time.perf_counter()
+    for exercise, _, code in submissions:
+        cache.lookup(exercise, code)
+    lookup_time = time.perf_counter() - start
+
+    wrong = [(exercise.id, kind) for (exercise, kind, _), a, b
+             in zip(submissions, cached, direct) if outcome(a) != outcome(b)]
+    print(f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, "
+          f"{stats['misses']} misses, {stats['uncacheable']} not cacheable)")
+    print(f"uncached {direct_time / len(submissions) * 1000:7.2f}ms per submission")
+    print(f"cached   {cached_time / len(submissions) * 1000:7.2f}ms per submission "
+          f"({direct_time / cached_time:.1f}x faster)")
+    print(f"lookup   {lookup_time / len(submissions) * 1000:7.2f}ms per submission "
+          f"once every result is cached")
+    print(f"{len(wrong)} wrong cache hits")
+    for exercise_id, kind in wrong:
+        print(f"    {exercise_id} ({kind})")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Memory kept alive by ExecutionResults under each retention policy.
+
+Simulates batch grading of the interview prep module: every solution
+is "submitted" SUBMISSIONS times, each run's result is kept (as a batch
+grader collecting results would) and the memory still traced by
+tracemalloc afterwards is reported per policy. The "named" policy keeps
+only the functions the exercise's tests call. A function keeps its
+module namespace alive through __globals__, so only "weak", "summary"
+and "none" actually release the rest of the namespace.
+
+    python benchmarks/retention.py [module_id]
+"""
+
+import ast
+import gc
+import sys
+import tracemalloc
+
+from common import iter_solutions
+
+from pylearn.engine.runner import run_code
+
+SUBMISSIONS = 200
+
+
+def called_names(exercise):
+    """Names the exercise's test snippets load (the symbols tests need)."""
+    names = set()
+    for test in exercise.test_cases:
+        tree = ast.parse(test.get("input_code", ""))
+        names.update(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+    return sorted(names)
+
+
+def retained_bytes(solutions, policy_for):
+    gc.collect()
+    tracemalloc.start()
+    results = []
+    for _, exercise in solutions:
+        policy = policy_for(exercise)
+        for _ in range(SUBMISSIONS):
+            results.append(run_code(exercise.solution, retain=policy, metrics="off"))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return current
+
+
+def main():
+    module_id = sys.argv[1] if len(sys.argv) > 1 else "10_interview_prep"
+    solutions = list(iter_solutions([module_id]))
+    print(f"Python {sys.version.split()[0]}: {module_id}, "
+          f"{len(solutions)} exercises x {SUBMISSIONS} submissions")
+
+    policies = {
+        "all": lambda ex: "all",
+        "named": called_names,
+        "weak": lambda ex: dict.fromkeys(called_names(ex), "weak"),
+        "summary": lambda ex: dict.fromkeys(called_names(ex), "summary"),
+        "none": lambda ex: "none",
+    }
+    # Warm the code cache so compiled code is not counted against "all".
+    for _, exercise in solutions:
+        run_code(exercise.solution)
+    retained = {name: retained_bytes(solutions, policy)
+                for name, policy in policies.items()}
+    for name, size in retained.items():
+        saved = retained["all"] - size
+        print(f"{name:8} {size / 1024:10.1f} KiB retained  "
+              f"{saved / 1024:10.1f} KiB saved "
+              f"({saved / retained['all'] * 100:5.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
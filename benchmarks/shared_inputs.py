@@ -0,0 +1,75 @@
+"""Stress-test inputs by pickle vs shared memory.
+
+Each interview problem below gets one hidden stress test with SIZE
+integers, validated on a WorkerPool two ways:
+
+  pickle  the input is a list in the test case, pickled to the worker
+          with every submission
+  shared  the input is a SharedArray: written to shared memory once,
+          sent as a small reference, seen by the learner as a memoryview
+
+Reports the time per validation (including the learner's own work) and
+the input throughput in integers delivered per second.
+"""
+
+import sys
+import time
+from dataclasses import replace
+
+from common import iter_solutions
+
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.shared_inputs import SharedArray
+
+SIZE = 1_000_000
+ROUNDS = 3
+
+
+def stress_tests(shared):
+    wrap = SharedArray if shared else list
+    evens = range(0, 2 * SIZE, 2)
+    odds = range(1, 2 * SIZE, 2)
+    return {
+        "binary_search_ex": {
+            "input_code": f"print(binary_search(nums, {2 * SIZE - 4}))",
+            "expected": str(SIZE - 2), "inputs": {"nums": wrap(evens)},
+        },
+        "two_sum": {
+            "input_code": f"print(two_sum(nums, {2 * SIZE - 3}))",
+            "expected": f"[{SIZE - 2}, {SIZE - 1}]", "inputs": {"nums": wrap(range(SIZE))},
+        },
+        "merge_sorted": {
+            "input_code": "merged = merge_sorted(a, b)\nprint(len(merged), merged[-1])",
+            "expected": f"{2 * SIZE} {2 * SIZE - 1}",
+            "inputs": {"a": wrap(evens), "b": wrap(odds)},
+        },
+    }
+
+
+def input_size(test):
+    return sum(len(value) for value in test["inputs"].values())
+
+
+def main():
+    exercises = {e.id: e for _, e in iter_solutions(["10_interview_prep"])}
+    print(f"Python {sys.version.split()[0]}, {SIZE:,} integers per input, "
+          f"best of {ROUNDS}")
+
+    with WorkerPool(size=1) as pool:
+        for transport in ("pickle", "shared"):
+            for exercise_id, test in stress_tests(transport == "shared").items():
+                exercise = replace(exercises[exercise_id],
+                                   test_cases=[dict(test, name="Stress")])
+                best = float("inf")
+                for _ in range(ROUNDS):
+                    start = time.perf_counter()
+                    result = pool.validate(exercise, exercise.solution)
+                    best = min(best, time.perf_counter() - start)
+                status = "ok" if result.success else f"FAILED {result.error or result.failed}"
+                rate = input_size(test) / best / 1e6
+                print(f"{transport:7} {exercise_id:17} {best * 1000:8.1f}ms   "
+                      f"{rate:7.1f}M ints/s   {status}")
+
+
+if __name__ == "__main__":
+    main()
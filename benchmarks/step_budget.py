@@ -0,0 +1,36 @@
+"""Overhead of the in-process step budget versus plain exec().
+
+Validates every curriculum solution with and without a step budget and
+prints the per-exercise and total cost.
+"""
+
+import sys
+
+from common import iter_solutions, best_of, fmt_us
+
+from pylearn.config import DEFAULT_STEP_BUDGET
+from pylearn.engine.validator import validate_exercise
+
+
+def main():
+    mode = "sys.monitoring" if hasattr(sys, "monitoring") else "sys.settrace"
+    print(f"Python {sys.version.split()[0]} ({mode})")
+    print(f"{'exercise':40} {'plain':>11} {'budget':>11} {'overhead':>9}")
+
+    total_plain = total_budget = 0.0
+    for module, exercise in iter_solutions():
+        plain = best_of(lambda: validate_exercise(exercise, exercise.solution))
+        budget = best_of(lambda: validate_exercise(
+            exercise, exercise.solution, step_budget=DEFAULT_STEP_BUDGET))
+        total_plain += plain
+        total_budget += budget
+        name = f"{module.id}/{exercise.id}"
+        print(f"{name:40} {fmt_us(plain)} {fmt_us(budget)} "
+              f"{(budget / plain - 1) * 100:8.1f}%")
+
+    print(f"{'TOTAL':40} {fmt_us(total_plain)} {fmt_us(total_budget)} "
+          f"{(total_budget / total_plain - 1) * 100:8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Subinterpreters vs threads vs processes on the curriculum.
+
+Every solution is validated ROUNDS times by WORKERS concurrent callers
+on each backend:
+
+  thread          one InProcessBackend shared by WORKERS threads (one
+                  GIL, and threads share sys.stdout, so captured output
+                  can end up in the wrong result)
+  subinterpreter  a SubinterpreterPool of WORKERS isolated interpreters,
+                  each with its own GIL (Python 3.12+)
+  process         a WorkerPool of WORKERS worker processes
+
+Reports startup (creating the backend and running its first job),
+throughput in validations per second, and how many validations differ
+from a sequential in-process run. Own-GIL interpreters only run in
+parallel with as many free cores as WORKERS.
+
+    python benchmarks/subinterpreters.py [WORKERS]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import iter_solutions
+
+from pylearn.engine.backends import InProcessBackend
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.subinterpreters import HAS_SUBINTERPRETERS, SubinterpreterPool
+
+ROUNDS = 3
+
+
+def validation_fields(result):
+    if result is None:
+        return None
+    return (result.success, result.error, result.limit, result.summary,
+            [p["name"] for p in result.passed],
+            [(f["name"], f["expected"], f["actual"]) for f in result.failed])
+
+
+def start(name, workers):
+    if name == "thread":
+        return InProcessBackend()
+    if name == "subinterpreter":
+        return SubinterpreterPool(size=workers)
+    return WorkerPool(size=workers)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    exercises = [exercise for _, exercise in iter_solutions()]
+    print(f"Python {sys.version.split()[0]}, {len(exercises)} solutions x {ROUNDS}, "
+          f"{workers} workers, {os.cpu_count()} CPUs")
+
+    reference = [validation_fields(InProcessBackend().validate(e, e.solution))
+                 for e in exercises]
+    names = ["thread", "subinterpreter", "process"]
+    if not HAS_SUBINTERPRETERS:
+        print("subinterpreter: needs Python 3.12+, skipped")
+        names.remove("subinterpreter")
+
+    for name in names:
+        started = time.perf_counter()
+        backend = start(name, workers)
+        backend.run_code("pass")
+        startup = time.perf_counter() - started
+        try:
+            with ThreadPoolExecutor(workers) as executor:
+                started = time.perf_counter()
+                results = list(executor.map(
+                    lambda e: backend.validate(e, e.solution), exercises * ROUNDS))
+                elapsed = time.perf_counter() - started
+        finally:
+            backend.close()
+            # Racing redirect_stdout() calls in threads can leave the
+            # streams pointing at some run's capture buffer.
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        mismatched = sum(validation_fields(result) != reference[i % len(exercises)]
+                         for i, result in enumerate(results))
+        print(f"{name:15} startup {startup * 1000:7.1f}ms   "
+              f"{len(results) / elapsed:7.1f} validations/s   "
+              f"{mismatched} mismatched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Latency of getting a fresh worker: zygote fork vs plain fork vs spawn.
+
+Each strategy runs the same trivial submission through run_code() in a
+brand-new process and reports the round-trip time:
+
+  zygote  fork from a pre-warmed zygote (preloaded modules, gc.freeze())
+  fork    os.fork() of this process, then run the job
+  spawn   a fresh interpreter via multiprocessing's "spawn" start method
+"""
+
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pylearn.engine.forking import fork_call  # noqa: E402
+from pylearn.engine.pool import _run_code_job  # noqa: E402
+from pylearn.engine.zygote import Zygote  # noqa: E402
+
+CODE = "from collections import Counter\nprint(Counter('hello').most_common(1))"
+ROUNDS = 30
+
+
+def _spawn_target(conn):
+    conn.send(_run_code_job(CODE))
+
+
+def time_zygote(zygote):
+    start = time.perf_counter()
+    zygote.call(_run_code_job, CODE)
+    return time.perf_counter() - start
+
+
+def time_fork():
+    start = time.perf_counter()
+    fork_call(_run_code_job, CODE).result()
+    return time.perf_counter() - start
+
+
+def time_spawn(ctx):
+    start = time.perf_counter()
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=_spawn_target, args=(child,))
+    process.start()
+    parent.recv()
+    process.join()
+    return time.perf_counter() - start
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:8} median {statistics.median(ms):8.2f}ms   "
+          f"min {min(ms):8.2f}ms   max {max(ms):8.2f}ms")
+
+
+def main():
+    print(f"Python {sys.version.split()[0]}, {ROUNDS} rounds")
+    with Zygote() as zygote:
+        time_zygote(zygote)  # wait for the zygote to finish preloading
+        report("zygote", [time_zygote(zygote) for _ in range(ROUNDS)])
+    report("fork", [time_fork() for _ in range(ROUNDS)])
+    ctx = multiprocessing.get_context("spawn")
+    report("spawn", [time_spawn(ctx) for _ in range(ROUNDS // 3)])
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,21 @@ def cli():
 
     if "--help" in args or "-h" in args:
         print("Usage: pylearn [options]")
+        print("       pylearn worker [ADDRESS] [--workers N]")
         print()
         print("Options:")
         print("  -h, --help             Show this help message")
         print("  -v, --version          Show version")
         print("  --reset-progress       Clear all progress data")
+        print()
+        print("Commands:")
+        print("  worker                 Run code for remote clients on ADDRESS")
+        print("                         (host:port or socket path, default "
+              "127.0.0.1:7341)")
+        return
+
+    if args and args[0] == "worker":
+        worker(args[1:])
         return
 
     if "--version" in args or "-v" in args:
@@ -39,4 +49,25 @@ def cli():
     main()
 
 
-cli()
+def worker(args):
+    """Run a worker daemon: pylearn worker [ADDRESS] [--workers N]."""
+    from pylearn.config import WORKER_LISTEN, WORKER_POOL_SIZE
+    from pylearn.engine.remote import serve_worker
+
+    address = WORKER_LISTEN
+    workers = WORKER_POOL_SIZE
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--workers" and args and args[0].isdigit():
+            workers = int(args.pop(0))
+        elif not arg.startswith("-"):
+            address = arg
+        else:
+            print(f"Unknown worker option: {arg}")
+            sys.exit(2)
+    serve_worker(address, workers=workers)
+
+
+if __name__ == "__main__":
+    cli()
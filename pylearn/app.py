@@ -1,7 +1,11 @@
 """Main application loop and screen routing."""
 
 import sys
-from pylearn.config import APP_NAME, APP_VERSION, APP_TAGLINE, QUIZ_PASS_THRESHOLD
+from dataclasses import replace
+from pylearn.config import (
+    APP_NAME, APP_VERSION, APP_TAGLINE, QUIZ_PASS_THRESHOLD,
+    SHOW_COVERAGE, FAIL_FAST, ADAPTIVE_TEST_ORDER,
+)
 from pylearn.cli import (
     show_menu, show_lesson, show_exercise, show_validation_result,
     show_quiz_question, show_quiz_result, show_progress_dashboard,
@@ -11,11 +15,14 @@ from pylearn.utils.terminal import (
     bold, dim, success, error, warning, info, highlight, print_box,
 )
 from pylearn.curriculum import discover_modules
-from pylearn.engine.validator import validate_output, validate_with_tests, validate_with_function
+from pylearn.engine.backends import get_backend
+from pylearn.engine.differential import GENERATED_PREFIX
+from pylearn.engine.resultcache import validate_cached
+from pylearn.engine.validator import order_tests
 from pylearn.progress.tracker import (
     mark_lesson_complete, mark_exercise_complete,
-    record_exercise_attempt, record_quiz_score,
-    is_lesson_complete, is_exercise_complete, get_quiz_score,
+    record_exercise_attempt, record_test_results, record_quiz_score,
+    is_lesson_complete, is_exercise_complete, get_quiz_score, get_test_history,
 )
 from pylearn.progress.stats import get_dashboard_stats
 
@@ -196,17 +203,20 @@ def run_exercise(module, exercise):
 
         record_exercise_attempt(module.id, exercise.id)
 
-        # Validate
-        if exercise.validator:
-            result = validate_with_function(code, exercise.validator)
-        elif exercise.test_cases:
-            result = validate_with_tests(code, exercise.test_cases)
-        elif exercise.expected_output:
-            result = validate_output(code, exercise.expected_output)
-        else:
+        # Validate on the configured backend: a worker process so runaway
+        # code can be stopped, or in-process under a step budget.
+        # Resubmitting equivalent code is answered from the result cache.
+        backend = get_backend()
+        graded = exercise
+        if ADAPTIVE_TEST_ORDER and exercise.test_cases:
+            last_failed, failure_counts = get_test_history(module.id, exercise.id)
+            graded = replace(exercise, test_cases=order_tests(
+                exercise.test_cases, last_failed, failure_counts))
+        result = validate_cached(backend, graded, code, coverage=SHOW_COVERAGE,
+                                 fail_fast=FAIL_FAST)
+        if result is None:
             # No validation - just run and show output
-            from pylearn.engine.runner import run_code
-            exec_result = run_code(code)
+            exec_result = backend.run_code(code)
             if exec_result.success:
                 print(f"\n  {success('Output:')}")
                 if exec_result.stdout:
@@ -218,6 +228,11 @@ def run_exercise(module, exercise):
             press_enter()
             return 'done'
 
+        if exercise.test_cases and result.error is None:
+            # Generated tests are new every run; order_tests() never sees them again.
+            record_test_results(module.id, exercise.id,
+                                [test["name"] for test in result.failed
+                                 if not test["name"].startswith(GENERATED_PREFIX)])
         show_validation_result(result)
 
         if result.success:
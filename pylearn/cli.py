@@ -6,6 +6,9 @@ from pylearn.utils.terminal import (
     code_style, header_style, get_terminal_size, Color, colorize,
 )
 from pylearn.utils.formatting import format_code_block, wrap_text
+from pylearn.engine.differential import GENERATED_PREFIX
+from pylearn.engine.memory import memory_submission
+from pylearn.engine.profiling import profile_submission
 
 
 def show_menu(title, options, subtitle=None, show_back=True, show_quit=True):
@@ -112,7 +115,7 @@ def show_exercise(exercise):
     print_separator()
     print()
     print(f"  {info('Enter your code below')} {dim('(type DONE on a new line to submit, BACK to go back):')}")
-    print(f"  {dim('Hint: type HINT for a hint, SOLUTION to see the answer')}")
+    print(f"  {dim('Hint: type HINT for a hint, SOLUTION to see the answer, PROFILE or MEMORY to measure your code')}")
     print()
 
     hint_index = 0
@@ -144,6 +147,18 @@ def show_exercise(exercise):
                 else:
                     print(f"\n  {dim('No solution available.')}\n")
                 continue
+            elif upper == "PROFILE":
+                if lines:
+                    show_profile_report(profile_submission(exercise, "\n".join(lines)))
+                else:
+                    print(f"\n  {dim('Type some code first, then PROFILE.')}\n")
+                continue
+            elif upper == "MEMORY":
+                if lines:
+                    show_memory_report(memory_submission(exercise, "\n".join(lines)))
+                else:
+                    print(f"\n  {dim('Type some code first, then MEMORY.')}\n")
+                continue
             else:
                 lines.append(line)
 
@@ -163,21 +178,95 @@ def show_validation_result(result):
 
     if result.success:
         print_box(f"All tests passed! ({result.summary})", style="success")
+        coverage = result.coverage
+        if coverage is not None and coverage.missed and coverage.by_test:
+            lines = ", ".join(str(line) for line in sorted(coverage.missed))
+            print(f"  {dim(f'Never reached by any test: line(s) {lines}')}")
     else:
         print()
+        generated = 0
         for p in result.passed:
+            if p['name'].startswith(GENERATED_PREFIX):
+                generated += 1
+                continue
             print(f"  {success('PASS')} {p['name']}")
+        if generated:
+            print(f"  {success('PASS')} {generated} generated test(s)")
         for f in result.failed:
             print(f"  {error('FAIL')} {f['name']}")
             print(f"       Expected: {code_style(f['expected'])}")
             print(f"       Got:      {code_style(f['actual'])}")
         print()
         print(f"  {warning(result.summary)}")
+    if result.fork_fallbacks:
+        note = (f"{result.fork_fallbacks} test(s) could not run in their own process "
+                "and shared your code's objects with other tests.")
+        print(f"  {dim(note)}")
 
     print()
     input(f"  {dim('Press Enter to continue...')}")
 
 
+def show_profile_report(report):
+    """Display the top functions of a profiled run."""
+    print()
+    if report.error:
+        print(f"  {error('Error:')} {report.error}")
+        print()
+        return
+
+    if not report.rows:
+        print(f"  {dim('No function calls to report.')}")
+        print()
+        return
+
+    total = f"(total {report.total_time * 1000:.2f} ms)"
+    print(f"  {header_style('Profile')} {dim(total)}")
+    columns = f"{'calls':>10}  {'own ms':>9}  {'total ms':>9}  function"
+    print(f"  {bold(columns)}")
+    for row in report.rows:
+        calls = str(row.calls)
+        if row.primitive_calls != row.calls:
+            calls = f"{row.calls}/{row.primitive_calls}"
+        print(f"  {calls:>10}  {row.own_time * 1000:9.3f}  "
+              f"{row.cumulative_time * 1000:9.3f}  {code_style(row.label)}")
+    print()
+
+
+def _format_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+
+def show_memory_report(report):
+    """Display peak memory, allocation sites and live objects of a run."""
+    print()
+    if report.error:
+        print(f"  {error('Error:')} {report.error}")
+        print()
+        return
+
+    peak = f"(peak {_format_bytes(report.peak_bytes)})"
+    print(f"  {header_style('Memory')} {dim(peak)}")
+    if report.sites:
+        columns = f"{'size':>10}  {'blocks':>7}  line"
+        print(f"  {bold(columns)}")
+        for site in report.sites:
+            print(f"  {_format_bytes(site.size):>10}  {site.count:>7}  "
+                  f"{code_style(str(site.line))}")
+    else:
+        print(f"  {dim('No memory still held by your code.')}")
+
+    if report.objects:
+        more = " (partial)" if report.truncated else ""
+        print(f"  {bold('Live objects' + more + ':')} "
+              + ", ".join(f"{name} x{count}" for name, count in report.objects))
+    print()
+
+
 def show_quiz_question(question, number, total):
     """Display a quiz question and get the answer.
 
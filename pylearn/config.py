@@ -17,3 +17,63 @@ MENU_INDENT = "  "
 
 # Quiz passing score (percentage)
 QUIZ_PASS_THRESHOLD = 70
+
+# Code execution
+EXECUTION_TIMEOUT = 5                 # Seconds before a worker is killed
+WORKER_POOL_SIZE = 2                  # Pre-started worker processes
+MAX_CONCURRENT_RUNS = 8               # In-flight runs for the asyncio API
+# Resource limits for learner code in worker processes, chosen per
+# Exercise.sandbox_profile. A missing key or None leaves that limit alone.
+SANDBOX_PROFILES = {
+    "default": {"memory_mb": 512, "cpu_seconds": 5, "file_size_mb": 1, "processes": 0},
+    "strict": {"memory_mb": 256, "cpu_seconds": 2, "file_size_mb": 0, "processes": 0},
+    "relaxed": {"memory_mb": 2048, "cpu_seconds": 20, "file_size_mb": 16, "processes": 0},
+    "none": {},
+}
+DEFAULT_SANDBOX_PROFILE = "default"
+# Modules the zygote imports before freezing its heap and forking workers
+ZYGOTE_PRELOAD = (
+    "collections", "functools", "dataclasses", "abc", "itertools", "typing",
+    "pylearn.engine.runner", "pylearn.engine.validator",
+)
+USE_WORKER_POOL = True                # False: run in-process with a step budget
+# Where learner code runs: "inprocess", "subprocess", "zygote", "remote" or
+# "subinterpreter" (see engine.backends). Unset follows USE_WORKER_POOL.
+EXECUTION_BACKEND = os.environ.get("PYLEARN_BACKEND")
+# Worker servers for the "remote" backend ("host:port" or Unix socket
+# paths, comma-separated in PYLEARN_REMOTE_WORKERS) and the shared secret
+# that authenticates connections to them
+REMOTE_WORKERS = tuple(
+    os.environ.get("PYLEARN_REMOTE_WORKERS", "127.0.0.1:7341").split(",")
+)
+WORKER_AUTHKEY = os.environ.get("PYLEARN_WORKER_KEY")
+# Key shared by servers and clients of one user when WORKER_AUTHKEY is
+# unset; generated on first use, readable only by its owner
+WORKER_KEY_FILE = os.path.join(DATA_DIR, "worker.key")
+WORKER_LISTEN = "127.0.0.1:7341"      # Default address for `pylearn worker`
+HEARTBEAT_INTERVAL = 2.0              # Seconds between pings of each worker server
+HEARTBEAT_TIMEOUT = 5.0               # Seconds without a pong before a server is skipped
+DEFAULT_STEP_BUDGET = 5_000_000       # Executed lines allowed per in-process run
+MAX_OUTPUT_BYTES = 1_000_000          # stdout/stderr cap before a run is stopped
+OUTPUT_KEEP_BYTES = 25_000            # Bytes kept from each end of long output
+METRICS_LEVEL = "basic"               # "off", "basic" (timers) or "full" (+ tracemalloc)
+CODE_CACHE_SIZE = 512                 # Compiled code objects kept in memory
+CODE_CACHE_ON_DISK = False            # Also keep marshalled bytecode on disk
+CODE_CACHE_DIR = os.path.join(DATA_DIR, "bytecode")
+RESULT_CACHE_SIZE = 4096              # Validation results kept in memory; 0 = off
+RESULT_CACHE_ON_DISK = False          # Also keep results on disk, shared across runs
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, "results")
+DETERMINISTIC_SEED = 0                # random.seed() for deterministic runs
+FROZEN_TIME = 1_704_067_200.0         # time.time() in deterministic runs (2024-01-01 UTC)
+WORKER_HASH_SEED = 0                  # PYTHONHASHSEED for workers; None = random
+MAX_FORKED_TESTS = 4                  # Test cases run at once with test_isolation="fork"
+PRE_CODE_SNAPSHOTS = 32               # pre_code namespaces kept per process; 0 = off
+RESULT_RETENTION = "all"              # Namespace kept on ExecutionResult; see engine.retention
+SHOW_COVERAGE = True                  # Point out solution lines no test reached
+FLOAT_TOLERANCE = 1e-9                # Relative and absolute tolerance of "float" output matches
+GENERATED_TEST_SEED = 0               # random.Random seed of Exercise.generator inputs
+FAIL_FAST = False                     # Stop at the first failing test instead of running them all
+ADAPTIVE_TEST_ORDER = True            # Run tests that failed before first
+PROFILE_TOP_N = 10                    # Functions listed by the PROFILE command
+MEMORY_TOP_N = 10                     # Lines and object types listed by the MEMORY command
+MEMORY_TRACE_FRAMES = 25              # tracemalloc frames kept per allocation
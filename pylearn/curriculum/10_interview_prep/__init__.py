@@ -1,5 +1,7 @@
 """Module 10: Interview Prep -- arrays, strings, linked lists, and common algorithms."""
 
+import string
+
 from pylearn.curriculum.base import Module, Lesson, Exercise, QuizQuestion
 
 # ---------------------------------------------------------------------------
@@ -282,6 +284,77 @@ _lesson_sorting_searching = Lesson(
     ],
 )
 
+# ---------------------------------------------------------------------------
+# Generated inputs (checked against each exercise's solution)
+# ---------------------------------------------------------------------------
+
+
+def _gen_two_sum(rng):
+    """Distinct numbers with exactly one pair adding up to the target."""
+    while True:
+        nums = rng.sample(range(-50, 51), rng.randint(2, 10))
+        i, j = sorted(rng.sample(range(len(nums)), 2))
+        target = nums[i] + nums[j]
+        pairs = sum(1 for a in range(len(nums)) for b in range(a + 1, len(nums))
+                    if nums[a] + nums[b] == target)
+        if pairs == 1:
+            return {"input_code": f"print(two_sum({nums}, {target}))"}
+
+
+def _gen_reverse_string(rng):
+    s = "".join(rng.choices(string.ascii_letters + string.digits + " .,!'",
+                            k=rng.randint(0, 20)))
+    return {"input_code": f"print(reverse_string({s!r}))"}
+
+
+def _gen_is_palindrome(rng):
+    chars = rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(0, 8))
+    if rng.random() < 0.5:
+        chars += chars[::-1][rng.randint(0, 1):]
+    chars = [ch.upper() if rng.random() < 0.3 else ch for ch in chars]
+    for _ in range(rng.randint(0, 4)):
+        chars.insert(rng.randint(0, len(chars)), rng.choice(" ,.:!?'"))
+    return {"input_code": f"print(is_palindrome({''.join(chars)!r}))"}
+
+
+def _gen_max_subarray(rng):
+    nums = [rng.randint(-20, 20) for _ in range(rng.randint(1, 15))]
+    return {"input_code": f"print(max_subarray({nums}))"}
+
+
+def _gen_is_anagram(rng):
+    s = "".join(rng.choices("abcde", k=rng.randint(0, 8)))
+    kind = rng.choice(("shuffled", "changed", "random"))
+    if kind == "shuffled":
+        t = "".join(rng.sample(s, len(s)))
+    elif kind == "changed" and s:
+        t = s[:-1] + rng.choice("abcdef")
+    else:
+        t = "".join(rng.choices("abcde", k=rng.randint(0, 8)))
+    return {"input_code": f"print(is_anagram({s!r}, {t!r}))"}
+
+
+def _gen_merge_sorted(rng):
+    a = sorted(rng.randint(0, 20) for _ in range(rng.randint(0, 8)))
+    b = sorted(rng.randint(0, 20) for _ in range(rng.randint(0, 8)))
+    return {"input_code": f"print(merge_sorted({a}, {b}))"}
+
+
+def _gen_fib(rng):
+    return {"input_code": f"print(fib({rng.randint(0, 60)}))"}
+
+
+def _gen_remove_duplicates(rng):
+    nums = [rng.randint(0, 6) for _ in range(rng.randint(0, 15))]
+    return {"input_code": f"print(remove_duplicates({nums}))"}
+
+
+def _gen_binary_search(rng):
+    nums = sorted(rng.sample(range(-30, 31), rng.randint(0, 12)))
+    target = rng.choice(nums) if nums and rng.random() < 0.6 else rng.randint(-32, 32)
+    return {"input_code": f"print(binary_search({nums}, {target}))"}
+
+
 # ---------------------------------------------------------------------------
 # Exercises
 # ---------------------------------------------------------------------------
@@ -307,6 +380,7 @@ _exercise_two_sum = Exercise(
         {"name": "Middle elements", "input_code": "print(two_sum([3, 2, 4], 6))", "expected": "[1, 2]"},
         {"name": "Same numbers", "input_code": "print(two_sum([3, 3], 6))", "expected": "[0, 1]"},
     ],
+    generator=_gen_two_sum,
     hints=[
         "Use a dictionary to store seen values and their indices",
         "For each number, check if target - number exists in the dict",
@@ -344,6 +418,7 @@ _exercise_reverse_string = Exercise(
         {"name": "Empty", "input_code": "print(reverse_string(''))", "expected": ""},
         {"name": "Palindrome", "input_code": "print(reverse_string('racecar'))", "expected": "racecar"},
     ],
+    generator=_gen_reverse_string,
     hints=[
         "Try building the string character by character from the end",
         "Or use a list and join",
@@ -381,6 +456,7 @@ _exercise_valid_palindrome = Exercise(
         {"name": "Not palindrome", "input_code": "print(is_palindrome('race a car'))", "expected": "False"},
         {"name": "Empty string", "input_code": "print(is_palindrome(''))", "expected": "True"},
     ],
+    generator=_gen_is_palindrome,
     hints=[
         "Filter out non-alphanumeric characters first",
         "Use .isalnum() and .lower()",
@@ -416,6 +492,7 @@ _exercise_max_subarray = Exercise(
         {"name": "All negative", "input_code": "print(max_subarray([-1, -2, -3]))", "expected": "-1"},
         {"name": "Single", "input_code": "print(max_subarray([5]))", "expected": "5"},
     ],
+    generator=_gen_max_subarray,
     hints=[
         "Track current_sum and max_sum",
         "Reset current_sum to current element if it drops below it",
@@ -452,6 +529,7 @@ _exercise_anagram_check = Exercise(
         {"name": "Not anagram", "input_code": "print(is_anagram('rat', 'car'))", "expected": "False"},
         {"name": "Different lengths", "input_code": "print(is_anagram('ab', 'abc'))", "expected": "False"},
     ],
+    generator=_gen_is_anagram,
     hints=[
         "Compare character frequencies using a dict or Counter",
     ],
@@ -486,6 +564,7 @@ _exercise_merge_sorted = Exercise(
         {"name": "Empty", "input_code": "print(merge_sorted([], [1, 2]))", "expected": "[1, 2]"},
         {"name": "Overlapping", "input_code": "print(merge_sorted([1, 2, 3], [2, 3, 4]))", "expected": "[1, 2, 2, 3, 3, 4]"},
     ],
+    generator=_gen_merge_sorted,
     hints=[
         "Use two pointers, one for each list",
         "Compare elements and append the smaller one",
@@ -530,6 +609,7 @@ _exercise_fibonacci = Exercise(
         {"name": "fib(10)", "input_code": "print(fib(10))", "expected": "55"},
         {"name": "fib(20)", "input_code": "print(fib(20))", "expected": "6765"},
     ],
+    generator=_gen_fib,
     hints=[
         "Iterative approach is O(n) time and O(1) space",
         "Use two variables to track previous two values",
@@ -566,6 +646,7 @@ _exercise_remove_duplicates = Exercise(
         {"name": "All same", "input_code": "print(remove_duplicates([1, 1, 1]))", "expected": "[1]"},
         {"name": "No dupes", "input_code": "print(remove_duplicates([1, 2, 3]))", "expected": "[1, 2, 3]"},
     ],
+    generator=_gen_remove_duplicates,
     hints=[
         "Use a set to track seen values",
         "Iterate and add to result only if not seen",
@@ -608,6 +689,7 @@ _exercise_binary_search = Exercise(
         {"name": "Found first", "input_code": "print(binary_search([1, 3, 5, 7, 9], 1))", "expected": "0"},
         {"name": "Not found", "input_code": "print(binary_search([1, 3, 5, 7, 9], 4))", "expected": "-1"},
     ],
+    generator=_gen_binary_search,
     hints=[
         "Use two pointers: left and right",
         "Calculate mid = (left + right) // 2",
@@ -5,13 +5,16 @@ import pkgutil
 import os
 import re
 from pylearn.curriculum.base import Module
+from pylearn.engine.matching import compile_matchers
 
 
 def discover_modules():
     """Scan curriculum subdirectories and load Module objects.
 
     Each subdirectory (e.g., 01_basics/) must have an __init__.py
-    that exposes a `module` variable of type Module.
+    that exposes a `module` variable of type Module. The output
+    matchers of its exercises are compiled here, so a module whose
+    expected outputs do not fit their match mode is not loaded.
 
     Returns:
         List of Module objects sorted by order.
@@ -37,6 +40,8 @@ def discover_modules():
             mod = importlib.import_module(f"pylearn.curriculum.{item}")
             if hasattr(mod, "module"):
                 curriculum_module = mod.module
+                for exercise in curriculum_module.exercises:
+                    compile_matchers(exercise)
                 curriculum_module.order = order
                 modules.append(curriculum_module)
         except Exception as e:
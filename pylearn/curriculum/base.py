@@ -21,12 +21,21 @@ class Exercise:
     title: str
     description: str                  # What to do
     starter_code: str = ""            # Boilerplate to start with
+    pre_code: str = ""                # Setup run before the learner's code
     expected_output: str = ""         # Simple output matching
     test_cases: List[dict] = field(default_factory=list)  # Advanced validation
     validator: Optional[Callable] = None  # Custom validator function
     hints: List[str] = field(default_factory=list)
     solution: str = ""                # Revealed on request
     difficulty: str = "easy"          # easy, medium, hard
+    step_budget: Optional[int] = None  # Max executed lines in-process
+    sandbox_profile: Optional[str] = None  # Key of config.SANDBOX_PROFILES
+    deterministic: bool = True        # Seed random and freeze the clock when grading
+    test_isolation: str = "copy"      # "copy" (shallow namespace copy) or "fork"
+    parallel_tests: int = 1           # Max workers sharing its test cases (engine.parallel)
+    match: str = "exact"              # Output comparison; tests may set their own (engine.matching)
+    generator: Optional[Callable] = None  # rng -> test case checked against the solution
+    generated_tests: int = 100        # Cases made by generator (engine.differential)
 
 
 @dataclass
@@ -0,0 +1,146 @@
+"""asyncio API for running and validating code without blocking the loop.
+
+Work is handed to a WorkerPool through a small thread pool, and a
+per-loop semaphore caps how many runs are in flight. Any number of
+coroutines can await results; only `max_concurrency` threads and worker
+processes are ever busy.
+
+Validation results are cached by submission (see
+pylearn.engine.resultcache), so resubmissions of equivalent code are
+answered without a worker.
+
+Usage:
+    result = await run_code_async("print('hi')")
+    result = await validate_async(exercise, code)
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from pylearn.config import MAX_CONCURRENT_RUNS
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.resultcache import get_result_cache
+
+
+class AsyncGrader:
+    """Coroutine front end to a WorkerPool with bounded concurrency.
+
+    Args:
+        pool: WorkerPool to run jobs on. By default the grader starts
+            its own pool with `max_concurrency` workers on first use.
+        max_concurrency: Maximum number of runs in flight at once.
+        cache: ResultCache for validations; defaults to the shared one
+            (None when RESULT_CACHE_SIZE is 0). Pass False for none.
+    """
+
+    def __init__(self, pool=None, max_concurrency=MAX_CONCURRENT_RUNS, cache=None):
+        self.max_concurrency = max_concurrency
+        self.cache = get_result_cache() if cache is None else cache or None
+        self._pool = pool
+        self._owns_pool = pool is None
+        self._pool_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="pylearn-grader",
+        )
+        # asyncio primitives are bound to one event loop.
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = WorkerPool(size=self.max_concurrency)
+            return self._pool
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _submit(self, method_name, *args, **kwargs):
+        """Run a WorkerPool method in the executor, honouring cancellation."""
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+
+        def job():
+            method = getattr(self._get_pool(), method_name)
+            return method(*args, cancel_event=cancel_event, **kwargs)
+
+        async with self._semaphore():
+            future = loop.run_in_executor(self._executor, job)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                # Stops the wait in the executor thread and replaces the
+                # worker that was running the job.
+                cancel_event.set()
+                raise
+
+    async def run_code(self, code, timeout=None, pre_code="", deterministic=False):
+        """Coroutine version of WorkerPool.run_code().
+
+        Returns:
+            ExecutionResult
+        """
+        return await self._submit("run_code", code, timeout_hint=timeout,
+                                  pre_code=pre_code, deterministic=deterministic)
+
+    async def validate(self, exercise, code, timeout=None):
+        """Coroutine version of WorkerPool.validate(), through the result cache.
+
+        Returns:
+            ValidationResult, or None if the exercise has no validation.
+        """
+        entry = None
+        if self.cache is not None:
+            entry, result = self.cache.lookup(exercise, code, timeout=timeout)
+            if result is not None:
+                return result
+        result = await self._submit("validate", exercise, code, timeout=timeout)
+        if entry is not None:
+            self.cache.store(entry, result)
+        return result
+
+    def close(self):
+        """Shut down the executor and any pool this grader started."""
+        self._executor.shutdown(wait=True)
+        if self._owns_pool and self._pool is not None:
+            self._pool.close()
+
+
+_default_grader = None
+_default_grader_lock = threading.Lock()
+
+
+def get_grader():
+    """Return the shared AsyncGrader, creating it on first use."""
+    global _default_grader
+    with _default_grader_lock:
+        if _default_grader is None:
+            _default_grader = AsyncGrader()
+            atexit.register(_default_grader.close)
+        return _default_grader
+
+
+async def run_code_async(code, timeout=None, pre_code="", deterministic=False):
+    """Run code in a worker without blocking the event loop.
+
+    Returns:
+        ExecutionResult
+    """
+    return await get_grader().run_code(code, timeout=timeout, pre_code=pre_code,
+                                       deterministic=deterministic)
+
+
+async def validate_async(exercise, code, timeout=None):
+    """Validate code for an exercise without blocking the event loop.
+
+    Returns:
+        ValidationResult, or None if the exercise has no validation.
+    """
+    return await get_grader().validate(exercise, code, timeout=timeout)
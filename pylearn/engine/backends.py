@@ -0,0 +1,276 @@
+"""Execution backends: where learner code actually runs.
+
+    "inprocess"   this process, stopped by a step budget, with a
+                  wall-clock timeout as a fallback (no process isolation)
+    "subprocess"  a local WorkerPool of warm worker processes
+    "zygote"      a child forked per run from a pre-warmed zygote (POSIX)
+    "remote"      WorkerServers on other hosts (see engine.remote)
+    "subinterpreter"
+                  isolated subinterpreters with their own GIL, under a
+                  step budget (Python 3.12+; otherwise "subprocess")
+
+Every backend returns ExecutionResult and ValidationResult with the same
+meaning: crashes and timeouts come back as `error` plus `limit`, and the
+namespace is never kept, since it cannot leave a worker process.
+
+The backend is chosen by EXECUTION_BACKEND (set from the PYLEARN_BACKEND
+environment variable); when that is unset USE_WORKER_POOL picks
+"subprocess" or "inprocess".
+
+Usage:
+    result = get_backend().validate(exercise, code)
+"""
+
+import atexit
+import threading
+import traceback
+
+from pylearn.config import (
+    DEFAULT_STEP_BUDGET, EXECUTION_BACKEND, EXECUTION_TIMEOUT, REMOTE_WORKERS,
+    USE_WORKER_POOL,
+)
+
+BACKENDS = ("inprocess", "subprocess", "zygote", "remote", "subinterpreter")
+
+# Seconds between repeats of an in-process job's timeout once it has
+# expired (see sandbox.time_limit()).
+_TIME_LIMIT_INTERVAL = 0.05
+
+
+class ExecutionBackend:
+    """Interface shared by all backends.
+
+    Subclasses implement call(); run_code() and validate() are built on
+    it. `restores_limits` is False for backends whose processes are
+    thrown away after each job, which may then lower hard limits too.
+    Backends that share the calling process (`in_process`) cannot apply
+    rlimits, so their jobs run unsandboxed under `step_budget` instead.
+    """
+
+    in_process = False      # Jobs run in the calling process
+    restores_limits = True
+    step_budget = None      # Executed lines allowed per run, if limited
+    concurrency = 1         # Jobs that can usefully run at once
+
+    @property
+    def _sandbox(self):
+        """Sandbox profile override passed to jobs (None = the default)."""
+        return "none" if self.in_process else None
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) and return its result.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerCrashed: The job's process died or the job raised.
+        """
+        raise NotImplementedError
+
+    def run_code(self, code, timeout_hint=None, pre_code="", cancel_event=None,
+                 deterministic=False):
+        """Execute code with an enforced timeout.
+
+        Args:
+            code: The Python code string to execute.
+            timeout_hint: Seconds before the run is stopped (defaults to
+                the backend's timeout).
+            pre_code: Code to run before user code (setup).
+            cancel_event: See call(); cancellation is raised, not returned.
+            deterministic: Seed random and freeze the clock (see
+                pylearn.engine.determinism).
+
+        Returns:
+            ExecutionResult with an empty namespace.
+        """
+        from pylearn.engine.pool import (
+            ExecutionTimeout, WorkerCrashed, crash_limit, _run_code_job,
+        )
+        from pylearn.engine.runner import ExecutionResult
+
+        try:
+            return self.call(_run_code_job, code, pre_code, self._sandbox,
+                             self.restores_limits, deterministic, self.step_budget,
+                             timeout=timeout_hint, cancel_event=cancel_event)
+        except (ExecutionTimeout, WorkerCrashed) as e:
+            return ExecutionResult(error=f"{type(e).__name__}: {e}",
+                                   limit=crash_limit(e))
+
+    def validate(self, exercise, code, timeout=None, cancel_event=None,
+                 coverage=False, fail_fast=False):
+        """Validate code for an exercise.
+
+        Timeouts and crashes are reported in the result's `error`;
+        cancellation raises ExecutionCancelled. With `coverage` the
+        result carries a LineCoverage of the user code. An exercise with
+        a `generator` is also checked against its solution on generated
+        inputs (see pylearn.engine.differential). An exercise that sets
+        `parallel_tests` has its test cases validated in chunks on up to
+        that many workers (see pylearn.engine.parallel).
+        `fail_fast` stops at the first failing test case (see
+        pylearn.engine.validator.validate_with_tests).
+
+        Returns:
+            ValidationResult, or None if the exercise has no validation.
+        """
+        from pylearn.engine.differential import with_generated_tests
+        from pylearn.engine.parallel import test_workers, validate_parallel
+        from pylearn.engine.pool import (
+            ExecutionTimeout, WorkerCrashed, crash_limit, _validate_job,
+        )
+        from pylearn.engine.validator import ValidationResult
+
+        exercise = with_generated_tests(exercise)
+        workers = test_workers(exercise, self.concurrency)
+        if workers > 1:
+            return validate_parallel(self, exercise, code, workers, timeout=timeout,
+                                     cancel_event=cancel_event, coverage=coverage,
+                                     fail_fast=fail_fast)
+        try:
+            return self.call(_validate_job, exercise, code,
+                             self.restores_limits, coverage, self._sandbox,
+                             self.step_budget, fail_fast,
+                             timeout=timeout, cancel_event=cancel_event)
+        except (ExecutionTimeout, WorkerCrashed) as e:
+            result = ValidationResult()
+            result.error = f"{type(e).__name__}: {e}"
+            result.limit = crash_limit(e)
+            return result
+
+    def run_batch(self, code, snippets, pre_code="", timeouts=None,
+                  timeout_hint=None, cancel_event=None, deterministic=False):
+        """Run code and then each snippet against it in one round trip.
+
+        Args:
+            code: The Python code string to execute.
+            snippets: Code strings each run in a copy of the code's
+                namespace (e.g. test inputs).
+            pre_code: Code to run before user code (setup).
+            timeouts: Seconds per snippet: a number for all of them or
+                a list (defaults to EXECUTION_TIMEOUT each).
+            timeout_hint: Seconds for the code itself.
+            cancel_event: See call(); cancellation is raised, not returned.
+            deterministic: See run_code().
+
+        Returns:
+            BatchResult (see pylearn.engine.batch). A crash or timeout of
+            the whole batch is reported on every result.
+        """
+        from pylearn.engine.batch import (
+            BatchResult, _run_batch_job, batch_timeout, snippet_timeouts,
+        )
+        from pylearn.engine.pool import ExecutionTimeout, WorkerCrashed, crash_limit
+
+        timeouts = snippet_timeouts(snippets, timeouts)
+        options = {"deterministic": deterministic, "step_budget": self.step_budget}
+        try:
+            return self.call(_run_batch_job, code, snippets, pre_code, timeouts,
+                             timeout_hint, options, self._sandbox,
+                             self.restores_limits,
+                             timeout=batch_timeout(timeout_hint, timeouts),
+                             cancel_event=cancel_event)
+        except (ExecutionTimeout, WorkerCrashed) as e:
+            return BatchResult.failed(f"{type(e).__name__}: {e}", crash_limit(e),
+                                      len(snippets))
+
+    def close(self):
+        """Release the backend's processes or connections."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InProcessBackend(ExecutionBackend):
+    """Runs jobs in the calling process under a step budget.
+
+    There is no sandbox: a run is stopped after `step_budget` executed
+    lines. Code the budget does not trace (e.g. a loop run by exec()) is
+    stopped after `timeout` seconds of wall time instead, when jobs are
+    called from the main thread (see sandbox.time_limit()).
+    `cancel_event` is ignored.
+    """
+
+    in_process = True
+
+    def __init__(self, step_budget=DEFAULT_STEP_BUDGET, timeout=EXECUTION_TIMEOUT):
+        self.step_budget = step_budget
+        self.timeout = timeout
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) here; exceptions raise WorkerCrashed.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            WorkerCrashed: The job raised an exception.
+        """
+        from pylearn.engine.pool import ExecutionTimeout, WorkerCrashed
+        from pylearn.engine.sandbox import TimeLimitExceeded, time_limit
+
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            # Past the deadline, raised again until the job gives up.
+            with time_limit(timeout, interval=_TIME_LIMIT_INTERVAL):
+                return func(*args, **kwargs)
+        except TimeLimitExceeded:
+            raise ExecutionTimeout(
+                f"Execution timed out after {timeout}s (infinite loop?)"
+            )
+        except Exception as e:
+            raise WorkerCrashed("".join(
+                traceback.format_exception(type(e), e, e.__traceback__)
+            ).strip())
+
+
+def backend_name():
+    """Name of the configured backend (see the module docstring)."""
+    if EXECUTION_BACKEND:
+        return EXECUTION_BACKEND
+    return "subprocess" if USE_WORKER_POOL else "inprocess"
+
+
+def create_backend(name):
+    """Start a new, unshared backend by name."""
+    if name == "inprocess":
+        return InProcessBackend()
+    if name == "subprocess":
+        from pylearn.engine.pool import WorkerPool
+        return WorkerPool()
+    if name == "zygote":
+        from pylearn.engine.zygote import Zygote
+        return Zygote()
+    if name == "remote":
+        from pylearn.engine.remote import WorkerCluster
+        return WorkerCluster(REMOTE_WORKERS)
+    if name == "subinterpreter":
+        from pylearn.engine.subinterpreters import SubinterpreterPool
+        try:
+            return SubinterpreterPool()
+        except RuntimeError:
+            return create_backend("subprocess")
+    raise ValueError(f"Unknown execution backend {name!r}; "
+                     f"expected one of {', '.join(BACKENDS)}")
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Return the shared backend called `name` (default: backend_name())."""
+    name = name or backend_name()
+    if name == "subprocess":
+        from pylearn.engine.pool import get_pool
+        return get_pool()
+    if name == "zygote":
+        from pylearn.engine.zygote import get_zygote
+        return get_zygote()
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = _backends[name] = create_backend(name)
+            atexit.register(backend.close)
+        return backend
@@ -0,0 +1,134 @@
+"""Run learner code and many snippets against it in one round trip.
+
+Grading a submission with N test snippets as separate run_code() calls
+costs N+1 worker round trips, each pickling its own result. A batch
+sends the code and every snippet to the worker in one message. The
+worker runs the code, then runs each snippet in a copy of the code's
+namespace, and sends every result back in one reply. Each snippet keeps
+its own timeout (see pylearn.engine.sandbox.time_limit), so one slow
+test does not take the others' time.
+
+Usage:
+    batch = get_backend().run_batch(code, ["print(f(1))", "print(f(2))"],
+                                    timeouts=2)
+    batch.results[0].stdout       # output of the first snippet
+    batch.round_trips_saved       # 2
+"""
+
+from pylearn.config import EXECUTION_TIMEOUT
+from pylearn.engine.runner import ExecutionResult, run_code
+from pylearn.engine.sandbox import sandbox_limits
+from pylearn.engine.snapshots import call_in_snapshot, failure_details, get_snapshot
+
+# Extra seconds allowed for a whole batch beyond the sum of its timeouts.
+_BATCH_GRACE = 1
+
+
+class BatchResult:
+    """Results of a batch: the code's own run, then one per snippet."""
+
+    def __init__(self, code_result, results=None, round_trips=1):
+        self.code_result = code_result    # ExecutionResult of the code itself
+        self.results = results or []      # ExecutionResult per snippet, in order
+        self.round_trips = round_trips    # Worker round trips actually made
+
+    @property
+    def success(self):
+        return self.code_result.success and all(r.success for r in self.results)
+
+    @property
+    def round_trips_saved(self):
+        """Round trips avoided compared with one run_code() per run."""
+        return 1 + len(self.results) - self.round_trips
+
+    @classmethod
+    def failed(cls, error, limit, snippet_count):
+        """A batch that could not be run at all."""
+        return cls(ExecutionResult(error=error, limit=limit),
+                   _not_run(snippet_count, error))
+
+
+def _not_run(count, error):
+    return [ExecutionResult(error=f"Not run: {error.splitlines()[0]}")
+            for _ in range(count)]
+
+
+def snippet_timeouts(snippets, timeouts=None):
+    """Expand `timeouts` (None, a number or a list) to one per snippet."""
+    if timeouts is None:
+        timeouts = EXECUTION_TIMEOUT
+    if isinstance(timeouts, (int, float)):
+        return [timeouts] * len(snippets)
+    if len(timeouts) != len(snippets):
+        raise ValueError(f"Got {len(timeouts)} timeouts for {len(snippets)} snippets")
+    return list(timeouts)
+
+
+def batch_timeout(code_timeout, timeouts):
+    """Wall-clock allowance for a whole batch, as a backstop in the parent."""
+    return (code_timeout or EXECUTION_TIMEOUT) + sum(timeouts) + _BATCH_GRACE
+
+
+def run_batch(code, snippets, pre_code="", namespace=None, timeouts=None,
+              code_timeout=None, **options):
+    """Run code, then each snippet in a copy of its namespace, in this process.
+
+    Args:
+        code: The learner's code.
+        snippets: Code strings run after it (e.g. test inputs).
+        pre_code: Setup code run before the learner's code.
+        namespace: Namespace to run the code in (e.g. a pre_code snapshot).
+        timeouts: Seconds per snippet (see snippet_timeouts()).
+        code_timeout: Seconds for the code itself (EXECUTION_TIMEOUT).
+        **options: Passed to every run_code() call (step_budget,
+            deterministic, metrics).
+
+    Returns:
+        BatchResult. Snippets are not run if the code itself fails.
+        Namespaces are never kept, so the result can be pickled.
+    """
+    timeouts = snippet_timeouts(snippets, timeouts)
+    options.pop("retain", None)
+    code_result = run_code(code, pre_code=pre_code, namespace=namespace,
+                           time_limit=code_timeout or EXECUTION_TIMEOUT, **options)
+    if not code_result.success:
+        return BatchResult(code_result, _not_run(len(snippets), "the code itself failed"))
+
+    results = [
+        run_code(snippet, namespace=dict(code_result.namespace), retain="none",
+                 time_limit=timeout, **options)
+        for snippet, timeout in zip(snippets, timeouts)
+    ]
+    code_result.namespace = {}  # Learner objects may not pickle
+    return BatchResult(code_result, results)
+
+
+def _run_batch_in_namespace(namespace, code, snippets, timeouts, code_timeout, options):
+    return run_batch(code, snippets, namespace=namespace, timeouts=timeouts,
+                     code_timeout=code_timeout, **options)
+
+
+def _run_batch_job(code, snippets, pre_code="", timeouts=None, code_timeout=None,
+                   options=None, sandbox=None, restore=True):
+    """Run a batch inside a worker under a sandbox profile.
+
+    pre_code is reused from a snapshot where possible; `restore` is
+    passed to sandbox_limits() as in pylearn.engine.pool._run_code_job().
+    """
+    options = options or {}
+    timeouts = snippet_timeouts(snippets, timeouts)
+    snapshot = get_snapshot(pre_code, options.get("deterministic", False))
+    with sandbox_limits(sandbox, restore=restore):
+        reply = snapshot and call_in_snapshot(
+            snapshot, _run_batch_in_namespace, code, snippets, timeouts,
+            code_timeout, options, throwaway=not restore,
+            timeout=batch_timeout(code_timeout, timeouts),
+        )
+        if reply is None:
+            return run_batch(code, snippets, pre_code=pre_code, timeouts=timeouts,
+                             code_timeout=code_timeout, **options)
+    status, value = reply
+    if status == "ok":
+        return value
+    error, limit = failure_details(status, value)
+    return BatchResult.failed(error, limit, len(snippets))
@@ -0,0 +1,74 @@
+"""Bounded stdout/stderr capture for learner code."""
+
+import io
+
+from pylearn.config import MAX_OUTPUT_BYTES, OUTPUT_KEEP_BYTES
+
+
+class OutputLimitExceeded(BaseException):
+    """Raised from print()/write() once a run has produced too much output.
+
+    Derives from BaseException so `except Exception:` in learner code
+    cannot swallow it.
+    """
+
+
+class BoundedOutput(io.TextIOBase):
+    """A text stream that stops the program once it writes too much.
+
+    Only the first and last `keep` bytes are held in memory, so a print
+    inside an infinite loop costs a bounded amount of RAM. Once more
+    than `limit` bytes have been written, every further write raises
+    OutputLimitExceeded.
+    """
+
+    def __init__(self, limit=MAX_OUTPUT_BYTES, keep=OUTPUT_KEEP_BYTES):
+        self.limit = limit
+        self.keep = keep
+        self.total_bytes = 0
+        self.overflowed = False
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        if not isinstance(s, str):
+            raise TypeError(f"write() argument must be str, not {type(s).__name__}")
+        data = s.encode("utf-8", "replace")
+        self.total_bytes += len(data)
+
+        room = self.keep - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data:
+            self._tail += data
+            # Trim lazily so the cost is amortised over many writes.
+            if len(self._tail) > 2 * self.keep:
+                del self._tail[:-self.keep]
+
+        if self.total_bytes > self.limit:
+            self.overflowed = True
+            raise OutputLimitExceeded(
+                f"output exceeded {self.limit:,} bytes (print inside a loop?)"
+            )
+        return len(s)
+
+    @property
+    def omitted_bytes(self):
+        """Bytes written but not kept for display."""
+        return self.total_bytes - len(self._head) - min(len(self._tail), self.keep)
+
+    def getvalue(self):
+        """Return the captured text, with a marker where output was dropped."""
+        tail = self._tail[-self.keep:] if self.keep else b""
+        omitted = self.omitted_bytes
+        if not omitted:
+            return (self._head + tail).decode("utf-8", "ignore")
+        return (
+            self._head.decode("utf-8", "ignore")
+            + f"\n... ({omitted:,} bytes omitted) ...\n"
+            + tail.decode("utf-8", "ignore")
+        )
@@ -0,0 +1,140 @@
+"""Bounded cache of compiled code objects.
+
+Test snippets and repeated submissions are compiled once and reused.
+An optional on-disk layer keeps marshalled bytecode under DATA_DIR so
+batch grading runs can share compiled snippets across processes.
+"""
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import threading
+from collections import OrderedDict
+
+from pylearn.config import CODE_CACHE_DIR, CODE_CACHE_ON_DISK, CODE_CACHE_SIZE
+
+# Bytecode is only valid for the interpreter version that produced it.
+_MAGIC = importlib.util.MAGIC_NUMBER
+
+
+class CodeCache:
+    """LRU cache of code objects keyed by source hash and filename.
+
+    Usage:
+        cache = CodeCache(maxsize=128)
+        code = cache.compile("print(1)")
+        cache.stats()  # {"hits": 0, "misses": 1, ...}
+    """
+
+    def __init__(self, maxsize=CODE_CACHE_SIZE, disk_dir=None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def _key(source, filename):
+        digest = hashlib.sha256()
+        digest.update(filename.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def compile(self, source, filename="<user_code>"):
+        """Return the code object for `source`, compiling it on a miss.
+
+        Raises:
+            SyntaxError: As compile() would. Failures are not cached.
+        """
+        key = self._key(source, filename)
+        with self._lock:
+            code = self._entries.get(key)
+            if code is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return code
+            self.misses += 1
+
+        code = self._load(key)
+        if code is None:
+            code = compile(source, filename, "exec")
+            self._save(key, code)
+
+        with self._lock:
+            self._entries[key] = code
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return code
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".bin")
+
+    def _load(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if data[:len(_MAGIC)] != _MAGIC:
+            return None
+        try:
+            code = marshal.loads(data[len(_MAGIC):])
+        except (EOFError, ValueError, TypeError):
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return code
+
+    def _save(self, key, code):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(_MAGIC + marshal.dumps(code))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Non-critical -- the in-memory layer still works
+
+    def stats(self):
+        """Return hit/miss counters for checking the cache pays off."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop all in-memory entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+
+_default_cache = CodeCache(
+    disk_dir=CODE_CACHE_DIR if CODE_CACHE_ON_DISK else None,
+)
+
+
+def get_code_cache():
+    """Return the process-wide code cache used by run_code()."""
+    return _default_cache
+
+
+def compile_cached(source, filename="<user_code>"):
+    """compile(source, filename, "exec") through the shared cache."""
+    return _default_cache.compile(source, filename)
@@ -0,0 +1,95 @@
+"""Line coverage of learner code across a submission and its tests.
+
+The first run recorded (the submission itself) fixes which code is the
+learner's: its code objects, and those nested in them, are the only
+ones traced by later runs, so test snippets never count as covered
+lines. Line numbers are relative to the learner's code, with any
+pre_code in front of it subtracted.
+
+Usage:
+    coverage = LineCoverage()
+    result = validate_with_tests(code, tests, coverage=coverage)
+    coverage.missed        # lines no run reached
+    coverage.by_test       # {test name: lines it ran}
+"""
+
+from contextlib import contextmanager
+
+from pylearn.engine.tracing import cover_lines, executable_lines, user_code_objects
+
+
+class LineCoverage:
+    """Which lines of the learner's code ran, in total and per test.
+
+    Args:
+        line_offset: Lines of pre_code compiled in front of the learner's
+            code; they are left out of every line set.
+    """
+
+    def __init__(self, line_offset=0):
+        self.line_offset = line_offset
+        self.executable = set()
+        self.module_lines = set()     # Lines run by the submission itself
+        self.by_test = {}             # Test name -> lines it ran
+        self._code_objects = None
+
+    def __getstate__(self):
+        # Code objects do not pickle; results only need the line sets.
+        state = self.__dict__.copy()
+        state["_code_objects"] = None
+        return state
+
+    def _shift(self, lines):
+        offset = self.line_offset
+        return {line - offset for line in lines if line > offset}
+
+    @contextmanager
+    def record(self, code=None):
+        """Yield the set of learner lines run in the block.
+
+        The first call adopts `code` (the compiled submission) as the
+        learner's code. Line numbers are shifted only once the block ends.
+        """
+        if self._code_objects is None:
+            if code is None:
+                raise ValueError("The first recorded run must pass its code")
+            self._code_objects = user_code_objects(code)
+            self.executable = self._shift(executable_lines(self._code_objects))
+        with cover_lines(self._code_objects) as lines:
+            try:
+                yield lines
+            finally:
+                shifted = self._shift(lines)
+                lines.clear()
+                lines.update(shifted)
+
+    def add_test(self, name, lines):
+        """Record the lines run by one test (merged if the name repeats)."""
+        self.by_test.setdefault(name, set()).update(lines)
+
+    @property
+    def covered(self):
+        lines = set(self.module_lines)
+        for test_lines in self.by_test.values():
+            lines |= test_lines
+        return lines
+
+    @property
+    def missed(self):
+        """Executable lines that neither the submission nor a test ran."""
+        return self.executable - self.covered
+
+    @property
+    def percent(self):
+        if not self.executable:
+            return 100.0
+        return 100.0 * len(self.executable & self.covered) / len(self.executable)
+
+    def to_dict(self):
+        return {
+            "executable": sorted(self.executable),
+            "module": sorted(self.module_lines),
+            "tests": {name: sorted(lines) for name, lines in self.by_test.items()},
+            "missed": sorted(self.missed),
+            "percent": round(self.percent, 1),
+        }
@@ -0,0 +1,130 @@
+"""Deterministic execution: seeded random, frozen clocks, fixed hashing.
+
+Inside deterministic() the global `random` generator is seeded with
+DETERMINISTIC_SEED and time.time(), time.time_ns(), datetime.now(),
+datetime.utcnow(), datetime.today() and date.today() all report
+FROZEN_TIME. Identical submissions then print identical output, so
+grading results can be memoized.
+
+String hashing (and with it set iteration order) is fixed per process
+by PYTHONHASHSEED, which cannot change once the interpreter is running.
+Worker processes are started with WORKER_HASH_SEED; see
+hash_seed_environment().
+
+The patches are process-wide, so only one deterministic run should be
+in flight per process (true for pool workers and zygote children).
+"""
+
+import datetime as _datetime_module
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from pylearn.config import DETERMINISTIC_SEED, FROZEN_TIME, WORKER_HASH_SEED
+
+_real_datetime = _datetime_module.datetime
+_real_date = _datetime_module.date
+
+
+class _FrozenDateTime(_real_datetime):
+    """datetime whose clock methods return FROZEN_TIME."""
+
+    @classmethod
+    def now(cls, tz=None):
+        if tz is None:
+            return cls.utcnow()
+        return cls.fromtimestamp(FROZEN_TIME, tz)
+
+    @classmethod
+    def utcnow(cls):
+        frozen = cls.fromtimestamp(FROZEN_TIME, _datetime_module.timezone.utc)
+        return frozen.replace(tzinfo=None)
+
+    @classmethod
+    def today(cls):
+        return cls.utcnow()
+
+
+class _FrozenDate(_real_date):
+    """date whose today() returns the day of FROZEN_TIME."""
+
+    @classmethod
+    def today(cls):
+        day = _FrozenDateTime.utcnow()
+        return cls(day.year, day.month, day.day)
+
+
+def _module_repr(self):
+    # The C repr only uses the bare type name for subclasses.
+    return "datetime." + super(type(self), self).__repr__()
+
+
+# Learners see these through repr() and type(), so they keep the real names.
+for _cls, _name in ((_FrozenDateTime, "datetime"), (_FrozenDate, "date")):
+    _cls.__name__ = _cls.__qualname__ = _name
+    _cls.__module__ = "datetime"
+    _cls.__repr__ = _module_repr
+
+
+def _frozen_time():
+    return FROZEN_TIME
+
+
+def _frozen_time_ns():
+    return int(FROZEN_TIME * 1_000_000_000)
+
+
+@contextmanager
+def deterministic(enabled=True, seed=DETERMINISTIC_SEED):
+    """Make random numbers and wall-clock time reproducible in the block.
+
+    Args:
+        enabled: If False, do nothing (so callers need not branch).
+        seed: Seed for the global `random` generator.
+    """
+    if not enabled:
+        yield
+        return
+
+    random_state = random.getstate()
+    saved = (time.time, time.time_ns,
+             _datetime_module.datetime, _datetime_module.date)
+    random.seed(seed)
+    time.time = _frozen_time
+    time.time_ns = _frozen_time_ns
+    _datetime_module.datetime = _FrozenDateTime
+    _datetime_module.date = _FrozenDate
+    try:
+        yield
+    finally:
+        (time.time, time.time_ns,
+         _datetime_module.datetime, _datetime_module.date) = saved
+        random.setstate(random_state)
+
+
+_environ_lock = threading.Lock()
+
+
+@contextmanager
+def hash_seed_environment(seed=WORKER_HASH_SEED):
+    """Set PYTHONHASHSEED while starting a child interpreter.
+
+    Wrap Process.start() in this so the child hashes strings (and
+    orders sets of strings) the same way on every run. A seed of None
+    leaves the environment alone.
+    """
+    if seed is None:
+        yield
+        return
+    with _environ_lock:
+        old = os.environ.get("PYTHONHASHSEED")
+        os.environ["PYTHONHASHSEED"] = str(seed)
+        try:
+            yield
+        finally:
+            if old is None:
+                del os.environ["PYTHONHASHSEED"]
+            else:
+                os.environ["PYTHONHASHSEED"] = old
@@ -0,0 +1,115 @@
+"""Differential tests: check learner code against the reference solution.
+
+An exercise with a `generator` gets `generated_tests` extra test cases
+on every validation. The generator is called with a random.Random
+seeded from GENERATED_TEST_SEED and returns a test case without
+"expected" (the keys of validate_with_tests() test cases):
+
+    def _gen_reverse_string(rng):
+        s = "".join(rng.choice("abcxyz ") for _ in range(rng.randint(0, 12)))
+        return {"input_code": f"print(reverse_string({s!r}))"}
+
+The exercise's solution is run on each generated case to get its
+expected output, compared with the exercise's `match` mode. Reference
+outputs are computed once per exercise and seed, in this process (the
+solution is curriculum code, not learner code), and cached; a
+submission only pays for running the learner's code on them. The
+generated cases follow the hand-written ones in the same validation
+job, so they reach the worker in one round trip (or one chunk per
+worker with `parallel_tests`).
+
+Only exercises graded by test_cases use their generator.
+ExecutionBackend.validate() adds the generated tests; code that calls
+pylearn.engine.validator directly can use with_generated_tests().
+"""
+
+import random
+import threading
+from dataclasses import replace
+
+from pylearn.config import GENERATED_TEST_SEED
+from pylearn.engine.matching import matcher_for_test
+from pylearn.engine.runner import run_code
+from pylearn.engine.shared_inputs import resolve_inputs
+
+# Names of generated test cases start with this.
+GENERATED_PREFIX = "Generated"
+
+_NAME_CHARS = 60
+
+# (exercise id, generator, count, solution, pre_code, seed) -> test cases
+_references = {}
+_lock = threading.Lock()
+
+
+def _case_name(index, case):
+    label = case.get("name") or case.get("input_code", "").strip().replace("\n", "; ")
+    if len(label) > _NAME_CHARS:
+        label = label[:_NAME_CHARS - 3] + "..."
+    return f"{GENERATED_PREFIX} {index}: {label}"
+
+
+def _reference_tests(exercise, seed):
+    rng = random.Random(seed)
+    cases = [exercise.generator(rng) for _ in range(exercise.generated_tests)]
+
+    solution = run_code(exercise.solution, pre_code=exercise.pre_code,
+                        deterministic=exercise.deterministic)
+    if not solution.success:
+        raise ValueError(f"{exercise.id}: reference solution failed: {solution.error}")
+
+    tests = []
+    for index, case in enumerate(cases, 1):
+        namespace = dict(solution.namespace)
+        namespace.update(resolve_inputs(case.get("inputs")))
+        result = run_code(case.get("input_code", ""), namespace=namespace,
+                          deterministic=exercise.deterministic, retain="none")
+        name = _case_name(index, case)
+        if not result.success:
+            raise ValueError(f"{exercise.id}: reference solution failed on "
+                             f"{name!r}: {result.error}")
+        test = dict(case, name=name, expected=result.stdout.strip())
+        matcher_for_test(test, exercise.match)  # Compiled once, like curriculum tests
+        tests.append(test)
+    return tests
+
+
+def generated_tests(exercise, seed=GENERATED_TEST_SEED):
+    """Return the exercise's generated test cases, with expected outputs.
+
+    Args:
+        exercise: An Exercise with a `generator` and a `solution`.
+        seed: Seed of the random.Random passed to the generator.
+
+    Returns:
+        List of test case dicts (empty if the exercise has no generator).
+
+    Raises:
+        ValueError: The solution fails on its own or on a generated case.
+    """
+    if exercise.generator is None or not exercise.solution:
+        return []
+    key = (exercise.id, exercise.generator, exercise.generated_tests,
+           exercise.solution, exercise.pre_code, seed)
+    # Held while computing: in-process runs redirect sys.stdout.
+    with _lock:
+        tests = _references.get(key)
+        if tests is None:
+            tests = _references[key] = _reference_tests(exercise, seed)
+    return tests
+
+
+def with_generated_tests(exercise, seed=GENERATED_TEST_SEED):
+    """Return the exercise with its generated tests after its own.
+
+    The copy has no generator, so validating it does not add them again.
+    Exercises checked by a validator or expected_output are returned
+    unchanged.
+
+    Raises:
+        ValueError: See generated_tests().
+    """
+    if exercise.generator is None or exercise.validator or not exercise.test_cases:
+        return exercise
+    return replace(exercise, generator=None,
+                   test_cases=exercise.test_cases + generated_tests(exercise, seed))
@@ -0,0 +1,153 @@
+"""Run a function in a forked child and collect its pickled result.
+
+POSIX only. The child shares the parent's memory copy-on-write, runs one
+function, writes ("ok", value) or ("error", message) to a pipe and exits
+with os._exit() so no parent cleanup handlers run twice.
+"""
+
+import os
+import pickle
+import select
+import signal
+import time
+import traceback
+
+from pylearn.engine.subinterpreters import in_main_interpreter
+
+# Isolated subinterpreters refuse to fork.
+CAN_FORK = hasattr(os, "fork") and in_main_interpreter()
+
+_READ_SIZE = 65536
+
+
+def _child_main(write_fd, func, args, kwargs):
+    try:
+        try:
+            reply = ("ok", func(*args, **kwargs))
+        except BaseException as e:
+            reply = ("error", "".join(
+                traceback.format_exception(type(e), e, e.__traceback__)
+            ).strip())
+        try:
+            data = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            data = pickle.dumps(("error", f"Could not send result: {e}"))
+        view = memoryview(data)
+        while view:
+            written = os.write(write_fd, view)
+            view = view[written:]
+    finally:
+        os._exit(0)
+
+
+class ForkedCall:
+    """A function running in a forked child process.
+
+    Use fileno() with select()/multiprocessing.connection.wait() and call
+    read_available() when it is readable, or just call result().
+    """
+
+    def __init__(self, pid, read_fd):
+        self.pid = pid
+        self._fd = read_fd
+        self._chunks = []
+        self._exit_status = None
+        self.done = False
+
+    def fileno(self):
+        return self._fd
+
+    def read_available(self):
+        """Read what the child has written; return True once it is done."""
+        chunk = os.read(self._fd, _READ_SIZE)
+        if chunk:
+            self._chunks.append(chunk)
+            return False
+        self._finish()
+        return True
+
+    def _finish(self):
+        if self.done:
+            return
+        self.done = True
+        os.close(self._fd)
+        _, self._exit_status = os.waitpid(self.pid, 0)
+
+    def kill(self):
+        """Kill the child and reap it."""
+        if self.done:
+            return
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self._finish()
+
+    @property
+    def exit_description(self):
+        """Human-readable reason the child exited, e.g. 'killed by SIGKILL'."""
+        status = self._exit_status
+        if status is None:
+            return "still running"
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            try:
+                name = signal.Signals(sig).name
+            except ValueError:
+                name = str(sig)
+            return f"killed by {name}"
+        return f"exit code {os.WEXITSTATUS(status)}"
+
+    def reply(self):
+        """Return the child's (status, value) reply once it is done.
+
+        A child that died without writing a full reply yields
+        ("crashed", exit_description).
+        """
+        data = b"".join(self._chunks)
+        if data:
+            try:
+                return pickle.loads(data)
+            except Exception:
+                pass
+        return ("crashed", self.exit_description)
+
+    def result(self, timeout=None):
+        """Block until the child finishes and return its reply.
+
+        Kills the child and returns ("timeout", timeout) if it runs
+        longer than `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self.kill()
+                return ("timeout", timeout)
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready:
+                self.read_available()
+        return self.reply()
+
+
+def fork_call(func, *args, **kwargs):
+    """Start func(*args, **kwargs) in a forked child.
+
+    Returns:
+        ForkedCall for collecting the result.
+
+    Raises:
+        OSError: fork() failed, e.g. BlockingIOError under RLIMIT_NPROC.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.fork()
+    except OSError:
+        os.close(read_fd)
+        os.close(write_fd)
+        raise
+    if pid == 0:
+        os.close(read_fd)
+        _child_main(write_fd, func, args, kwargs)
+    os.close(write_fd)
+    return ForkedCall(pid, read_fd)
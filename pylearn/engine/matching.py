@@ -0,0 +1,252 @@
+"""Compare a run's output with an expected output.
+
+Each test case (or exercise, for expected_output) picks a comparison
+with its "match" key:
+
+    exact      the stripped output equals the expected text (default)
+    literal    both parse with ast.literal_eval() to equal values, so
+               "[1,2]" matches "[1, 2]" and "{'b': 2, 'a': 1}" matches
+               "{'a': 1, 'b': 2}"
+    float      like literal, but numbers anywhere in the value only need
+               to be within "tolerance" of each other; expected text
+               that is not a literal ("Area: 3.14") is compared as text
+               with its numbers compared approximately
+    unordered  the output is a list, tuple or set literal with the same
+               items as the expected collection, in any order
+    lines      the same set of non-blank lines, in any order
+
+Structural comparisons keep bools apart from numbers: True does not
+match 1 or 1.0, and [True, False] does not match [1, 0].
+
+Matchers parse the expected value once, when compile_matcher() first
+sees it; curriculum loading calls compile_matchers() for every exercise,
+so grading a submission only parses the learner's output.
+
+Usage:
+    matcher = compile_matcher("[0.1, 0.2]", "float")
+    matcher("[0.1, 0.20000000000000004]")  # True
+"""
+
+import ast
+import functools
+import json
+import math
+import re
+from collections import Counter
+
+from pylearn.config import FLOAT_TOLERANCE
+
+MATCH_MODES = ("exact", "literal", "float", "unordered", "lines")
+
+# A signed int or float, not part of a longer identifier or number.
+_NUMBER = re.compile(
+    r"(?<![\w.])[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?(?![\w.])"
+)
+
+
+# Text json.loads() parses to the same value as ast.literal_eval(): lists
+# of numbers, which it parses many times faster.
+_JSON_NUMBERS = re.compile(r"[\d\s\[\],.\-]+")
+
+
+def _literal(text):
+    """Canonical value of text (see _canonical()), or raise ValueError."""
+    if _JSON_NUMBERS.fullmatch(text):
+        try:
+            return json.loads(text)  # Numbers and lists only, so no bools
+        except (ValueError, RecursionError):
+            pass  # e.g. a trailing comma; literal_eval decides
+    try:
+        return _canonical(ast.literal_eval(text))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+        raise ValueError(f"not a Python literal: {text!r}") from e
+
+
+class _Bool:
+    """Stands in for a bool, so True never equals 1 or 1.0 (nor False 0)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Bool) and other.value == self.value
+
+    def __hash__(self):
+        return hash((_Bool, self.value))
+
+
+def _canonical(value):
+    """A literal value with its bools replaced by _Bool, for comparing."""
+    if isinstance(value, bool):
+        return _Bool(value)
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, dict):
+        return {_canonical(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_canonical(item) for item in value)
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _close(actual, expected, tolerance):
+    """Equality with numbers compared to within `tolerance`.
+
+    Both values are canonical (see _canonical()), so bools are _Bool.
+    """
+    if _is_number(actual) and _is_number(expected):
+        return math.isclose(actual, expected, rel_tol=tolerance, abs_tol=tolerance)
+    if isinstance(expected, (list, tuple)):
+        return type(actual) is type(expected) and len(actual) == len(expected) \
+            and all(_close(a, e, tolerance) for a, e in zip(actual, expected))
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and actual.keys() == expected.keys() \
+            and all(_close(actual[key], value, tolerance)
+                    for key, value in expected.items())
+    return actual == expected
+
+
+def _freeze(value):
+    """A hashable stand-in for a canonical literal value, for counting items."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _line_set(text):
+    return frozenset(line.strip() for line in text.splitlines() if line.strip())
+
+
+class Matcher:
+    """A compiled comparison against one expected output.
+
+    Call it with a run's stdout (already stripped) to get True or False.
+    Construct through compile_matcher(), which reuses compiled matchers.
+    """
+
+    def __init__(self, expected, mode="exact", tolerance=None):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"unknown match mode {mode!r}; expected one of "
+                             f"{', '.join(MATCH_MODES)}")
+        self.expected = expected.strip()
+        self.mode = mode
+        self.tolerance = FLOAT_TOLERANCE if tolerance is None else tolerance
+        self._compare = getattr(self, f"_compile_{mode}")()
+
+    def __call__(self, actual):
+        if actual == self.expected:
+            return True
+        return self._compare(actual)
+
+    def __repr__(self):
+        return f"Matcher({self.expected!r}, {self.mode!r}, tolerance={self.tolerance!r})"
+
+    def _compile_exact(self):
+        return lambda actual: False  # __call__ already compared the text
+
+    def _compile_literal(self):
+        value = _literal(self.expected)
+
+        def compare(actual):
+            try:
+                return _literal(actual) == value
+            except ValueError:
+                return False
+        return compare
+
+    def _compile_float(self):
+        tolerance = self.tolerance
+        try:
+            value = _literal(self.expected)
+        except ValueError:
+            return self._compile_float_text()
+
+        def compare(actual):
+            try:
+                return _close(_literal(actual), value, tolerance)
+            except ValueError:
+                return False
+        return compare
+
+    def _compile_float_text(self):
+        tolerance = self.tolerance
+        numbers = [float(n) for n in _NUMBER.findall(self.expected)]
+        text = _NUMBER.split(self.expected)
+
+        def compare(actual):
+            if _NUMBER.split(actual) != text:
+                return False
+            return all(math.isclose(float(a), e, rel_tol=tolerance, abs_tol=tolerance)
+                       for a, e in zip(_NUMBER.findall(actual), numbers))
+        return compare
+
+    def _compile_unordered(self):
+        value = _literal(self.expected)
+        if not isinstance(value, (list, tuple, frozenset)):
+            raise ValueError(f"unordered match needs a list, tuple or set literal, "
+                             f"not {self.expected!r}")
+        counts = Counter(_freeze(item) for item in value)
+
+        def compare(actual):
+            try:
+                items = _literal(actual)
+            except ValueError:
+                return False
+            if not isinstance(items, (list, tuple, frozenset)):
+                return False
+            return Counter(_freeze(item) for item in items) == counts
+        return compare
+
+    def _compile_lines(self):
+        lines = _line_set(self.expected)
+        return lambda actual: _line_set(actual) == lines
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_matcher(expected, mode="exact", tolerance=None):
+    """Return the Matcher for an expected output, compiling it once.
+
+    Args:
+        expected: The expected output text.
+        mode: One of MATCH_MODES.
+        tolerance: Absolute and relative tolerance for "float" matches;
+            None uses config.FLOAT_TOLERANCE.
+
+    Raises:
+        ValueError: Unknown mode, or an expected value the mode cannot
+            parse (e.g. "literal" with text that is not a literal).
+    """
+    return Matcher(expected, mode, tolerance)
+
+
+def matcher_for_test(test, default_mode="exact"):
+    """Return the Matcher for a test case's "expected", "match" and "tolerance".
+
+    Tests without a "match" key use `default_mode` (the exercise's match).
+    """
+    return compile_matcher(test.get("expected", ""), test.get("match", default_mode),
+                           test.get("tolerance"))
+
+
+def compile_matchers(exercise):
+    """Compile the matchers of an exercise's expected output and tests.
+
+    Raises:
+        ValueError: If any of them cannot be compiled (see compile_matcher()).
+    """
+    if exercise.expected_output:
+        compile_matcher(exercise.expected_output, exercise.match)
+    for test in exercise.test_cases:
+        try:
+            matcher_for_test(test, exercise.match)
+        except ValueError as e:
+            raise ValueError(f"{exercise.id}, test {test.get('name', 'Test')!r}: {e}") from None
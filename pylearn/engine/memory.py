@@ -0,0 +1,144 @@
+"""Memory report for a submission: peak usage, allocation sites, live objects.
+
+The submission and the exercise's test inputs run with tracemalloc
+enabled. The report gives:
+    peak_bytes   highest traced memory while they ran
+    sites        lines of the learner's code holding the most memory
+                 when the run ended (allocations made by helpers the
+                 learner called count against the calling line)
+    objects      objects still reachable from the learner's names at
+                 the end, counted by type
+"""
+
+import gc
+import tracemalloc
+import types
+
+from pylearn.config import MEMORY_TOP_N, MEMORY_TRACE_FRAMES
+from pylearn.engine.profiling import run_analysis, run_with_inputs
+from pylearn.engine.tracing import USER_FILENAME
+
+# Objects walked when counting live objects, to bound the cost.
+_MAX_OBJECTS = 1_000_000
+
+# Reachable but not the learner's data: counted, never walked into.
+_OPAQUE_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.CodeType, types.MethodType,
+)
+
+
+class MemorySite:
+    """Memory held at the end of a run, by the line that allocated it."""
+
+    def __init__(self, line, size, count):
+        self.line = line      # Line in the learner's code
+        self.size = size      # Bytes
+        self.count = count    # Allocations
+
+
+class MemoryReport:
+    """Memory used by a submission; see the module docstring."""
+
+    def __init__(self, peak_bytes=0, sites=None, objects=None, truncated=False,
+                 error=None):
+        self.peak_bytes = peak_bytes
+        self.sites = sites or []          # MemorySite, largest first
+        self.objects = objects or []      # (type name, count), most first
+        self.truncated = truncated        # Object walk stopped early
+        self.error = error
+
+
+def _user_line(traceback, line_offset):
+    """Most recent learner line in a tracemalloc traceback, or None."""
+    for frame in reversed(traceback):  # Most recent frame first
+        if frame.filename == USER_FILENAME:
+            line = frame.lineno - line_offset
+            return line if line > 0 else None
+    return None
+
+
+def allocation_sites(snapshot, line_offset=0, limit=MEMORY_TOP_N):
+    """Group a tracemalloc snapshot by learner line, largest first."""
+    user_only = tracemalloc.Filter(True, USER_FILENAME, all_frames=True)
+    sites = {}
+    for trace in snapshot.filter_traces([user_only]).traces:
+        line = _user_line(trace.traceback, line_offset)
+        if line is None:
+            continue
+        size, count = sites.get(line, (0, 0))
+        sites[line] = (size + trace.size, count + 1)
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+    return [MemorySite(line, size, count) for line, (size, count) in ranked[:limit]]
+
+
+def live_objects(namespace, limit=MEMORY_TOP_N):
+    """Count objects reachable from a namespace, by type name.
+
+    Returns:
+        (list of (type name, count), most common first; truncated flag)
+    """
+    counts = {}
+    seen = set()
+    stack = [value for name, value in namespace.items() if name != "__builtins__"]
+    while stack and len(seen) < _MAX_OBJECTS:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        name = type(obj).__name__
+        counts[name] = counts.get(name, 0) + 1
+        if not isinstance(obj, _OPAQUE_TYPES):
+            stack.extend(gc.get_referents(obj))
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:limit], bool(stack)
+
+
+def memory_exercise(exercise, code, limit=MEMORY_TOP_N, step_budget=None):
+    """Run code plus the exercise's test inputs and report memory use.
+
+    Args:
+        exercise: The Exercise whose test_cases or validator are run
+            after the code.
+        code: The learner's code.
+        limit: Number of sites and object types to keep.
+        step_budget: Per-run line budget (see run_code).
+
+    Returns:
+        MemoryReport; `error` is set if the code itself failed.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(MEMORY_TRACE_FRAMES)
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        result = run_with_inputs(exercise, code, step_budget=step_budget,
+                                 deterministic=exercise.deterministic,
+                                 metrics="off")
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    line_offset = exercise.pre_code.count("\n") + 1 if exercise.pre_code else 0
+    objects, truncated = live_objects(result.namespace, limit)
+    return MemoryReport(
+        peak_bytes=max(0, peak),
+        sites=allocation_sites(snapshot, line_offset, limit),
+        objects=objects,
+        truncated=truncated,
+        error=result.error,
+    )
+
+
+def memory_submission(exercise, code, limit=MEMORY_TOP_N):
+    """Report memory use of code for an exercise in a worker.
+
+    See pylearn.engine.profiling.run_analysis().
+
+    Returns:
+        MemoryReport
+    """
+    return run_analysis(memory_exercise, exercise, code, limit, MemoryReport)
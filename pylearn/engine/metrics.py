@@ -0,0 +1,127 @@
+"""Per-run resource accounting: wall time, CPU time, memory, steps."""
+
+import os
+import time
+from contextlib import contextmanager
+
+from pylearn.config import METRICS_LEVEL
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:  # Isolated subinterpreters (3.13+)
+    tracemalloc = None
+
+# Levels accepted by measure(): "full" adds tracemalloc peak memory on
+# top of the cheap timers collected by "basic"; "off" collects nothing.
+METRICS_LEVELS = ("off", "basic", "full")
+
+if resource is not None:
+    _RUSAGE_WHO = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+
+    def _cpu_times():
+        usage = resource.getrusage(_RUSAGE_WHO)
+        return usage.ru_utime, usage.ru_stime
+else:
+    def _cpu_times():
+        times = os.times()
+        return times.user, times.system
+
+
+class RunMetrics:
+    """Resources used by one run, or the sum of several runs."""
+
+    def __init__(self, wall_time=0.0, cpu_time=0.0, cpu_user=0.0,
+                 cpu_system=0.0, peak_memory=None, steps=None, runs=1):
+        self.wall_time = wall_time        # Seconds
+        self.cpu_time = cpu_time          # Seconds of thread CPU time
+        self.cpu_user = cpu_user          # Seconds (coarse, from getrusage)
+        self.cpu_system = cpu_system      # Seconds (coarse, from getrusage)
+        self.peak_memory = peak_memory    # Bytes traced by tracemalloc
+        self.steps = steps                # Executed lines, if counted
+        self.runs = runs
+
+    def add(self, other):
+        """Accumulate another RunMetrics into this one."""
+        if other is None:
+            return self
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.cpu_user += other.cpu_user
+        self.cpu_system += other.cpu_system
+        if other.peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, other.peak_memory)
+        if other.steps is not None:
+            self.steps = (self.steps or 0) + other.steps
+        self.runs += other.runs
+        return self
+
+    def to_dict(self):
+        return {
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "cpu_user": self.cpu_user,
+            "cpu_system": self.cpu_system,
+            "peak_memory": self.peak_memory,
+            "steps": self.steps,
+            "runs": self.runs,
+        }
+
+    def __repr__(self):
+        memory = "n/a" if self.peak_memory is None else f"{self.peak_memory:,}B"
+        return (f"RunMetrics(wall={self.wall_time * 1000:.2f}ms, "
+                f"cpu={self.cpu_time * 1000:.2f}ms, peak={memory}, "
+                f"steps={self.steps})")
+
+
+@contextmanager
+def measure(level=None):
+    """Measure the resources used by the body of a with-block.
+
+    Args:
+        level: "off", "basic" or "full" (defaults to METRICS_LEVEL).
+            "basic" costs a few percent and is fine to leave on; "full"
+            also records peak memory with tracemalloc, which makes a
+            typical validation several times slower (and is skipped
+            where tracemalloc cannot be imported).
+
+    Yields:
+        A RunMetrics filled in when the block exits, or None when off.
+    """
+    if level is None:
+        level = METRICS_LEVEL
+    if level == "off":
+        yield None
+        return
+
+    metrics = RunMetrics()
+    trace_memory = level == "full" and tracemalloc is not None
+    started_tracing = False
+    if trace_memory:
+        if tracemalloc.is_tracing():
+            baseline = tracemalloc.get_traced_memory()[0]
+        else:
+            tracemalloc.start()
+            started_tracing = True
+            baseline = 0
+        tracemalloc.reset_peak()
+
+    user_start, system_start = _cpu_times()
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.wall_time = time.perf_counter() - wall_start
+        metrics.cpu_time = time.thread_time() - cpu_start
+        user_end, system_end = _cpu_times()
+        metrics.cpu_user = user_end - user_start
+        metrics.cpu_system = system_end - system_start
+        if trace_memory:
+            metrics.peak_memory = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            if started_tracing:
+                tracemalloc.stop()
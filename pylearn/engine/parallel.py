@@ -0,0 +1,117 @@
+"""Validate one exercise's test cases on several workers at once.
+
+Interview problems with extended suites have 50-200 test cases, and
+validating them one after another makes latency grow with the suite.
+An exercise that sets `parallel_tests` has its test cases split into
+that many contiguous chunks (at most, and no more than the backend can
+run at once). Each chunk is validated as its own job, the chunks run
+concurrently, and their results are merged in chunk order, so `passed`
+and `failed` list tests in the same order as a sequential run.
+
+Every chunk runs the learner's code once before its tests, so a suite
+only gains from this when its tests take longer than the code itself.
+
+With fail_fast every chunk stops at its own first failure; the merged
+result is then cut off after the first chunk that failed, so it reports
+the same tests as a sequential fail-fast run.
+
+Usage:
+    exercise = Exercise(..., test_cases=tests, parallel_tests=4)
+    result = get_backend().validate(exercise, code)   # up to 4 workers
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from pylearn.engine.validator import ValidationResult
+
+
+def test_workers(exercise, concurrency):
+    """Number of chunks to split the exercise's test cases into."""
+    if not exercise.test_cases or exercise.validator:
+        return 1
+    return max(1, min(exercise.parallel_tests, concurrency, len(exercise.test_cases)))
+
+
+def split_tests(test_cases, chunks):
+    """Split test cases into `chunks` contiguous lists of near-equal size."""
+    size, extra = divmod(len(test_cases), chunks)
+    parts = []
+    start = 0
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0)
+        parts.append(test_cases[start:end])
+        start = end
+    return parts
+
+
+def merge_results(results, chunk_sizes=None):
+    """Combine chunk ValidationResults, in order, into one.
+
+    The first chunk with an error (e.g. the learner's code failed, or a
+    chunk timed out) decides the error, as it would have stopped a
+    sequential run. Given `chunk_sizes` (the test count of each chunk,
+    for a fail-fast validation), the chunks after the first one that
+    did not succeed are left out and their tests counted as skipped.
+    """
+    merged = ValidationResult()
+    for index, result in enumerate(results):
+        merged.passed.extend(result.passed)
+        merged.failed.extend(result.failed)
+        merged.skipped += result.skipped
+        merged.fork_fallbacks += result.fork_fallbacks
+        if merged.error is None:
+            merged.error = result.error
+        if result.limit is not None:
+            merged.add_limit(result.limit)
+        merged.add_metrics(result.metrics)
+        merged.coverage = _merge_coverage(merged.coverage, result.coverage)
+        if chunk_sizes is not None and not result.success:
+            merged.skipped += sum(chunk_sizes[index + 1:])
+            break
+    return merged
+
+
+def _merge_coverage(total, coverage):
+    if coverage is None:
+        return total
+    if total is None:
+        return coverage
+    total.module_lines |= coverage.module_lines
+    for name, lines in coverage.by_test.items():
+        total.add_test(name, lines)
+    return total
+
+
+def validate_parallel(backend, exercise, code, workers, timeout=None,
+                      cancel_event=None, coverage=False, fail_fast=False):
+    """Validate code with the exercise's test cases split over `workers` jobs.
+
+    Args:
+        backend: The ExecutionBackend that runs each chunk.
+        exercise: An Exercise with test_cases.
+        code: User's code string.
+        workers: Chunks to split the tests into (see test_workers()).
+        timeout, cancel_event, coverage, fail_fast: Passed to
+            backend.validate() for each chunk; `timeout` applies to each
+            chunk. With `fail_fast` the result ends at the first failing
+            test in test order, as in a sequential run (see
+            merge_results()).
+
+    Returns:
+        ValidationResult with tests in their original order.
+
+    Raises:
+        ExecutionCancelled: cancel_event was set before every chunk ended.
+    """
+    chunks = [replace(exercise, test_cases=tests, parallel_tests=1)
+              for tests in split_tests(exercise.test_cases, workers)]
+    sizes = [len(chunk.test_cases) for chunk in chunks] if fail_fast else None
+    with ThreadPoolExecutor(len(chunks), thread_name_prefix="pylearn-tests") as executor:
+        results = list(executor.map(
+            lambda chunk: backend.validate(chunk, code, timeout=timeout,
+                                           cancel_event=cancel_event,
+                                           coverage=coverage, fail_fast=fail_fast),
+            chunks,
+        ))
+    return merge_results(results, sizes)
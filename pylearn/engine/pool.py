@@ -0,0 +1,396 @@
+"""Pool of pre-started worker processes for isolated code execution.
+
+Learner code runs in a separate Python process so that an infinite loop
+or a crash cannot take down the PyLearn session. Workers are started
+ahead of time and reused, so a submission only pays for a pipe round
+trip instead of a full interpreter startup.
+
+Jobs never run in the worker itself where fork() is available: each
+runs in a child forked from the warm worker and thrown away afterwards,
+so nothing one submission changes (module globals, monkeypatched engine
+functions, caches) is seen by the next. Without fork() a worker is
+replaced after every job instead.
+"""
+
+import atexit
+import gc
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from pylearn.config import EXECUTION_TIMEOUT, MAX_FORKED_TESTS, WORKER_POOL_SIZE
+from pylearn.engine.backends import ExecutionBackend
+from pylearn.engine.determinism import hash_seed_environment
+from pylearn.engine.forking import CAN_FORK, fork_call
+from pylearn.engine.runner import run_code
+from pylearn.engine.sandbox import (
+    classify_exit, get_profile, sandbox_limits, user_processes,
+)
+from pylearn.engine.snapshots import (
+    get_snapshot, preload_snapshots, run_code_in_snapshot,
+)
+
+
+class ExecutionTimeout(TimeoutError):
+    """Raised when a worker does not finish a job within its timeout."""
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised when a worker process dies while running a job."""
+
+
+class ExecutionCancelled(RuntimeError):
+    """Raised when a job is cancelled through its cancel_event."""
+
+
+# How often a blocked call() checks its cancel_event, in seconds.
+_CANCEL_POLL_INTERVAL = 0.05
+
+# Extra seconds call() waits beyond a job's timeout for the worker, which
+# enforces the timeout itself when it forks, before giving up on it.
+_WORKER_GRACE = 5
+
+
+def _warm_up():
+    """Import what jobs use and build curriculum snapshots, before forking."""
+    import pylearn.engine.validator  # noqa: F401
+    from pylearn.curriculum import discover_modules
+    for module in discover_modules():
+        preload_snapshots(module.exercises)
+    gc.collect()
+    gc.freeze()
+
+
+def _run_job(func, args, kwargs):
+    try:
+        return ("ok", func(*args, **kwargs))
+    except BaseException as e:
+        return ("error", "".join(
+            traceback.format_exception(type(e), e, e.__traceback__)
+        ).strip())
+
+
+def _run_forked(conn, func, args, kwargs, timeout):
+    """Run a job in a forked child and return its reply.
+
+    The child is killed after `timeout` seconds (("timeout", timeout))
+    or when the pool sends "cancel" (("cancelled", None)). Returns None
+    if the pool went away.
+    """
+    user_processes()  # Counted here, not in every child (see sandbox)
+    call = fork_call(func, *args, **kwargs)
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            call.kill()
+            return ("timeout", timeout)
+        for ready in wait([conn, call], remaining):
+            if ready is call:
+                if call.read_available():
+                    return call.reply()
+                continue
+            call.kill()
+            try:
+                conn.recv()  # "cancel" is the only message sent mid-job
+            except (EOFError, OSError):
+                return None
+            return ("cancelled", None)
+
+
+def _worker_main(conn):
+    """Worker loop: receive (func, args, kwargs, timeout), send back the reply.
+
+    See the module docstring: where fork() is available each job runs
+    in a forked child, under `timeout`; otherwise it runs here.
+    """
+    if CAN_FORK:
+        _warm_up()
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        if job == "cancel":
+            continue  # Its job had already finished
+
+        func, args, kwargs, timeout = job
+        if CAN_FORK:
+            reply = _run_forked(conn, func, args, kwargs, timeout)
+            if reply is None:
+                return
+        else:
+            reply = _run_job(func, args, kwargs)
+
+        try:
+            conn.send(reply)
+        except OSError:
+            return  # The pool is gone
+        except Exception as e:
+            # Result could not be pickled -- report that instead.
+            conn.send(("error", f"Could not send result: {e}"))
+
+
+def _run_code_job(code, pre_code="", sandbox=None, restore=True,
+                  deterministic=False, step_budget=None):
+    """Run code inside a worker and return a picklable ExecutionResult.
+
+    `sandbox` names a SANDBOX_PROFILES entry; `restore` is passed to
+    sandbox_limits() (False in throwaway forked children). Curriculum
+    pre_code is run once per worker and reused from a snapshot.
+    """
+    # The namespace holds learner-defined objects that may not pickle.
+    options = {"deterministic": deterministic, "retain": "none",
+               "step_budget": step_budget}
+    snapshot = get_snapshot(pre_code, deterministic)
+    with sandbox_limits(sandbox, restore=restore):
+        if snapshot is None:
+            return run_code(code, pre_code=pre_code, **options)
+        return run_code_in_snapshot(snapshot, code, throwaway=not restore,
+                                    **options)
+
+
+def _validate_job(exercise, code, restore=True, coverage=False, sandbox=None,
+                  step_budget=None, fail_fast=False):
+    """Validate inside a worker under the exercise's sandbox profile.
+
+    `sandbox` overrides that profile (e.g. "none" for in-process jobs).
+    Exercises with test_isolation="fork" may start MAX_FORKED_TESTS
+    processes, for their tests.
+    """
+    from pylearn.engine.validator import validate_exercise
+
+    profile = get_profile(exercise.sandbox_profile if sandbox is None else sandbox)
+    if exercise.test_isolation == "fork" and profile.get("processes") is not None:
+        profile = dict(profile, processes=max(profile["processes"], MAX_FORKED_TESTS))
+    with sandbox_limits(profile, restore=restore):
+        return validate_exercise(exercise, code, throwaway=not restore,
+                                 coverage=coverage, step_budget=step_budget,
+                                 fail_fast=fail_fast)
+
+
+def _describe_exitcode(exitcode):
+    """Describe a multiprocessing exitcode like ForkedCall.exit_description."""
+    if exitcode is None:
+        return "still running"
+    if exitcode < 0:
+        try:
+            return f"killed by {signal.Signals(-exitcode).name}"
+        except ValueError:
+            return f"killed by signal {-exitcode}"
+    return f"exit code {exitcode}"
+
+
+def crash_limit(error):
+    """Return the limit a crashed/timed-out job hit, from its exception."""
+    if isinstance(error, ExecutionTimeout):
+        return "timeout"
+    return classify_exit(str(error))
+
+
+class _Worker:
+    """A single worker process and the parent end of its pipe."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn,), daemon=True,
+        )
+        with hash_seed_environment():
+            self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        """Terminate the process immediately."""
+        try:
+            self.process.kill()
+            self.process.join(1)
+        finally:
+            self.conn.close()
+
+    def stop(self):
+        """Ask the process to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class WorkerPool(ExecutionBackend):
+    """A fixed-size pool of warm worker processes.
+
+    Jobs are module-level callables plus picklable arguments. Each job
+    runs on an idle worker, in a child forked for it (see the module
+    docstring); if it exceeds its timeout the child is killed. A worker
+    that stops responding is killed and replaced with a fresh one.
+
+    Usage:
+        with WorkerPool(size=2) as pool:
+            result = pool.run_code("print('hi')")
+    """
+
+    # Jobs run in throwaway children (or workers, without fork()), so
+    # hard limits can be lowered too.
+    restores_limits = False
+
+    def __init__(self, size=WORKER_POOL_SIZE, timeout=EXECUTION_TIMEOUT):
+        self.size = self.concurrency = size
+        self.timeout = timeout
+        # "spawn" gives a clean interpreter on every platform and avoids
+        # forking a parent that may be running other threads.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = _Worker(self._ctx)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def _replace(self, worker):
+        self._discard(worker)
+        if not self._closed:
+            self._add_worker()
+
+    def _acquire(self, cancel_event):
+        """Take an idle worker, giving up if cancel_event is set."""
+        if cancel_event is None:
+            return self._idle.get()
+        while True:
+            if cancel_event.is_set():
+                raise ExecutionCancelled("Execution cancelled")
+            try:
+                return self._idle.get(timeout=_CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+    def _wait(self, worker, timeout, cancel_event):
+        """Wait for a reply; raise if it times out or is cancelled."""
+        if cancel_event is None:
+            if worker.conn.poll(timeout):
+                return
+        else:
+            deadline = time.monotonic() + timeout
+            remaining = timeout
+            while remaining > 0:
+                if cancel_event.is_set():
+                    raise ExecutionCancelled("Execution cancelled")
+                if worker.conn.poll(min(remaining, _CANCEL_POLL_INTERVAL)):
+                    return
+                remaining = deadline - time.monotonic()
+        raise ExecutionTimeout(
+            f"Execution timed out after {timeout}s (infinite loop?)"
+        )
+
+    def _cancel(self, worker):
+        """Have a forking worker kill its job; replace it if it does not answer."""
+        try:
+            worker.conn.send("cancel")
+            if worker.conn.poll(_WORKER_GRACE):
+                worker.conn.recv()  # ("cancelled", None), or the job's reply
+                self._idle.put(worker)
+                return
+        except (EOFError, OSError):
+            pass
+        self._replace(worker)
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) in a worker and return its result.
+
+        Args:
+            func: A picklable, module-level callable.
+            timeout: Seconds before the job is killed.
+            cancel_event: Optional threading.Event; setting it abandons
+                the job and kills it.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerCrashed: The job's process died or the job raised an
+                exception.
+        """
+        if self._closed:
+            raise RuntimeError("WorkerPool is closed")
+        if timeout is None:
+            timeout = self.timeout
+
+        worker = self._acquire(cancel_event)
+        # A forking worker enforces the timeout; past the grace period
+        # the worker itself is stuck.
+        wait_for = timeout + _WORKER_GRACE if CAN_FORK else timeout
+        try:
+            worker.conn.send((func, args, kwargs, timeout))
+            self._wait(worker, wait_for, cancel_event)
+            status, value = worker.conn.recv()
+        except ExecutionCancelled:
+            if CAN_FORK:
+                self._cancel(worker)
+            else:
+                self._replace(worker)
+            raise
+        except ExecutionTimeout:
+            self._replace(worker)
+            raise
+        except (EOFError, OSError):
+            worker.process.join(1)
+            reason = _describe_exitcode(worker.process.exitcode)
+            self._replace(worker)
+            raise WorkerCrashed(f"Worker process exited unexpectedly: {reason}")
+
+        if CAN_FORK:
+            self._idle.put(worker)
+        else:
+            self._replace(worker)  # The job may have changed its state
+        if status == "ok":
+            return value
+        if status == "timeout":
+            raise ExecutionTimeout(
+                f"Execution timed out after {value}s (infinite loop?)"
+            )
+        if status == "crashed":
+            raise WorkerCrashed(f"Worker process exited unexpectedly: {value}")
+        raise WorkerCrashed(value)
+
+    def close(self):
+        """Stop all workers."""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared worker pool, starting it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = WorkerPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,157 @@
+"""Per-function time profile of a submission and its test inputs.
+
+The submission is run, followed by each of the exercise's test inputs
+(or its custom validator), with cProfile enabled. Only the learner's
+own functions and the built-ins they call directly are reported, so
+engine internals never show up in the table.
+"""
+
+import cProfile
+import pstats
+
+from pylearn.config import PROFILE_TOP_N
+from pylearn.engine.backends import get_backend
+from pylearn.engine.runner import run_code
+from pylearn.engine.sandbox import sandbox_limits
+from pylearn.engine.shared_inputs import resolve_inputs
+from pylearn.engine.tracing import USER_FILENAME
+
+
+class ProfileRow:
+    """One function in a profile report."""
+
+    def __init__(self, name, line, calls, primitive_calls, own_time, cumulative_time):
+        self.name = name                      # Function name
+        self.line = line                      # Line in the learner's code, or None
+        self.calls = calls                    # Total calls, including recursive
+        self.primitive_calls = primitive_calls  # Calls not made by recursion
+        self.own_time = own_time              # Seconds spent in the function itself
+        self.cumulative_time = cumulative_time  # Seconds including callees
+
+    @property
+    def label(self):
+        if self.line is None:
+            return self.name
+        return f"{self.name} (line {self.line})"
+
+
+class ProfileReport:
+    """Top functions of a profiled run, by cumulative time."""
+
+    def __init__(self, rows=None, total_time=0.0, error=None):
+        self.rows = rows or []
+        self.total_time = total_time  # Seconds in learner code and its built-ins
+        self.error = error
+
+
+def _builtin_name(funcname):
+    # pstats spells built-ins "<built-in method builtins.len>".
+    name = funcname.strip("<>{}")
+    for prefix in ("built-in method ", "method "):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name.replace("builtins.", "")
+
+
+def build_report(profiler, limit=PROFILE_TOP_N):
+    """Turn a finished cProfile.Profile into a ProfileReport."""
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    total = 0.0  # Own time of everything reported, plus module-level code
+    for (filename, line, funcname), (cc, nc, tt, ct, callers) in stats.items():
+        if filename == USER_FILENAME:
+            total += tt
+            if funcname == "<module>":
+                continue
+            rows.append(ProfileRow(funcname, line, nc, cc, tt, ct))
+        elif filename == "~" and any(c[0] == USER_FILENAME for c in callers):
+            total += tt
+            rows.append(ProfileRow(_builtin_name(funcname), None, nc, cc, tt, ct))
+
+    rows.sort(key=lambda row: row.cumulative_time, reverse=True)
+    return ProfileReport(rows[:limit], total_time=total)
+
+
+def run_with_inputs(exercise, code, **options):
+    """Run code, then the exercise's test inputs or validator against it.
+
+    Test inputs run in copies of the code's namespace and their output
+    is discarded; validator errors are ignored.
+
+    Returns:
+        ExecutionResult of the code itself.
+    """
+    result = run_code(code, pre_code=exercise.pre_code, **options)
+    if result.success:
+        for test in exercise.test_cases:
+            namespace = dict(result.namespace)
+            namespace.update(resolve_inputs(test.get("inputs")))
+            run_code(test.get("input_code", ""), namespace=namespace,
+                     retain="none", **options)
+        if exercise.validator:
+            try:
+                exercise.validator(result.namespace, result.stdout)
+            except Exception:
+                pass
+    return result
+
+
+def profile_exercise(exercise, code, limit=PROFILE_TOP_N, step_budget=None):
+    """Profile code plus the exercise's test inputs in this process.
+
+    Args:
+        exercise: The Exercise whose test_cases or validator are run
+            after the code.
+        code: The learner's code.
+        limit: Number of rows to keep.
+        step_budget: Per-run line budget (see run_code).
+
+    Returns:
+        ProfileReport; `error` is set if the code itself failed.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = run_with_inputs(exercise, code, step_budget=step_budget,
+                                 deterministic=exercise.deterministic,
+                                 metrics="off")
+    finally:
+        profiler.disable()
+
+    report = build_report(profiler, limit)
+    report.error = result.error
+    return report
+
+
+def _analysis_job(analyse, exercise, code, limit):
+    with sandbox_limits(exercise.sandbox_profile):
+        return analyse(exercise, code, limit)
+
+
+def run_analysis(analyse, exercise, code, limit, report_type):
+    """Run analyse(exercise, code, limit) the way the app runs submissions.
+
+    Uses the configured execution backend; in-process backends run under
+    a step budget. Timeouts and crashes come back as
+    report_type(error=...).
+    """
+    backend = get_backend()
+    if backend.in_process:
+        return analyse(exercise, code, limit,
+                       step_budget=exercise.step_budget or backend.step_budget)
+
+    from pylearn.engine.pool import ExecutionTimeout, WorkerCrashed
+
+    try:
+        return backend.call(_analysis_job, analyse, exercise, code, limit)
+    except (ExecutionTimeout, WorkerCrashed) as e:
+        return report_type(error=f"{type(e).__name__}: {e}")
+
+
+def profile_submission(exercise, code, limit=PROFILE_TOP_N):
+    """Profile code for an exercise in a worker (see run_analysis()).
+
+    Returns:
+        ProfileReport
+    """
+    return run_analysis(profile_exercise, exercise, code, limit, ProfileReport)
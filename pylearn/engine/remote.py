@@ -0,0 +1,485 @@
+"""Run worker jobs on another host over a socket.
+
+A WorkerServer listens on a TCP ("host:port") or Unix socket address and
+runs every job it receives on its own WorkerPool; `pylearn worker`
+starts one as a daemon. RemoteWorker is the client for one server and
+WorkerCluster spreads jobs over several. Both have the same
+call/run_code/validate interface as WorkerPool and raise the same
+exceptions, so results do not depend on where the job ran.
+
+Jobs and results are pickled, so anyone who can connect can run code on
+the server. SharedArray inputs are sent with their values, since the
+server cannot attach to this host's shared memory (see
+pylearn.engine.shared_inputs). Every connection is authenticated: with WORKER_AUTHKEY, or
+else with a key generated in WORKER_KEY_FILE, which only clients run by
+the same user on the same host can read. Unix sockets are created
+readable and writable by their owner only.
+
+A client waits for a job's reply for as long as the server answers
+pings, since a busy server may queue the job before its timeout starts.
+
+Usage:
+    $ pylearn worker 127.0.0.1:7341 --workers 4
+    $ pylearn worker 127.0.0.1:7342 --workers 4
+
+    with WorkerCluster(["127.0.0.1:7341", "127.0.0.1:7342"]) as cluster:
+        result = cluster.run_code("print('hi')")
+"""
+
+import itertools
+import os
+import secrets
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client, Listener, answer_challenge, deliver_challenge,
+)
+
+from pylearn.config import (
+    EXECUTION_TIMEOUT, HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT, WORKER_AUTHKEY,
+    WORKER_KEY_FILE, WORKER_POOL_SIZE,
+)
+from pylearn.engine.backends import ExecutionBackend
+from pylearn.engine.pool import (
+    ExecutionCancelled, ExecutionTimeout, WorkerCrashed, WorkerPool,
+)
+from pylearn.engine.shared_inputs import copied_data
+
+# Extra seconds the client waits beyond a job's timeout before it starts
+# pinging the server to check that it is still there.
+_CLIENT_GRACE = 5
+
+# How often a blocked call() checks its cancel_event, in seconds.
+_CANCEL_POLL_INTERVAL = 0.05
+
+# Seconds a new connection has to authenticate before it is dropped.
+_HANDSHAKE_TIMEOUT = 5
+
+
+class WorkerUnreachable(WorkerCrashed):
+    """Raised when a worker server cannot be reached or stops answering.
+
+    Unlike other WorkerCrashed errors the job itself is not to blame, so
+    it is safe to retry it on another server.
+    """
+
+
+def parse_address(address):
+    """Turn "host:port" into a (host, port) tuple; other strings are Unix paths."""
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def format_address(address):
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return address
+
+
+def _generated_key(path=None):
+    """Read the key in `path` (WORKER_KEY_FILE), creating it mode 0600 if missing."""
+    path = path or WORKER_KEY_FILE
+    try:
+        with open(path, "rb") as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _generated_key(path)  # Another process just created it
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _encode_key(authkey):
+    if authkey is None:
+        authkey = WORKER_AUTHKEY
+    if isinstance(authkey, str):
+        authkey = authkey.encode()
+    return authkey or _generated_key()
+
+
+def _listen(address):
+    # Connections authenticate in their own thread (see WorkerServer).
+    if isinstance(address, tuple):
+        return Listener(address)
+    old_umask = os.umask(0o177)  # The socket file is created 0600
+    try:
+        return Listener(address)
+    finally:
+        os.umask(old_umask)
+
+
+def _shut_down(conn):
+    """Unblock a thread reading from conn by shutting its socket down."""
+    try:
+        with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # Already closed
+
+
+class WorkerServer:
+    """Accepts job connections and runs their jobs on a WorkerPool.
+
+    Each connection is served by its own thread and carries one job at a
+    time, so a client runs jobs in parallel by opening more connections.
+    A connection is authenticated in its thread too, and dropped if it
+    does not finish within _HANDSHAKE_TIMEOUT seconds, so a client that
+    never answers cannot hold up the others.
+
+    Args:
+        address: "host:port" (port 0 picks a free one) or a Unix socket path.
+        authkey: Shared secret (str or bytes); defaults to WORKER_AUTHKEY,
+            then to the generated WORKER_KEY_FILE.
+        pool: WorkerPool to run jobs on; one is started if omitted.
+    """
+
+    def __init__(self, address, authkey=None, pool=None):
+        self._authkey = _encode_key(authkey)
+        self._listener = _listen(parse_address(address))
+        self.address = format_address(self._listener.address)
+        self._owns_pool = pool is None
+        self.pool = pool or WorkerPool()
+        self._closed = False
+        self._running = 0
+        self._running_lock = threading.Lock()
+
+    def serve_forever(self):
+        """Accept connections until close() is called."""
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _authenticate(self, conn):
+        """Run the authkey handshake; return whether the client passed."""
+        timer = threading.Timer(_HANDSHAKE_TIMEOUT, _shut_down, (conn,))
+        timer.start()
+        try:
+            deliver_challenge(conn, self._authkey)
+            answer_challenge(conn, self._authkey)
+            return True
+        except (AuthenticationError, EOFError, OSError):
+            return False
+        finally:
+            timer.cancel()
+
+    def _serve(self, conn):
+        with conn:
+            if not self._authenticate(conn):
+                return
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    # The job could not be unpickled here.
+                    message = None
+                    reply = ("error", f"Could not receive job: {e}")
+                if message is not None:
+                    reply = self._run(message)
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+                except Exception as e:
+                    conn.send(("error", f"Could not send result: {e}"))
+
+    def _run(self, message):
+        if message[0] == "ping":
+            return ("pong", {"running": self._running, "workers": self.pool.size})
+        _, func, args, kwargs, timeout = message
+        with self._running_lock:
+            self._running += 1
+        try:
+            return ("ok", self.pool.call(func, *args, timeout=timeout, **kwargs))
+        except ExecutionTimeout as e:
+            return ("timeout", str(e))
+        except WorkerCrashed as e:
+            return ("error", str(e))
+        finally:
+            with self._running_lock:
+                self._running -= 1
+
+    def close(self):
+        """Stop accepting connections (and stop the pool if it owns it)."""
+        self._closed = True
+        self._listener.close()
+        if self._owns_pool:
+            self.pool.close()
+
+
+class RemoteWorker(ExecutionBackend):
+    """Client for a WorkerServer; same call interface as WorkerPool.
+
+    Connections are opened on demand and reused; any number of jobs may
+    be in flight, one per connection.
+    """
+
+    # Jobs run on the server's WorkerPool, in throwaway processes.
+    restores_limits = False
+
+    def __init__(self, address, authkey=None, timeout=EXECUTION_TIMEOUT):
+        self.address = format_address(parse_address(address))
+        self.timeout = timeout
+        self._authkey = _encode_key(authkey)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._heartbeat_conn = None
+        self._ping_lock = threading.Lock()
+
+    def _connect(self):
+        try:
+            return Client(parse_address(self.address), authkey=self._authkey)
+        except (OSError, AuthenticationError) as e:
+            raise WorkerUnreachable(f"Cannot reach worker at {self.address}: {e}")
+
+    def _checkout(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RemoteWorker is closed")
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, conn):
+        with self._lock:
+            if not self._closed:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _wait(self, conn, timeout, cancel_event):
+        """Wait for a reply; past the job's timeout, only while pings succeed."""
+        check_at = time.monotonic() + timeout + _CLIENT_GRACE
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExecutionCancelled("Execution cancelled")
+            now = time.monotonic()
+            if now >= check_at:
+                if self.ping() is None:
+                    raise WorkerUnreachable(f"Worker at {self.address} stopped answering")
+                check_at = now + HEARTBEAT_INTERVAL
+            step = check_at - now
+            if cancel_event is not None:
+                step = min(step, _CANCEL_POLL_INTERVAL)
+            if conn.poll(step):
+                return
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) on the server's pool.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerUnreachable: The server could not be reached or
+                stopped answering.
+            WorkerCrashed: The server's worker died or the job raised an
+                exception.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        conn = self._checkout()
+        try:
+            with copied_data():  # Shared memory does not reach other hosts
+                conn.send(("call", func, args, kwargs, timeout))
+            self._wait(conn, timeout, cancel_event)
+            status, value = conn.recv()
+        except (ExecutionCancelled, WorkerCrashed):
+            # The reply may still arrive; the connection cannot be reused.
+            conn.close()
+            raise
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise WorkerUnreachable(f"Lost connection to worker at {self.address}: {e}")
+
+        self._checkin(conn)
+        if status == "ok":
+            return value
+        if status == "timeout":
+            raise ExecutionTimeout(value)
+        raise WorkerCrashed(value)
+
+    def ping(self, timeout=HEARTBEAT_TIMEOUT):
+        """Check that the server answers, on a connection kept for pings.
+
+        Returns:
+            The server's status dict ("running" jobs, pool "workers"),
+            or None if it did not answer within `timeout` seconds.
+        """
+        with self._ping_lock:
+            try:
+                if self._heartbeat_conn is None:
+                    self._heartbeat_conn = self._connect()
+                self._heartbeat_conn.send(("ping",))
+                if self._heartbeat_conn.poll(timeout):
+                    _, status = self._heartbeat_conn.recv()
+                    return status
+            except (WorkerUnreachable, EOFError, OSError):
+                pass
+            if self._heartbeat_conn is not None:
+                self._heartbeat_conn.close()
+                self._heartbeat_conn = None
+            return None
+
+    def close(self):
+        """Close idle connections; jobs in flight finish on their own."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            if self._heartbeat_conn is not None:
+                idle.append(self._heartbeat_conn)
+                self._heartbeat_conn = None
+        for conn in idle:
+            conn.close()
+
+
+class WorkerCluster(ExecutionBackend):
+    """Spreads jobs over several worker servers.
+
+    Each job goes to the live server with the fewest jobs in flight from
+    this client (least outstanding requests). A heartbeat thread per
+    server pings it every `heartbeat_interval` seconds; a server that
+    misses a heartbeat, or is lost mid-job, is skipped until it answers
+    again, and the jobs it was running are retried on another server.
+    Jobs are only retried for WorkerUnreachable, never because the
+    learner's code failed or timed out.
+
+    Args:
+        addresses: Worker server addresses (see parse_address()).
+        authkey: Shared secret; defaults as for WorkerServer.
+        timeout: Default job timeout in seconds.
+        heartbeat_interval: Seconds between pings of each server.
+        heartbeat_timeout: Seconds a ping may take before the server is
+            considered dead.
+    """
+
+    restores_limits = False  # See RemoteWorker
+
+    def __init__(self, addresses, authkey=None, timeout=EXECUTION_TIMEOUT,
+                 heartbeat_interval=HEARTBEAT_INTERVAL,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        if not addresses:
+            raise ValueError("WorkerCluster needs at least one worker address")
+        self.timeout = timeout
+        self.workers = [RemoteWorker(address, authkey, timeout) for address in addresses]
+        self.concurrency = len(self.workers)  # At least one job per server
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._outstanding = {worker: 0 for worker in self.workers}
+        self._served = {worker: 0 for worker in self.workers}
+        self._alive = set(self.workers)  # Until a heartbeat says otherwise
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._turn = itertools.count()
+        for worker in self.workers:
+            threading.Thread(target=self._heartbeat, args=(worker,), daemon=True,
+                             name=f"pylearn-heartbeat-{worker.address}").start()
+
+    def _heartbeat(self, worker):
+        while not self._stop.wait(self.heartbeat_interval):
+            alive = worker.ping(self.heartbeat_timeout) is not None
+            with self._lock:
+                if alive:
+                    self._alive.add(worker)
+                else:
+                    self._alive.discard(worker)
+
+    @property
+    def alive(self):
+        """Addresses of the servers currently believed to be up."""
+        with self._lock:
+            return [worker.address for worker in self.workers if worker in self._alive]
+
+    @property
+    def served(self):
+        """Jobs each server has completed for this client, by address."""
+        with self._lock:
+            return {worker.address: self._served[worker] for worker in self.workers}
+
+    def _pick(self, tried):
+        """Reserve the least-loaded untried server, preferring live ones."""
+        with self._lock:
+            candidates = [w for w in self.workers if w in self._alive and w not in tried]
+            if not candidates:
+                # Heartbeats may be stale; a server marked dead might be back.
+                candidates = [w for w in self.workers if w not in tried]
+            if not candidates:
+                return None
+            # Rotate the starting point so ties do not always pick the first.
+            start = next(self._turn) % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            worker = min(candidates, key=self._outstanding.get)
+            self._outstanding[worker] += 1
+            return worker
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) on the least-loaded live server.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerUnreachable: Every server was tried and none answered.
+            WorkerCrashed: A server's worker died or the job raised.
+        """
+        tried = []
+        while True:
+            worker = self._pick(tried)
+            if worker is None:
+                addresses = ", ".join(w.address for w in tried)
+                raise WorkerUnreachable(f"No worker server answered (tried {addresses})")
+            try:
+                result = worker.call(func, *args, timeout=timeout,
+                                     cancel_event=cancel_event, **kwargs)
+                with self._lock:
+                    self._served[worker] += 1
+                return result
+            except WorkerUnreachable:
+                tried.append(worker)
+                with self._lock:
+                    self._alive.discard(worker)
+            finally:
+                with self._lock:
+                    self._outstanding[worker] -= 1
+
+    def close(self):
+        """Stop heartbeats and close every connection."""
+        self._stop.set()
+        for worker in self.workers:
+            worker.close()
+
+
+def serve_worker(address, workers=WORKER_POOL_SIZE, authkey=None):
+    """Run a WorkerServer with `workers` processes until interrupted."""
+    with WorkerPool(size=workers) as pool:
+        server = WorkerServer(address, authkey=authkey, pool=pool)
+        print(f"PyLearn worker listening on {server.address} "
+              f"({workers} processes)", flush=True)
+        if authkey is None and not WORKER_AUTHKEY:
+            print(f"Clients authenticate with the key in {WORKER_KEY_FILE}; "
+                  "set PYLEARN_WORKER_KEY to accept other hosts", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
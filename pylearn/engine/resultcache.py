@@ -0,0 +1,408 @@
+"""Cache of validation results keyed by a normalized AST of the submission.
+
+Learners in a cohort submit many solutions that differ only in layout,
+comments or the names of local variables. They get the same
+ValidationResult, so it is only computed once. Entries are keyed by:
+
+    exercise id + hash of the exercise's grading fields (tests, pre_code,
+    validator code, limits...) + fingerprint of the submission + options
+
+The fingerprint is a hash of the submission's AST (which has no
+comments or whitespace) with function locals renamed by order of first
+use. Docstrings are kept, since validators and tests may read them.
+Code that could observe local names (locals(), f"{x=}", eval...) is
+fingerprinted as written, and a
+result whose error text quotes a line number or a renamed local is not
+stored, since another layout or naming would produce different text.
+Neither is a result that ran out of time, CPU or memory, which depends
+on how loaded the machine was.
+
+Only deterministic exercises are cached. Coverage is not part of the
+key and is never stored, since covered line numbers depend on the
+layout: validate_cached() answers a coverage request from the cache
+only for a failing result, which does not show coverage, and validates
+a passing one again.
+
+Usage:
+    result = validate_cached(get_backend(), exercise, code, coverage=True)
+
+    cache = get_result_cache()
+    entry, result = cache.lookup(exercise, code)
+    if result is None:
+        result = backend.validate(exercise, code)
+        cache.store(entry, result)
+    cache.stats()["hit_rate"]
+"""
+
+import ast
+import copy
+import dataclasses
+import functools
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+from pylearn.config import (
+    GENERATED_TEST_SEED, RESULT_CACHE_DIR, RESULT_CACHE_ON_DISK, RESULT_CACHE_SIZE,
+)
+
+# Exercise fields that only affect how an exercise is presented (the
+# solution also grades exercises with a generator).
+_PRESENTATION_FIELDS = {"title", "description", "starter_code", "hints",
+                        "solution", "difficulty"}
+
+# Builtins and attributes through which code can see its own local
+# names; code using them is fingerprinted as written.
+_INTROSPECTIVE_NAMES = {"locals", "vars", "dir", "eval", "exec", "globals",
+                        "compile", "help", "inspect"}
+_INTROSPECTIVE_ATTRS = {"__code__", "__dict__", "f_locals", "co_varnames",
+                        "_getframe"}
+
+_LINE_NUMBER = re.compile(r"\bline \d+")
+
+# Limits that depend on machine load rather than on the code alone.
+_LOAD_DEPENDENT_LIMITS = {"timeout", "cpu", "memory"}
+
+
+def _is_introspective(nodes):
+    for node in nodes:
+        if isinstance(node, ast.Name) and node.id in _INTROSPECTIVE_NAMES:
+            return True
+        if isinstance(node, ast.Attribute) and node.attr in _INTROSPECTIVE_ATTRS:
+            return True
+        if isinstance(node, ast.JoinedStr):
+            # f"{x=}" parses as the text "x=" followed by the value of x.
+            for text, value in zip(node.values, node.values[1:]):
+                if isinstance(text, ast.Constant) and isinstance(text.value, str) \
+                        and text.value.rstrip().endswith("=") \
+                        and isinstance(value, ast.FormattedValue):
+                    return True
+    return False
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _own_nodes(function):
+    """Nodes in a function's own scope (nested functions and classes excluded)."""
+    stack = list(ast.iter_child_nodes(function))
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, _SCOPES):
+            stack.extend(ast.iter_child_nodes(node))
+
+
+def _bound_names(node):
+    """Names a node binds other than through ast.Name (imports, except...)."""
+    if isinstance(node, (ast.Global, ast.Nonlocal)):
+        return node.names
+    if isinstance(node, ast.alias):
+        return [(node.asname or node.name).split(".")[0]]
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, ast.arg):
+        return [node.arg]
+    name = getattr(node, "name", None) or getattr(node, "rest", None)
+    return [name] if isinstance(name, str) else []  # except ... as, match captures
+
+
+def _rename_locals(function, renamed):
+    """Rename the locals of one function to <0>, <1>... by first use.
+
+    Parameters keep their names (tests may pass them as keywords), and
+    so do names bound other than by assignment (imports, except ... as,
+    nested defs, global/nonlocal) or in a nested class body, anywhere
+    inside the function.
+    """
+    nodes = list(ast.walk(function))
+    keep = set()
+    for node in nodes:
+        if node is not function:
+            keep.update(_bound_names(node))
+        if isinstance(node, ast.ClassDef):
+            keep.update(n.id for n in _own_nodes(node) if isinstance(n, ast.Name))
+    stored = [node.id for node in _own_nodes(function)
+              if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)]
+    names = {}
+    for name in stored:
+        if name not in keep and name not in names and not name.startswith("__"):
+            names[name] = f"<{len(names)}>"
+    if not names:
+        return
+    renamed.update(names)
+    for node in nodes:
+        if isinstance(node, ast.Name) and node.id in names:
+            node.id = names[node.id]
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(code):
+    """Hash of code that ignores layout, comments and local names.
+
+    Memoized on the exact text, since learners often resubmit unchanged code.
+
+    Returns:
+        (hex digest, frozenset of original local names that were renamed),
+        or (None, frozenset()) if the code does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None, frozenset()
+    nodes = list(ast.walk(tree))
+    renamed = set()
+    if not _is_introspective(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                _rename_locals(node, renamed)
+    dump = ast.dump(tree, annotate_fields=False)
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest(), frozenset(renamed)
+
+
+def _const_digest(value):
+    """repr() of a code constant that is the same in every process.
+
+    marshal.dumps() is not: its output depends on reference counts, and
+    frozenset constants repr in hash-seed order.
+    """
+    if isinstance(value, types.CodeType):
+        return repr((value.co_code, _const_digest(value.co_consts),
+                     value.co_names, value.co_varnames))
+    if isinstance(value, tuple):
+        return f"({', '.join(_const_digest(item) for item in value)})"
+    if isinstance(value, frozenset):
+        return f"frozenset({sorted(_const_digest(item) for item in value)})"
+    return repr(value)
+
+
+def _value_digest(value):
+    if callable(value) and hasattr(value, "__code__"):
+        cells = tuple(repr(cell.cell_contents) for cell in value.__closure__ or ())
+        return repr((value.__module__, value.__qualname__,
+                     _const_digest(value.__code__), value.__defaults__, cells))
+    return repr(value)
+
+
+def exercise_digest(exercise):
+    """Hash of every exercise field that can change a validation result."""
+    digest = hashlib.sha256()
+    graded = {"solution"} if exercise.generator else set()
+    for field in dataclasses.fields(exercise):
+        if field.name in _PRESENTATION_FIELDS - graded:
+            continue
+        digest.update(field.name.encode("utf-8"))
+        digest.update(_value_digest(getattr(exercise, field.name)).encode("utf-8"))
+    if exercise.generator:
+        digest.update(f"seed {GENERATED_TEST_SEED}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _error_texts(result):
+    if result.error:
+        yield result.error
+    for test in result.failed:
+        if str(test["actual"]).startswith("Error:"):
+            yield test["actual"]
+
+
+def _layout_free(result, renamed):
+    """True if the result reads the same for any layout and local names."""
+    for text in _error_texts(result):
+        if _LINE_NUMBER.search(text):
+            return False
+        if any(re.search(rf"\b{re.escape(name)}\b", text) for name in renamed):
+            return False
+    return True
+
+
+class CacheEntry:
+    """Where a submission's result goes in the cache (see lookup())."""
+
+    def __init__(self, key, renamed):
+        self.key = key
+        self.renamed = renamed    # Local names the fingerprint ignored
+
+
+class ResultCache:
+    """LRU of pickled ValidationResults, optionally backed by disk.
+
+    Usage:
+        cache = ResultCache(maxsize=1024, disk_dir="/tmp/results")
+        entry, result = cache.lookup(exercise, code)
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, disk_dir=None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.uncacheable = 0
+
+    def entry(self, exercise, code, **options):
+        """Return the CacheEntry for a submission, or None if not cacheable.
+
+        Args:
+            exercise: The Exercise being validated.
+            code: The learner's code.
+            **options: Validation options that change the result (e.g.
+                fail_fast, timeout); `coverage` is ignored.
+        """
+        options.pop("coverage", None)
+        if not exercise.deterministic:
+            return None
+        code_digest, renamed = fingerprint(code)
+        if code_digest is None:
+            return None
+        key = hashlib.sha256(repr((
+            sys.version_info[:2], exercise.id, exercise_digest(exercise),
+            code_digest, sorted(options.items()),
+        )).encode("utf-8")).hexdigest()
+        return CacheEntry(key, renamed)
+
+    def lookup(self, exercise, code, **options):
+        """Find a cached result for a submission.
+
+        Returns:
+            (entry, result): `result` is a fresh copy of the cached
+            ValidationResult, or None on a miss; pass `entry` to store()
+            once the submission is validated. `entry` is None if the
+            submission cannot be cached.
+        """
+        entry = self.entry(exercise, code, **options)
+        if entry is None:
+            with self._lock:
+                self.uncacheable += 1
+            return None, None
+        with self._lock:
+            data = self._entries.get(entry.key)
+            if data is not None:
+                self._entries.move_to_end(entry.key)
+                self.hits += 1
+        if data is None:
+            data = self._load(entry.key)
+            with self._lock:
+                if data is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(entry.key, data)
+        if data is None:
+            return entry, None
+        return entry, pickle.loads(data)
+
+    def store(self, entry, result):
+        """Cache a submission's result; return True if it was stored.
+
+        Results with errors quoting line numbers or renamed locals, and
+        results that hit a time, CPU or memory limit or could not fork
+        their tests, are not stored. Coverage is left out.
+        """
+        if entry is None or result is None or result.limit in _LOAD_DEPENDENT_LIMITS \
+                or result.fork_fallbacks:
+            return False
+        if not _layout_free(result, entry.renamed):
+            return False
+        if result.coverage is not None:
+            result = copy.copy(result)
+            result.coverage = None
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        with self._lock:
+            self._remember(entry.key, data)
+        self._save(entry.key, data)
+        return True
+
+    def _remember(self, key, data):
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pickle")
+
+    def _load(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save(self, key, data):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Non-critical -- the in-memory layer still works
+
+    def stats(self):
+        """Return hit/miss counters; hit_rate counts cacheable lookups only."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "uncacheable": self.uncacheable,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop all in-memory entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = self.uncacheable = 0
+
+
+_default_cache = ResultCache(
+    disk_dir=RESULT_CACHE_DIR if RESULT_CACHE_ON_DISK else None,
+)
+
+
+def get_result_cache():
+    """Return the process-wide result cache, or None if it is turned off."""
+    return _default_cache if RESULT_CACHE_SIZE > 0 else None
+
+
+def validate_cached(backend, exercise, code, cache=None, **options):
+    """backend.validate() through a result cache (default: the shared one).
+
+    With coverage=True a cached passing result is validated again, since
+    only passing results show coverage and it is not cached.
+
+    Returns:
+        ValidationResult, or None if the exercise has no validation.
+    """
+    cache = cache or get_result_cache()
+    if cache is None:
+        return backend.validate(exercise, code, **options)
+    cache_options = {name: value for name, value in options.items()
+                     if name != "cancel_event"}
+    entry, result = cache.lookup(exercise, code, **cache_options)
+    if result is not None and not (options.get("coverage") and result.success):
+        return result
+    result = backend.validate(exercise, code, **options)
+    cache.store(entry, result)
+    return result
@@ -0,0 +1,86 @@
+"""What an ExecutionResult keeps of the namespace a run left behind.
+
+A retention policy is one of:
+    "all"             keep the whole namespace (the default)
+    "none"            keep nothing
+    ["f", "g"]        keep only these names, as normal references
+    {"f": "ref", "data": "weak", "big": "summary"}
+                      choose per name: a reference, a weak reference
+                      (weakref.ref; values that cannot be weakly
+                      referenced are summarised instead) or a
+                      SymbolSummary, which is small and picklable
+
+Names missing from the namespace are skipped. A function defined by
+the code refers to the whole namespace through __globals__, so keeping
+one by "ref" keeps everything else alive too; use "weak" or "summary"
+to actually release memory.
+"""
+
+import sys
+import weakref
+
+from pylearn.config import RESULT_RETENTION
+
+RETENTION_MODES = ("ref", "weak", "summary")
+
+_REPR_LIMIT = 200
+
+
+class SymbolSummary:
+    """Picklable description of a value without keeping the value alive."""
+
+    def __init__(self, value):
+        self.type_name = type(value).__name__
+        text = repr(value)
+        if len(text) > _REPR_LIMIT:
+            text = text[:_REPR_LIMIT] + "..."
+        self.repr = text
+        self.size = sys.getsizeof(value, 0)  # Shallow, in bytes
+        try:
+            self.length = len(value)
+        except Exception:
+            self.length = None
+
+    def __repr__(self):
+        return f"<{self.type_name} summary: {self.repr}>"
+
+
+def _keep(value, mode):
+    if mode == "ref":
+        return value
+    if mode == "weak":
+        try:
+            return weakref.ref(value)
+        except TypeError:
+            pass
+    return SymbolSummary(value)
+
+
+def retain_namespace(namespace, policy=None):
+    """Apply a retention policy to a namespace.
+
+    Args:
+        namespace: The dict the code ran in.
+        policy: See the module docstring; None means RESULT_RETENTION.
+
+    Returns:
+        The namespace itself for "all", otherwise a new dict.
+    """
+    if policy is None:
+        policy = RESULT_RETENTION
+    if policy == "all":
+        return namespace
+    if policy == "none":
+        return {}
+    if isinstance(policy, str):
+        raise ValueError(f"Unknown retention policy: {policy!r}")
+    if not isinstance(policy, dict):
+        policy = dict.fromkeys(policy, "ref")
+
+    kept = {}
+    for name, mode in policy.items():
+        if mode not in RETENTION_MODES:
+            raise ValueError(f"Unknown retention mode for {name!r}: {mode!r}")
+        if name in namespace:
+            kept[name] = _keep(namespace[name], mode)
+    return kept
@@ -1,75 +1,152 @@
 """Execute user code safely and capture output."""
 
-import io
 import sys
 import traceback
-from contextlib import redirect_stdout, redirect_stderr
+from contextlib import nullcontext, redirect_stdout, redirect_stderr
+
+from pylearn.engine.capture import BoundedOutput, OutputLimitExceeded
+from pylearn.engine.codecache import compile_cached
+from pylearn.engine.determinism import deterministic as _deterministic
+from pylearn.engine.metrics import measure
+from pylearn.engine.retention import retain_namespace
+from pylearn.engine.sandbox import (
+    LIMIT_MESSAGES, CPULimitExceeded, FileSizeLimitExceeded, TimeLimitExceeded,
+    classify_exception, deadline_passed, time_limit as _time_limit,
+)
+from pylearn.engine.tracing import step_budget as _step_budget, StepBudgetExceeded
 
 
 class ExecutionResult:
     """Result of running user code."""
 
-    def __init__(self, stdout="", stderr="", error=None, namespace=None):
+    def __init__(self, stdout="", stderr="", error=None, namespace=None,
+                 stdout_bytes=0, stderr_bytes=0, metrics=None, limit=None,
+                 lines_run=None):
         self.stdout = stdout
         self.stderr = stderr
         self.error = error
         self.namespace = namespace or {}
         self.success = error is None
+        # Total bytes the program tried to write, including any not kept
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        # RunMetrics for the run, or None if metrics were off
+        self.metrics = metrics
+        # Which resource limit stopped the run (a LIMIT_MESSAGES key), if any
+        self.limit = limit
+        # Learner lines run, when recorded with a LineCoverage
+        self.lines_run = lines_run
 
     def __repr__(self):
         status = "OK" if self.success else "ERROR"
         return f"ExecutionResult({status}, stdout={self.stdout!r:.50})"
 
 
-def run_code(code, timeout_hint=5, pre_code="", namespace=None):
+def _record_lines(coverage, code):
+    if coverage is None:
+        return nullcontext()
+    return coverage.record(code)
+
+
+def run_code(code, timeout_hint=5, pre_code="", namespace=None, step_budget=None,
+             metrics=None, deterministic=False, retain=None, coverage=None,
+             time_limit=None):
     """Execute user code and capture stdout/stderr.
 
+    Output is captured in bounded buffers: a run that writes more than
+    MAX_OUTPUT_BYTES to stdout or stderr is stopped with an
+    OutputLimitExceeded error, and only the head and tail of long output
+    are kept.
+
     Args:
         code: The Python code string to execute.
-        timeout_hint: Not enforced (stdlib has no easy timeout), but hints at expected duration.
+        timeout_hint: Not enforced in-process, but hints at expected duration.
+            Use pylearn.engine.pool.WorkerPool for a hard timeout.
         pre_code: Code to run before user code (setup).
         namespace: Optional namespace dict for exec().
+        step_budget: Maximum number of executed lines before the run is
+            aborted, or None for no limit. Cheap in-process protection
+            against runaway loops when worker processes are unavailable.
+        metrics: Resource accounting level, "off", "basic" or "full"
+            (defaults to METRICS_LEVEL). See pylearn.engine.metrics.
+        deterministic: Seed `random` and freeze time.time()/datetime.now()
+            so identical code gives identical output. See
+            pylearn.engine.determinism.
+        retain: Retention policy for the namespace kept on the result:
+            "all", "none", a list of names or a {name: mode} dict
+            (defaults to RESULT_RETENTION). See pylearn.engine.retention.
+        coverage: Optional LineCoverage; the learner lines this run
+            executes are returned as `lines_run`. See
+            pylearn.engine.coverage.
+        time_limit: Wall-clock seconds before the run is stopped, or
+            None. Only enforced in the main thread on POSIX (see
+            pylearn.engine.sandbox.time_limit).
 
     Returns:
         ExecutionResult with stdout, stderr, error info, and resulting namespace.
+
+    Raises:
+        TimeLimitExceeded: An enclosing time_limit() (e.g. the whole
+            job's) has expired, before or during the run.
     """
+    if deadline_passed():
+        raise TimeLimitExceeded("time limit exceeded")
     if namespace is None:
         namespace = {"__builtins__": __builtins__}
 
-    stdout_capture = io.StringIO()
-    stderr_capture = io.StringIO()
-
-    full_code = pre_code + "\n" + code if pre_code else code
-
-    try:
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            exec(compile(full_code, "<user_code>", "exec"), namespace)
+    stdout_capture = BoundedOutput()
+    stderr_capture = BoundedOutput()
 
-        stdout = stdout_capture.getvalue()
-        if len(stdout) > 50_000:
-            stdout = stdout[:50_000] + "\n... (output truncated)"
+    usage = budget = lines_run = None
 
+    def make_result(error=None, namespace=None, limit=None):
+        if usage is not None and budget is not None:
+            usage.steps = budget.used
         return ExecutionResult(
-            stdout=stdout,
+            stdout=stdout_capture.getvalue(),
             stderr=stderr_capture.getvalue(),
+            error=error,
             namespace=namespace,
+            stdout_bytes=stdout_capture.total_bytes,
+            stderr_bytes=stderr_capture.total_bytes,
+            metrics=usage,
+            limit=limit,
+            lines_run=lines_run,
         )
+
+    full_code = pre_code + "\n" + code if pre_code else code
+
+    try:
+        with measure(metrics) as usage:
+            compiled = compile_cached(full_code, "<user_code>")
+            with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture), \
+                    _deterministic(deterministic), \
+                    _step_budget(step_budget, compiled, namespace) as budget, \
+                    _record_lines(coverage, compiled) as lines_run, \
+                    _time_limit(time_limit):
+                exec(compiled, namespace)
+
+        return make_result(namespace=retain_namespace(namespace, retain))
     except SyntaxError as e:
         location = f" (line {e.lineno})" if e.lineno is not None else ""
-        return ExecutionResult(
-            stdout=stdout_capture.getvalue(),
-            stderr=stderr_capture.getvalue(),
-            error=f"SyntaxError: {e.msg}{location}",
-        )
-    except Exception as e:
+        return make_result(error=f"SyntaxError: {e.msg}{location}")
+    except StepBudgetExceeded as e:
+        return make_result(error=f"StepBudgetExceeded: {e}", limit="steps")
+    except OutputLimitExceeded as e:
+        return make_result(error=f"OutputLimitExceeded: {e}", limit="output")
+    except (Exception, CPULimitExceeded, FileSizeLimitExceeded, TimeLimitExceeded) as e:
+        if isinstance(e, TimeLimitExceeded) and deadline_passed():
+            raise  # The job is out of time, not just this run
+        limit = classify_exception(e)
+        if limit is not None:
+            return make_result(
+                error=f"{type(e).__name__}: {LIMIT_MESSAGES[limit]}",
+                limit=limit,
+            )
         tb_lines = traceback.format_exception(type(e), e, e.__traceback__)
         # Filter out internal frames
         filtered = []
         for line in tb_lines:
             if "<user_code>" in line or not line.startswith("  File"):
                 filtered.append(line)
-        return ExecutionResult(
-            stdout=stdout_capture.getvalue(),
-            stderr=stderr_capture.getvalue(),
-            error="".join(filtered).strip(),
-        )
+        return make_result(error="".join(filtered).strip())
@@ -0,0 +1,289 @@
+"""Resource limits (setrlimit) for learner code running in workers.
+
+Profiles are named dicts in SANDBOX_PROFILES:
+    memory_mb     address space (RLIMIT_AS) -> MemoryError
+    cpu_seconds   CPU time (RLIMIT_CPU)      -> SIGXCPU -> CPULimitExceeded
+    file_size_mb  largest file written (RLIMIT_FSIZE) -> FileSizeLimitExceeded
+                  (or OSError EFBIG)
+    processes     extra processes (RLIMIT_NPROC, on top of those the user
+                  already runs) -> BlockingIOError on fork
+
+Only apply these inside a worker process: they limit the whole process.
+On platforms without the `resource` module they are a no-op.
+
+time_limit() stops a single run after a number of wall-clock seconds
+(SIGALRM -> TimeLimitExceeded), so one worker can give each of several
+runs its own timeout. Limits nest, so the in-process backend can also
+bound a whole job that way; deadline_passed() tells code that catches
+TimeLimitExceeded whether an enclosing limit has expired too.
+"""
+
+import contextlib
+import errno
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from pylearn.config import DEFAULT_SANDBOX_PROFILE, SANDBOX_PROFILES
+from pylearn.engine.subinterpreters import in_main_interpreter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class CPULimitExceeded(BaseException):
+    """Raised in learner code when the CPU-time limit (SIGXCPU) is hit."""
+
+
+class FileSizeLimitExceeded(BaseException):
+    """Raised in learner code when the file-size limit (SIGXFSZ) is hit."""
+
+
+class TimeLimitExceeded(BaseException):
+    """Raised in learner code when its time_limit() (SIGALRM) expires."""
+
+
+# Which limit a run hit -> message shown to the learner.
+LIMIT_MESSAGES = {
+    "memory": "Your solution used too much memory.",
+    "cpu": "Your solution used too much CPU time.",
+    "file_size": "Your solution wrote a file that is too large.",
+    "processes": "Your solution tried to start too many processes.",
+    "timeout": "Your solution took too long to finish (infinite loop?).",
+    "steps": "Your solution ran too many steps (infinite loop?).",
+    "output": "Your solution printed too much output (print inside a loop?).",
+}
+
+
+def classify_exception(exc):
+    """Return the LIMIT_MESSAGES key for an exception, or None."""
+    if isinstance(exc, MemoryError):
+        return "memory"
+    if isinstance(exc, CPULimitExceeded):
+        return "cpu"
+    if isinstance(exc, FileSizeLimitExceeded):
+        return "file_size"
+    if isinstance(exc, TimeLimitExceeded):
+        return "timeout"
+    if isinstance(exc, OSError) and exc.errno == errno.EFBIG:
+        # The write failed before the SIGXFSZ handler got to run.
+        return "file_size"
+    if isinstance(exc, BlockingIOError) and exc.errno == errno.EAGAIN:
+        return "processes"
+    return None
+
+
+def classify_exit(description):
+    """Map a worker exit description (e.g. 'killed by SIGXCPU') to a limit."""
+    if "SIGXCPU" in description:
+        return "cpu"
+    if "SIGXFSZ" in description:
+        return "file_size"
+    return None
+
+
+def get_profile(profile=None):
+    """Resolve a profile name (or dict) to a dict of limits."""
+    if profile is None:
+        profile = DEFAULT_SANDBOX_PROFILE
+    if isinstance(profile, dict):
+        return profile
+    try:
+        return SANDBOX_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown sandbox profile: {profile!r}")
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _raise_file_size_limit(signum, frame):
+    raise FileSizeLimitExceeded("file size limit exceeded")
+
+
+# Open time_limit() blocks, outermost first: [deadline, raised yet].
+_time_limits = []
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _is_cleanup(frame):
+    """Whether a frame is pylearn's own code (e.g. a context manager exit)."""
+    if frame is None:
+        return False
+    filename = frame.f_code.co_filename
+    return filename.startswith(_PACKAGE_DIR) or filename == contextlib.__file__
+
+
+def _raise_time_limit(signum, frame):
+    now = time.monotonic()
+    expired = [limit for limit in _time_limits if limit[0] <= now]
+    if _is_cleanup(frame) and all(raised for _, raised in expired):
+        # A repeat while the run is already unwinding: let the cleanup
+        # finish; the next repeat stops any learner code still running.
+        return
+    for limit in expired:
+        limit[1] = True
+    raise TimeLimitExceeded("time limit exceeded")
+
+
+def deadline_passed():
+    """Whether any open time_limit() block has run past its seconds."""
+    now = time.monotonic()
+    return any(deadline <= now for deadline, _ in _time_limits)
+
+
+@contextmanager
+def time_limit(seconds, interval=0):
+    """Raise TimeLimitExceeded in the block after `seconds` of wall time.
+
+    With `interval`, it is raised again every `interval` seconds after
+    that, so learner code that catches it cannot keep the block running;
+    repeats do not interrupt pylearn's own cleanup. Blocks nest: an
+    enclosing limit that expires first still fires inside the block, and
+    its timer resumes afterwards.
+
+    Only enforced in the main thread of the main interpreter on platforms
+    with SIGALRM; elsewhere, and for seconds=None, the block runs
+    unlimited. Time spent inside a single long C call is only interrupted
+    once that call returns.
+    """
+    if not seconds or not hasattr(signal, "setitimer") \
+            or threading.current_thread() is not threading.main_thread() \
+            or not in_main_interpreter():
+        yield
+        return
+
+    old_handler = signal.signal(signal.SIGALRM, _raise_time_limit)
+    outer_left, outer_interval = signal.getitimer(signal.ITIMER_REAL)
+    start = time.monotonic()
+    _time_limits.append([start + seconds, False])
+    if not outer_left or seconds < outer_left:
+        signal.setitimer(signal.ITIMER_REAL, seconds, interval)
+    try:
+        yield
+    finally:
+        _time_limits.pop()
+        if outer_left:
+            left = outer_left - (time.monotonic() - start)
+            # A timer of 0 would cancel it; an expired one fires at once.
+            signal.setitimer(signal.ITIMER_REAL, max(left, 1e-6), outer_interval)
+        else:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)
+
+
+# Seconds a count of the user's threads is reused by user_processes().
+_USER_PROCESSES_MAX_AGE = 10.0
+
+_user_processes_counted = None  # (count, time.monotonic(), pid that counted)
+
+
+def user_processes():
+    """Number of threads the current user runs, or 0 where unknown.
+
+    RLIMIT_NPROC caps them all (every thread counts, on Linux), not just
+    this process's children. Only Linux (/proc) is supported; elsewhere
+    the limit stays absolute. Counting scans /proc, so a count is reused
+    for _USER_PROCESSES_MAX_AGE seconds; a process that forks jobs calls
+    this before forking, so its children inherit a recent count.
+    """
+    global _user_processes_counted
+    now = time.monotonic()
+    if _user_processes_counted is not None \
+            and now - _user_processes_counted[1] < _USER_PROCESSES_MAX_AGE:
+        count, _, pid = _user_processes_counted
+        # A child forked since the count is one more thread.
+        return count if pid == os.getpid() else count + 1
+    count = _count_user_threads()
+    _user_processes_counted = (count, now, os.getpid())
+    return count
+
+
+def _count_user_threads():
+    uid = os.getuid()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    count = 0
+    for entry in entries:
+        if entry.isdigit():
+            try:
+                if os.stat(f"/proc/{entry}").st_uid == uid:
+                    count += len(os.listdir(f"/proc/{entry}/task"))
+            except OSError:
+                pass  # Exited since listdir()
+    return count
+
+
+def _limits_for(profile):
+    """Yield (rlimit, soft value) pairs for a profile."""
+    mb = 1024 * 1024
+    if profile.get("memory_mb") is not None:
+        yield resource.RLIMIT_AS, profile["memory_mb"] * mb
+    if profile.get("cpu_seconds") is not None:
+        # RLIMIT_CPU counts the whole life of the process, so a reused
+        # worker gets its current usage plus the allowance.
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime) + 1
+        yield resource.RLIMIT_CPU, used + profile["cpu_seconds"]
+    if profile.get("file_size_mb") is not None:
+        yield resource.RLIMIT_FSIZE, profile["file_size_mb"] * mb
+    if profile.get("processes") is not None and hasattr(resource, "RLIMIT_NPROC"):
+        yield resource.RLIMIT_NPROC, user_processes() + profile["processes"]
+
+
+@contextmanager
+def sandbox_limits(profile=None, restore=True):
+    """Apply a sandbox profile for the duration of the block.
+
+    Args:
+        profile: Name in SANDBOX_PROFILES, a dict of limits, or None for
+            DEFAULT_SANDBOX_PROFILE.
+        restore: Put the previous soft limits back afterwards. Pass
+            False in a throwaway child process to also lower the hard
+            limits, which cannot be raised again without privileges.
+    """
+    limits = get_profile(profile)
+    if resource is None or not limits:
+        yield
+        return
+
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    old_handlers = {}
+    if in_main_thread:
+        old_handlers[signal.SIGXCPU] = signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+        old_handlers[signal.SIGXFSZ] = signal.signal(signal.SIGXFSZ, _raise_file_size_limit)
+
+    saved = []
+    try:
+        for which, value in _limits_for(limits):
+            soft, hard = resource.getrlimit(which)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            new_hard = hard if restore else value
+            if which == resource.RLIMIT_CPU and not restore:
+                # Leave a second between SIGXCPU and the hard kill so the
+                # signal handler can report it cleanly.
+                new_hard = value + 1 if hard == resource.RLIM_INFINITY else min(value + 1, hard)
+            try:
+                resource.setrlimit(which, (value, new_hard))
+            except (ValueError, OSError):
+                continue
+            saved.append((which, (soft, hard)))
+        yield
+    finally:
+        if restore:
+            for which, old in reversed(saved):
+                try:
+                    resource.setrlimit(which, old)
+                except (ValueError, OSError):
+                    pass
+        for signum, handler in old_handlers.items():
+            signal.signal(signum, handler)
@@ -0,0 +1,139 @@
+"""Large test inputs placed once in shared memory.
+
+A SharedArray copies a sequence of numbers into a
+multiprocessing.shared_memory block once, in the grading process. It
+pickles as a small reference (block name, type code, length), so
+sending it to a worker costs the same for ten items or ten million.
+Workers attach to the block instead of unpickling a copy, and the
+learner's function gets a read-only memoryview of it, which supports
+len(), indexing, slicing and iteration like a list.
+
+Test cases pass them through an "inputs" dict, whose names are defined
+in the test's namespace before its input_code runs:
+
+    nums = SharedArray(range(2_000_000))
+    {"name": "Stress", "input_code": "print(two_sum(nums, 3_999_997))",
+     "expected": "[1999998, 1999999]", "inputs": {"nums": nums}}
+
+Other values in "inputs" are passed as they are (pickled for workers).
+
+Shared memory only reaches processes on the same host. Jobs sent to a
+remote worker server pickle SharedArrays inside copied_data(), so they
+carry their values instead, and copies that arrive that way keep their
+values in memory and pickle them again for the server's workers.
+"""
+
+import atexit
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+# Blocks attached by this process, by name; views into a block keep
+# using its memory, so it stays mapped for the life of the process.
+_attached = {}
+
+_pickling = threading.local()
+
+
+@contextmanager
+def copied_data():
+    """Pickle SharedArrays in this thread with their values, not a reference."""
+    previous = getattr(_pickling, "copy", False)
+    _pickling.copy = True
+    try:
+        yield
+    finally:
+        _pickling.copy = previous
+
+
+class SharedArray:
+    """A typed array of numbers in shared memory.
+
+    Args:
+        values: Iterable of numbers, or an array.array.
+        typecode: array type code ("q" = 64-bit int, "d" = float, ...);
+            ignored when `values` is already an array.
+
+    The process that creates it owns the block and unlinks it on close()
+    or at exit. Copies that reach other processes (by pickling) only
+    attach to it, unless they were pickled inside copied_data().
+    """
+
+    def __init__(self, values, typecode="q"):
+        data = values if isinstance(values, array) else array(typecode, values)
+        self.typecode = data.typecode
+        self.length = len(data)
+        nbytes = self.length * data.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self._shm.buf[:nbytes] = memoryview(data).cast("B")
+        self.name = self._shm.name
+        self._view = None
+        self._data = None  # The values, in a copy not backed by the block
+        atexit.register(self.close)
+
+    def __getstate__(self):
+        state = {"name": self.name, "typecode": self.typecode, "length": self.length}
+        if self._data is not None or getattr(_pickling, "copy", False):
+            state["data"] = self.view().tobytes()
+        return state
+
+    def __setstate__(self, state):
+        data = state.pop("data", None)
+        self.__dict__.update(state)
+        self._shm = None  # Not the owner
+        self._view = None
+        self._data = None
+        if data is not None:
+            self._data = array(self.typecode)
+            self._data.frombytes(data)
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return f"SharedArray({self.typecode!r}, length={self.length}, name={self.name!r})"
+
+    def view(self):
+        """Read-only memoryview of the values, without copying them."""
+        if self._view is None:
+            if self._data is not None:
+                self._view = memoryview(self._data).toreadonly()
+            else:
+                shm = self._shm or _attach(self.name)
+                self._view = shm.buf.cast(self.typecode)[:self.length].toreadonly()
+        return self._view
+
+    def close(self):
+        """Free the block (owner only); existing views become invalid."""
+        shm, self._shm = self._shm, None
+        if shm is None:
+            return
+        self._view = None
+        try:
+            shm.close()
+        except BufferError:
+            pass  # A view is still in use; the mapping goes with the process
+        shm.unlink()
+
+
+def _attach(name):
+    shm = _attached.get(name)
+    if shm is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Workers share the creator's resource tracker, so attaching
+            # does not add a second owner that could unlink the block.
+            shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return shm
+
+
+def resolve_inputs(inputs):
+    """Turn a test case's "inputs" dict into namespace values."""
+    if not inputs:
+        return {}
+    return {name: value.view() if isinstance(value, SharedArray) else value
+            for name, value in inputs.items()}
@@ -0,0 +1,163 @@
+"""Reusable namespaces built from an exercise's pre_code.
+
+Setup code (fixture data, helper classes) is executed once per process
+and the resulting namespace kept as a template, keyed by a hash of the
+pre_code (so an edited exercise gets a fresh one) and by whether it ran
+deterministically, as the exercise's own runs do. A submission then runs
+in a forked child that sees the template copy-on-write, instead of
+executing pre_code again. In a process that is thrown away after the
+run (a zygote child), the template is used directly.
+
+Templates are only used when pre_code ran cleanly and printed nothing;
+otherwise callers fall back to running pre_code in front of the code.
+They do the same when fork() is refused, as it is under a sandbox
+profile's process limit.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stderr, redirect_stdout
+
+from pylearn.config import EXECUTION_TIMEOUT, PRE_CODE_SNAPSHOTS
+from pylearn.engine.codecache import compile_cached
+from pylearn.engine.determinism import deterministic as _deterministic
+from pylearn.engine.forking import CAN_FORK, fork_call
+from pylearn.engine.runner import run_code, ExecutionResult
+from pylearn.engine.sandbox import classify_exit
+
+PRE_CODE_FILENAME = "<pre_code>"
+
+
+class PreCodeSnapshot:
+    """Namespace left behind by running one pre_code string.
+
+    With `deterministic` (as for exercises that grade deterministically)
+    pre_code runs seeded, so fixture data matches a deterministic re-run.
+    """
+
+    def __init__(self, pre_code, deterministic=True):
+        self.pre_code = pre_code
+        self.key = snapshot_key(pre_code, deterministic)
+        self.namespace = {"__builtins__": __builtins__}
+        self.usable = False
+        output = io.StringIO()
+        try:
+            code = compile_cached(pre_code, PRE_CODE_FILENAME)
+            with redirect_stdout(output), redirect_stderr(output), \
+                    _deterministic(deterministic):
+                exec(code, self.namespace)
+        except Exception:
+            return
+        self.usable = not output.getvalue()
+
+
+def snapshot_key(pre_code, deterministic=True):
+    digest = hashlib.sha256(pre_code.encode("utf-8", "surrogatepass")).hexdigest()
+    return digest if deterministic else digest + "-live"
+
+
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(pre_code, deterministic=True):
+    """Return the usable PreCodeSnapshot for pre_code, or None.
+
+    `deterministic` should match the runs that use it (see
+    PreCodeSnapshot). Snapshots are built on first use and the
+    PRE_CODE_SNAPSHOTS most recently used are kept.
+    """
+    if not pre_code or PRE_CODE_SNAPSHOTS <= 0 or not CAN_FORK:
+        return None
+    key = snapshot_key(pre_code, deterministic)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            snapshot = PreCodeSnapshot(pre_code, deterministic)
+            _snapshots[key] = snapshot
+            while len(_snapshots) > PRE_CODE_SNAPSHOTS:
+                _snapshots.popitem(last=False)
+        else:
+            _snapshots.move_to_end(key)
+    return snapshot if snapshot.usable else None
+
+
+def preload_snapshots(exercises):
+    """Build snapshots for every exercise with pre_code (e.g. in the zygote)."""
+    for exercise in exercises:
+        if exercise.pre_code:
+            get_snapshot(exercise.pre_code, exercise.deterministic)
+
+
+def _discard(snapshot):
+    with _snapshots_lock:
+        if _snapshots.get(snapshot.key) is snapshot:
+            del _snapshots[snapshot.key]
+
+
+def call_in_snapshot(snapshot, func, *args, throwaway=False,
+                     timeout=EXECUTION_TIMEOUT, **kwargs):
+    """Call func(namespace, *args, **kwargs) on a private copy of a snapshot.
+
+    Args:
+        snapshot: A PreCodeSnapshot from get_snapshot().
+        func: Callable whose return value must be picklable unless
+            `throwaway` is set.
+        throwaway: The current process is discarded after this call, so
+            the template itself is used (and dropped from the cache)
+            instead of forking.
+        timeout: Seconds before the forked child is killed.
+
+    Returns:
+        ("ok", value), ("error", traceback), ("timeout", timeout) or
+        ("crashed", description), as ForkedCall.result() does; None if
+        fork() was refused, in which case run snapshot.pre_code instead.
+    """
+    if throwaway:
+        _discard(snapshot)
+        return ("ok", func(snapshot.namespace, *args, **kwargs))
+    try:
+        call = fork_call(func, snapshot.namespace, *args, **kwargs)
+    except OSError:
+        return None
+    return call.result(timeout)
+
+
+def failure_details(status, value):
+    """Turn a non-"ok" call_in_snapshot() reply into (error, limit)."""
+    if status == "timeout":
+        return (f"ExecutionTimeout: Execution timed out after {value}s "
+                "(infinite loop?)", "timeout")
+    if status == "crashed":
+        return (f"WorkerCrashed: Worker process exited unexpectedly: {value}",
+                classify_exit(value))
+    return f"WorkerCrashed: {value}", None
+
+
+def _run_in_namespace(namespace, code, options):
+    return run_code(code, namespace=namespace, **dict(options, retain="none"))
+
+
+def run_code_in_snapshot(snapshot, code, throwaway=False, **options):
+    """run_code() on a copy of a snapshot; the namespace is not returned.
+
+    Args:
+        snapshot: A PreCodeSnapshot from get_snapshot().
+        code: The Python code string to execute.
+        throwaway: See call_in_snapshot().
+        **options: Passed to run_code().
+
+    Returns:
+        ExecutionResult
+    """
+    reply = call_in_snapshot(snapshot, _run_in_namespace, code, options,
+                             throwaway=throwaway)
+    if reply is None:
+        return run_code(code, pre_code=snapshot.pre_code, **dict(options, retain="none"))
+    status, value = reply
+    if status == "ok":
+        return value
+    error, limit = failure_details(status, value)
+    return ExecutionResult(error=error, limit=limit)
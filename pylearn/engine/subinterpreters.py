@@ -0,0 +1,292 @@
+"""Run jobs in isolated subinterpreters, each with its own GIL.
+
+Python 3.12+ can run several interpreters in one process. One created
+as "isolated" has its own GIL and its own copy of every module, so jobs
+in different interpreters run on different cores like worker processes
+do, but start in milliseconds and hand results back without a pipe.
+
+The interpreter and channel modules are still private and differ by
+version (_xxsubinterpreters / _xxinterpchannels on 3.12, _interpreters /
+_interpchannels on 3.13); both layouts are supported and anything else
+counts as unavailable. create_backend("subinterpreter") falls back to a
+WorkerPool where they are missing or an interpreter cannot start.
+
+Isolation is weaker than a worker process: interpreters share the
+process, so there are no rlimits, signals or forked snapshots. Jobs run
+under a step budget like the in-process backend. A job that outlives
+its timeout cannot be stopped; its interpreter is abandoned (destroyed
+once the step budget ends the job) and replaced.
+
+Usage:
+    with SubinterpreterPool(size=4) as pool:
+        result = pool.validate(exercise, code)
+"""
+
+import atexit
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from pylearn.config import DEFAULT_STEP_BUDGET, EXECUTION_TIMEOUT, WORKER_POOL_SIZE
+from pylearn.engine.backends import ExecutionBackend
+
+try:
+    import _interpreters as _interp       # 3.13+
+    import _interpchannels as _channels
+except ImportError:
+    try:
+        import _xxsubinterpreters as _interp  # 3.12
+        import _xxinterpchannels as _channels
+    except ImportError:
+        _interp = _channels = None
+
+HAS_SUBINTERPRETERS = _channels is not None and sys.version_info >= (3, 12)
+_NEW_API = HAS_SUBINTERPRETERS and hasattr(_interp, "exec")
+
+# Run once in each new interpreter, with `paths` (this process's
+# sys.path joined by NUL) defined in its __main__.
+_BOOTSTRAP = """\
+import sys
+sys.path[:] = paths.split("\\0")
+# Loading the _hashlib extension crashes 3.12 isolated interpreters;
+# hashlib falls back to its builtin implementations without it.
+sys.modules["_hashlib"] = None
+from pylearn.engine.subinterpreters import _serve
+"""
+
+# Run per job, with `job` and `channel` defined in __main__.
+_RUN_JOB = "_serve(job, channel)"
+
+
+def in_main_interpreter():
+    """Return True unless running inside a subinterpreter.
+
+    Subinterpreters cannot fork or handle signals.
+    """
+    if _interp is None:
+        return True
+    return _interp.get_current() == _interp.get_main()
+
+
+def _serve(job, channel):
+    """Run a pickled (func, args, kwargs) job and send back the reply.
+
+    Runs inside a subinterpreter; the reply is ("ok", value) or
+    ("error", traceback), like a WorkerPool worker's.
+    """
+    try:
+        func, args, kwargs = pickle.loads(job)
+        reply = ("ok", func(*args, **kwargs))
+    except BaseException as e:
+        reply = ("error", "".join(
+            traceback.format_exception(type(e), e, e.__traceback__)
+        ).strip())
+    try:
+        data = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        data = pickle.dumps(("error", f"Could not send result: {e}"))
+    if _NEW_API:
+        _channels.send(channel, data, blocking=False)
+    else:
+        _channels.send(channel, data)
+
+
+class _Job:
+    """A pickled job handed to an interpreter's host thread."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reply = None
+        self.abandoned = False
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def finish(self, reply):
+        with self._lock:
+            self.reply = reply
+            self.done.set()
+
+    def abandon(self):
+        """Stop waiting; return True if the job is still running."""
+        with self._lock:
+            self.abandoned = not self.done.is_set()
+            return self.abandoned
+
+
+class _Interpreter:
+    """One isolated interpreter, driven by its own host thread.
+
+    The host thread creates, runs and destroys the interpreter: 3.12
+    hangs destroying one from a thread other than the one that started
+    its threading module. Replies come back on a channel. An interpreter
+    whose job was abandoned destroys itself once that job ends.
+    """
+
+    def __init__(self, paths):
+        self.id = self.channel = None
+        self._jobs = queue.SimpleQueue()
+        started = _Job(paths)
+        self._thread = threading.Thread(target=self._main, args=(started,),
+                                        daemon=True, name="pylearn-subinterpreter")
+        self._thread.start()
+        started.done.wait()
+        if started.reply:
+            raise RuntimeError(f"Could not start a subinterpreter:\n{started.reply}")
+
+    def _exec(self, script, names):
+        """Run script with `names` in __main__; return error text or None."""
+        if _NEW_API:
+            _interp.set___main___attrs(self.id, names)
+            error = _interp.exec(self.id, script)
+            return None if error is None else error.formatted
+        try:
+            _interp.run_string(self.id, script, names)
+        except _interp.RunFailedError as e:
+            return str(e)
+        return None
+
+    def _run(self, data):
+        """Run a pickled job here and return its (status, value) reply."""
+        error = self._exec(_RUN_JOB, {"job": data, "channel": int(self.channel)})
+        if error:
+            return ("error", error)
+        data = _channels.recv(self.channel)
+        if _NEW_API:
+            data = data[0]
+        return pickle.loads(data)
+
+    def _start(self, paths):
+        """Create and bootstrap the interpreter; return error text or None."""
+        if _NEW_API:
+            self.id = _interp.create("isolated")
+            self.channel = _channels.create(1)
+        else:
+            self.id = _interp.create(isolated=True)
+            self.channel = _channels.create()
+        return self._exec(_BOOTSTRAP, {"paths": paths})
+
+    def _main(self, started):
+        try:
+            error = self._start(started.data)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        started.finish(error)
+        while not error:
+            job = self._jobs.get()
+            if job is None:
+                break
+            try:
+                reply = self._run(job.data)
+            except Exception as e:
+                reply = ("error", f"{type(e).__name__}: {e}")
+            job.finish(reply)
+            if job.abandoned:
+                break
+        if self.id is not None:
+            _interp.destroy(self.id)
+        if self.channel is not None:
+            _channels.destroy(self.channel)
+
+    def submit(self, data):
+        """Start running a pickled job; return its _Job."""
+        job = _Job(data)
+        self._jobs.put(job)
+        return job
+
+    def stop(self, wait=None):
+        """Destroy the interpreter once it is idle, waiting up to `wait` seconds."""
+        self._jobs.put(None)
+        self._thread.join(wait)
+
+
+class SubinterpreterPool(ExecutionBackend):
+    """Runs jobs in a pool of isolated subinterpreters (Python 3.12+).
+
+    Args:
+        size: Number of interpreters, i.e. jobs that can run at once.
+        step_budget: Executed lines allowed per run.
+        timeout: Default seconds before call() stops waiting for a job.
+
+    Raises:
+        RuntimeError: Subinterpreters are unavailable or failed to start.
+    """
+
+    in_process = True
+
+    def __init__(self, size=WORKER_POOL_SIZE, step_budget=DEFAULT_STEP_BUDGET,
+                 timeout=EXECUTION_TIMEOUT):
+        if not HAS_SUBINTERPRETERS:
+            raise RuntimeError("Subinterpreters with their own GIL need Python 3.12+")
+        self.size = self.concurrency = size
+        self.step_budget = step_budget
+        self.timeout = timeout
+        self._paths = "\0".join(sys.path)
+        self._idle = queue.SimpleQueue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(_Interpreter(self._paths))
+        # Python aborts at exit if a subinterpreter is still alive.
+        atexit.register(self.close)
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) in an interpreter and return its result.
+
+        Args:
+            func: A picklable, module-level callable.
+            timeout: Seconds before the job is abandoned and its
+                interpreter replaced.
+            cancel_event: Optional threading.Event; setting it abandons
+                the job the same way.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerCrashed: The job raised an exception.
+        """
+        from pylearn.engine.pool import (
+            ExecutionCancelled, ExecutionTimeout, WorkerCrashed, _CANCEL_POLL_INTERVAL,
+        )
+
+        if self._closed:
+            raise RuntimeError("SubinterpreterPool is closed")
+        if timeout is None:
+            timeout = self.timeout
+        data = pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+
+        interpreter = self._idle.get()
+        job = interpreter.submit(data)
+        deadline = time.monotonic() + timeout
+        while not job.done.wait(_CANCEL_POLL_INTERVAL if cancel_event else timeout):
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if not cancelled and time.monotonic() < deadline:
+                continue
+            if job.abandon():
+                self._idle.put(_Interpreter(self._paths))
+                if cancelled:
+                    raise ExecutionCancelled("Job cancelled")
+                raise ExecutionTimeout(f"Job exceeded {timeout}s timeout")
+
+        self._release(interpreter)
+        status, value = job.reply
+        if status == "error":
+            raise WorkerCrashed(value)
+        return value
+
+    def _release(self, interpreter):
+        if self._closed:
+            interpreter.stop()
+        else:
+            self._idle.put(interpreter)
+
+    def close(self):
+        """Destroy the idle interpreters; busy ones go when their job ends."""
+        self._closed = True
+        while True:
+            try:
+                interpreter = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            interpreter.stop(wait=1)
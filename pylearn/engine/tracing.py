@@ -0,0 +1,324 @@
+"""Line-level tracing of learner code.
+
+On Python 3.12+ this uses sys.monitoring with *local* events: only the
+learner's own code objects are instrumented, so the rest of the process
+runs at full speed and nothing global is re-instrumented per run. Older
+interpreters fall back to sys.settrace, which only installs a local
+tracer on frames compiled from the learner's source. A "step" is one
+line event, or one opcode event in frames whose loops fit on one line.
+
+Line coverage (cover_lines) uses a second monitoring tool whose line
+callback disables itself after the first hit, so covered code runs at
+full speed after its first execution.
+"""
+
+import dis
+import functools
+import sys
+import types
+from contextlib import contextmanager
+
+USER_FILENAME = "<user_code>"
+
+_HAS_MONITORING = hasattr(sys, "monitoring")
+
+
+class StepBudgetExceeded(BaseException):
+    """Raised inside learner code when it runs out of execution steps.
+
+    Derives from BaseException so `except Exception:` in learner code
+    cannot swallow it.
+    """
+
+
+def user_code_objects(code=None, namespace=None, filename=USER_FILENAME):
+    """Collect code objects compiled from `filename`.
+
+    Walks nested code constants of `code` and the functions, methods and
+    classes found in `namespace`.
+    """
+    found = {}
+    stack = []
+    if code is not None:
+        stack.append(code)
+
+    if namespace:
+        seen_classes = set()
+        objects = list(namespace.values())
+        while objects:
+            obj = objects.pop()
+            if isinstance(obj, (staticmethod, classmethod)):
+                obj = obj.__func__
+            elif isinstance(obj, property):
+                objects.extend(f for f in (obj.fget, obj.fset, obj.fdel) if f)
+                continue
+            if isinstance(obj, types.FunctionType):
+                stack.append(obj.__code__)
+            elif isinstance(obj, type) and id(obj) not in seen_classes:
+                seen_classes.add(id(obj))
+                objects.extend(obj.__dict__.values())
+
+    while stack:
+        co = stack.pop()
+        if co.co_filename != filename or id(co) in found:
+            continue
+        found[id(co)] = co
+        stack.extend(c for c in co.co_consts if isinstance(c, types.CodeType))
+    return list(found.values())
+
+
+_tool_id = None
+_active_callback = None
+_coverage_tool_id = None
+_coverage_lines = None
+
+
+def _dispatch_line(code, line):
+    callback = _active_callback
+    if callback is not None:
+        callback(code, line)
+
+
+def _dispatch_jump(code, source, destination):
+    callback = _active_callback
+    if callback is not None and destination <= source:
+        callback(code, None)
+
+
+def _record_coverage(code, line):
+    lines = _coverage_lines
+    if lines is not None:
+        lines.add(line)
+    return sys.monitoring.DISABLE
+
+
+def _claim_tool(name, callbacks):
+    """Claim a free sys.monitoring tool id and register callbacks on it."""
+    mon = sys.monitoring
+    # cProfile needs PROFILER_ID on 3.12+, so it is only taken last.
+    candidates = [*range(mon.PROFILER_ID + 1, mon.OPTIMIZER_ID), mon.PROFILER_ID]
+    for tool_id in candidates:
+        if mon.get_tool(tool_id) is None:
+            mon.use_tool_id(tool_id, name)
+            for event, callback in callbacks.items():
+                mon.register_callback(tool_id, event, callback)
+            return tool_id
+    raise RuntimeError("No free sys.monitoring tool id")
+
+
+def _monitoring_tool():
+    """Claim a sys.monitoring tool id for PyLearn on first use."""
+    global _tool_id
+    if _tool_id is None:
+        events = sys.monitoring.events
+        _tool_id = _claim_tool("pylearn", {
+            events.LINE: _dispatch_line,
+            events.JUMP: _dispatch_jump,
+        })
+    return _tool_id
+
+
+def _coverage_tool():
+    """Claim the tool id used for line coverage on first use."""
+    global _coverage_tool_id
+    if _coverage_tool_id is None:
+        _coverage_tool_id = _claim_tool("pylearn-coverage", {
+            sys.monitoring.events.LINE: _record_coverage,
+        })
+    return _coverage_tool_id
+
+
+@contextmanager
+def _monitor_lines(callback, code, namespace, filename):
+    global _active_callback
+    mon = sys.monitoring
+    tool_id = _monitoring_tool()
+    code_objects = user_code_objects(code, namespace, filename)
+
+    previous = _active_callback
+    _active_callback = callback
+    for co in code_objects:
+        events = mon.events.LINE
+        if _has_single_line_loop(co):
+            events |= mon.events.JUMP
+        mon.set_local_events(tool_id, co, events)
+    try:
+        yield
+    finally:
+        for co in code_objects:
+            mon.set_local_events(tool_id, co, 0)
+        _active_callback = previous
+
+
+@functools.lru_cache(maxsize=1024)
+def _has_single_line_loop(code):
+    """Whether `code` jumps backwards without leaving the current line.
+
+    Neither sys.settrace before 3.12 nor sys.monitoring LINE events
+    report such loops (e.g. `while True: pass`), so their frames need
+    opcode or jump events as well.
+    """
+    instructions = list(dis.get_instructions(code))
+    lines = {}
+    line = None
+    for ins in instructions:
+        if hasattr(ins, "line_number"):
+            line = ins.line_number
+        elif ins.starts_line is not None:
+            line = ins.starts_line
+        lines[ins.offset] = line
+
+    for ins in instructions:
+        is_jump = ins.opcode in dis.hasjrel or ins.opcode in dis.hasjabs
+        if is_jump and isinstance(ins.argval, int) and ins.argval <= ins.offset \
+                and lines.get(ins.argval) == lines[ins.offset]:
+            return True
+    return False
+
+
+@contextmanager
+def _settrace_lines(callback, filename):
+    def local_trace(frame, event, arg):
+        if event == "line" or event == "opcode":
+            callback(frame.f_code, frame.f_lineno)
+        return local_trace
+
+    def global_trace(frame, event, arg):
+        if frame.f_code.co_filename != filename:
+            return None
+        if _has_single_line_loop(frame.f_code):
+            frame.f_trace_opcodes = True
+        return local_trace
+
+    previous = sys.gettrace()
+    sys.settrace(global_trace)
+    try:
+        yield
+    finally:
+        sys.settrace(previous)
+
+
+def trace_lines(callback, code=None, namespace=None, filename=USER_FILENAME):
+    """Context manager calling callback(code, lineno) for each step run.
+
+    Args:
+        callback: Called for every executed line of learner code, and
+            for backward jumps in loops that fit on one line (with
+            lineno None under sys.monitoring). Exceptions it raises
+            propagate into the traced code.
+        code: Compiled code object about to be executed.
+        namespace: Namespace whose learner-defined functions and classes
+            may be called while tracing.
+        filename: Only code compiled with this filename is traced.
+    """
+    if _HAS_MONITORING:
+        return _monitor_lines(callback, code, namespace, filename)
+    return _settrace_lines(callback, filename)
+
+
+@contextmanager
+def _monitor_coverage(code_objects):
+    global _coverage_lines
+    mon = sys.monitoring
+    tool_id = _coverage_tool()
+    previous = _coverage_lines
+    lines = _coverage_lines = set()
+    # Setting local events also re-arms lines that returned DISABLE in an
+    # earlier run; restart_events() would re-instrument the whole process.
+    for co in code_objects:
+        mon.set_local_events(tool_id, co, mon.events.LINE)
+    try:
+        yield lines
+    finally:
+        for co in code_objects:
+            mon.set_local_events(tool_id, co, 0)
+        _coverage_lines = previous
+
+
+@contextmanager
+def _settrace_coverage(code_objects):
+    lines = set()
+    wanted = {id(co) for co in code_objects}
+    previous = sys.gettrace()
+
+    def global_trace(frame, event, arg):
+        # Chain to an active tracer (e.g. a step budget) so both work.
+        inner = previous(frame, event, arg) if previous is not None else None
+        if id(frame.f_code) not in wanted:
+            return inner
+
+        def local_trace(frame, event, arg):
+            nonlocal inner
+            if event == "line":
+                lines.add(frame.f_lineno)
+            if inner is not None:
+                inner = inner(frame, event, arg)
+            return local_trace
+
+        return local_trace
+
+    sys.settrace(global_trace)
+    try:
+        yield lines
+    finally:
+        sys.settrace(previous)
+
+
+def cover_lines(code_objects):
+    """Context manager yielding the set of line numbers run in the block.
+
+    Only lines belonging to `code_objects` (see user_code_objects())
+    are recorded. Can be combined with step_budget().
+    """
+    if _HAS_MONITORING:
+        return _monitor_coverage(code_objects)
+    return _settrace_coverage(code_objects)
+
+
+def executable_lines(code_objects):
+    """Line numbers that have bytecode in any of `code_objects`."""
+    lines = set()
+    for co in code_objects:
+        lines.update(line for _, _, line in co.co_lines() if line)
+    return lines
+
+
+class _Budget:
+    """Steps remaining for one step_budget() block."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.remaining = limit
+
+    @property
+    def used(self):
+        return self.limit - max(self.remaining, 0)
+
+    def count(self, code, line):
+        self.remaining -= 1
+        if self.remaining < 0:
+            raise StepBudgetExceeded(
+                f"execution budget of {self.limit:,} steps exceeded "
+                "(infinite loop?)"
+            )
+
+
+@contextmanager
+def step_budget(limit, code=None, namespace=None, filename=USER_FILENAME):
+    """Abort learner code after `limit` executed lines.
+
+    Raises StepBudgetExceeded from inside the running code once the
+    budget is used up. A limit of None disables the check. `code` and
+    `namespace` are passed through to trace_lines().
+
+    Yields:
+        An object whose `used` attribute counts the steps taken, or
+        None when there is no limit.
+    """
+    if limit is None:
+        yield None
+        return
+
+    budget = _Budget(limit)
+    with trace_lines(budget.count, code, namespace, filename):
+        yield budget
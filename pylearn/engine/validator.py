@@ -1,6 +1,20 @@
 """Validate user code against test cases."""
 
+from contextlib import nullcontext
+
+from pylearn.config import EXECUTION_TIMEOUT, MAX_FORKED_TESTS
+from pylearn.engine.coverage import LineCoverage
+from pylearn.engine.determinism import deterministic as _deterministic
+from pylearn.engine.forking import CAN_FORK, fork_call
+from pylearn.engine.matching import compile_matcher, matcher_for_test
+from pylearn.engine.metrics import RunMetrics, measure
 from pylearn.engine.runner import run_code, ExecutionResult
+from pylearn.engine.sandbox import (
+    LIMIT_MESSAGES, CPULimitExceeded, FileSizeLimitExceeded, classify_exception,
+)
+from pylearn.engine.shared_inputs import resolve_inputs
+from pylearn.engine.snapshots import call_in_snapshot, failure_details, get_snapshot
+from pylearn.engine.tracing import step_budget as _step_budget, StepBudgetExceeded
 
 
 class ValidationResult:
@@ -10,6 +24,30 @@ class ValidationResult:
         self.passed = []
         self.failed = []
         self.error = None
+        # RunMetrics summed over every run made while validating
+        self.metrics = None
+        # First resource limit hit by any run (a LIMIT_MESSAGES key), if any
+        self.limit = None
+        # LineCoverage of the learner's code, if coverage was requested
+        self.coverage = None
+        # Tests not run because a fail-fast validation stopped early
+        self.skipped = 0
+        # Tests of a "fork"-isolated validation that ran in a namespace
+        # copy instead, because fork() failed
+        self.fork_fallbacks = 0
+
+    def add_limit(self, limit):
+        """Record the resource limit a run hit (keeps the first one)."""
+        if self.limit is None:
+            self.limit = limit
+
+    def add_metrics(self, metrics):
+        """Accumulate the RunMetrics of one run (ignores None)."""
+        if metrics is None:
+            return
+        if self.metrics is None:
+            self.metrics = RunMetrics(runs=0)
+        self.metrics.add(metrics)
 
     @property
     def success(self):
@@ -23,32 +61,54 @@ class ValidationResult:
     def summary(self):
         if self.error:
             return f"Error: {self.error}"
-        return f"{len(self.passed)}/{self.total} tests passed"
+        summary = f"{len(self.passed)}/{self.total} tests passed"
+        if self.skipped:
+            summary += f" ({self.skipped} not run)"
+        return summary
 
 
-def validate_output(code, expected_output, pre_code=""):
+def validate_output(code, expected_output, pre_code="", namespace=None,
+                    step_budget=None, metrics=None, deterministic=False,
+                    coverage=False, match="exact"):
     """Validate that code produces expected stdout output.
 
     Args:
         code: User's code string.
         expected_output: Expected stdout (stripped for comparison).
         pre_code: Setup code to run before user code.
+        namespace: Optional namespace dict to run the user code in.
+        step_budget: Per-run limit on executed lines (see run_code).
+        metrics: Resource accounting level (see run_code); the totals
+            are available as `result.metrics`.
+        deterministic: Make every run reproducible (see run_code).
+        coverage: Record which lines of the user code ran, as
+            `result.coverage` (see pylearn.engine.coverage).
+        match: How the output is compared with expected_output, one of
+            pylearn.engine.matching.MATCH_MODES.
 
     Returns:
         ValidationResult
     """
     result = ValidationResult()
+    result.coverage = _new_coverage(coverage, pre_code)
+    matcher = compile_matcher(expected_output, match)
 
-    exec_result = run_code(code, pre_code=pre_code)
+    exec_result = run_code(code, pre_code=pre_code, namespace=namespace,
+                           step_budget=step_budget, metrics=metrics,
+                           deterministic=deterministic, retain="none",
+                           coverage=result.coverage)
+    _add_module_lines(result.coverage, exec_result)
+    result.add_metrics(exec_result.metrics)
+    result.add_limit(exec_result.limit)
 
     if not exec_result.success:
         result.error = exec_result.error
         return result
 
     actual = exec_result.stdout.strip()
-    expected = expected_output.strip()
+    expected = matcher.expected
 
-    if actual == expected:
+    if matcher(actual):
         result.passed.append({
             "name": "Output matches expected",
             "expected": expected,
@@ -64,7 +124,116 @@ def validate_output(code, expected_output, pre_code=""):
     return result
 
 
-def validate_with_tests(code, test_cases, pre_code=""):
+def _new_coverage(enabled, pre_code):
+    if not enabled:
+        return None
+    # run_code compiles pre_code + "\n" + code as one source.
+    return LineCoverage(line_offset=pre_code.count("\n") + 1 if pre_code else 0)
+
+
+def _add_module_lines(coverage, exec_result):
+    if coverage is not None and exec_result.lines_run is not None:
+        coverage.module_lines |= exec_result.lines_run
+
+
+def _record_lines(coverage):
+    if coverage is None:
+        return nullcontext()
+    return coverage.record()
+
+
+def _test_namespace(namespace, test):
+    """Copy of the user code's namespace plus the test's "inputs"."""
+    namespace = dict(namespace)
+    namespace.update(resolve_inputs(test.get("inputs")))
+    return namespace
+
+
+def _run_test_job(test, namespace, options):
+    """Run one test in a forked child, directly in the inherited namespace."""
+    namespace.update(resolve_inputs(test.get("inputs")))
+    return run_code(test.get("input_code", ""), namespace=namespace, **options)
+
+
+def _run_tests_forked(test_cases, namespace, options, result):
+    """Yield an ExecutionResult per test, each run in its own forked child.
+
+    Children share the parent's heap copy-on-write, so a test that
+    mutates globals cannot affect the others. Up to MAX_FORKED_TESTS
+    run at once; results are yielded in test order. If a fork fails
+    (e.g. a sandbox process limit) that test runs in a namespace copy
+    and is counted in `result.fork_fallbacks`.
+    """
+    running = []
+    tests = iter(test_cases)
+
+    def start_next():
+        test = next(tests, None)
+        if test is None:
+            return
+        test_options = dict(options, time_limit=test.get("timeout"))
+        try:
+            running.append(fork_call(_run_test_job, test, namespace, test_options))
+        except OSError:
+            result.fork_fallbacks += 1
+            running.append(run_code(test.get("input_code", ""),
+                                    namespace=_test_namespace(namespace, test),
+                                    **test_options))
+
+    for _ in range(MAX_FORKED_TESTS):
+        start_next()
+    try:
+        while running:
+            call = running.pop(0)
+            if isinstance(call, ExecutionResult):
+                start_next()
+                yield call
+                continue
+            status, value = call.result(EXECUTION_TIMEOUT)
+            start_next()
+            if status == "ok":
+                yield value
+            elif status == "timeout":
+                yield ExecutionResult(
+                    error=f"ExecutionTimeout: Test timed out after {value}s",
+                    limit="timeout",
+                )
+            else:
+                yield ExecutionResult(error=f"Test process failed: {value}")
+    finally:
+        for call in running:
+            if not isinstance(call, ExecutionResult):
+                call.kill()
+
+
+def order_tests(test_cases, last_failed=(), failure_counts=None):
+    """Reorder test cases so the likeliest failures run first.
+
+    Tests that failed on the previous attempt come first, then tests by
+    how often they have failed before; ties keep their original order.
+
+    Args:
+        test_cases: Test case dicts (see validate_with_tests()).
+        last_failed: Names of the tests that failed last time.
+        failure_counts: {test name: times it has failed}.
+
+    Returns:
+        A new list of the same test cases.
+    """
+    last_failed = set(last_failed)
+    failure_counts = failure_counts or {}
+
+    def priority(test):
+        name = test.get("name", "Test")
+        return (name not in last_failed, -failure_counts.get(name, 0))
+
+    return sorted(test_cases, key=priority)
+
+
+def validate_with_tests(code, test_cases, pre_code="", namespace=None,
+                        step_budget=None, metrics=None, deterministic=False,
+                        isolation="copy", coverage=False, fail_fast=False,
+                        match="exact"):
     """Validate code against multiple test cases.
 
     Args:
@@ -73,26 +242,76 @@ def validate_with_tests(code, test_cases, pre_code=""):
             - name: Test name
             - input_code: Code to run after user code (e.g., function calls)
             - expected: Expected output string
+            - match: Optional comparison mode for this test (see
+              pylearn.engine.matching); defaults to `match`
+            - tolerance: Optional tolerance of a "float" match
+            - timeout: Optional seconds this test may run (see the
+              time_limit argument of run_code)
+            - inputs: Optional {name: value} defined before input_code
+              runs; SharedArray values arrive as read-only memoryviews
+              (see pylearn.engine.shared_inputs)
         pre_code: Setup code to run before user code.
+        namespace: Optional namespace dict to run the user code in.
+        step_budget: Per-run limit on executed lines (see run_code).
+        metrics: Resource accounting level (see run_code); the totals
+            are available as `result.metrics`.
+        deterministic: Make every run reproducible (see run_code).
+        isolation: "copy" runs each test in a shallow copy of the user
+            code's namespace. "fork" runs each test in a forked child
+            with a copy-on-write snapshot of the whole process, so tests
+            cannot see each other's mutations; falls back to "copy"
+            where os.fork() is unavailable, and for any test whose fork
+            fails (counted in `result.fork_fallbacks`).
+        coverage: Record which lines of the user code ran, in total and
+            per test, as `result.coverage` (see pylearn.engine.coverage).
+        fail_fast: Stop at the first failing test; the tests after it
+            are counted in `result.skipped` (see order_tests() to run
+            the likeliest failures first).
+        match: Comparison mode of tests that do not set their own.
 
     Returns:
         ValidationResult
     """
     result = ValidationResult()
+    result.coverage = _new_coverage(coverage, pre_code)
+    matchers = [matcher_for_test(test, match) for test in test_cases]
 
     # First, compile and run the user code to get namespace
-    exec_result = run_code(code, pre_code=pre_code)
+    exec_result = run_code(code, pre_code=pre_code, namespace=namespace,
+                           step_budget=step_budget, metrics=metrics,
+                           deterministic=deterministic, coverage=result.coverage)
+    _add_module_lines(result.coverage, exec_result)
+    result.add_metrics(exec_result.metrics)
+    result.add_limit(exec_result.limit)
     if not exec_result.success:
         result.error = exec_result.error
         return result
 
-    for test in test_cases:
-        test_code = test.get("input_code", "")
-        expected = test.get("expected", "").strip()
+    # Test namespaces are throwaway copies, so results do not keep them.
+    options = {"step_budget": step_budget, "metrics": metrics,
+               "deterministic": deterministic, "retain": "none",
+               "coverage": result.coverage}
+    if isolation == "fork" and CAN_FORK:
+        test_results = _run_tests_forked(test_cases, exec_result.namespace, options,
+                                         result)
+    else:
+        # Run test code in the same namespace as user code
+        test_results = (
+            run_code(test.get("input_code", ""),
+                     namespace=_test_namespace(exec_result.namespace, test),
+                     time_limit=test.get("timeout"), **options)
+            for test in test_cases
+        )
+
+    for index, (test, matcher, test_result) in enumerate(
+            zip(test_cases, matchers, test_results), 1):
+        expected = matcher.expected
         name = test.get("name", "Test")
 
-        # Run test code in the same namespace as user code
-        test_result = run_code(test_code, namespace=dict(exec_result.namespace))
+        result.add_metrics(test_result.metrics)
+        result.add_limit(test_result.limit)
+        if result.coverage is not None and test_result.lines_run is not None:
+            result.coverage.add_test(name, test_result.lines_run)
 
         if not test_result.success:
             result.failed.append({
@@ -100,26 +319,32 @@ def validate_with_tests(code, test_cases, pre_code=""):
                 "expected": expected,
                 "actual": f"Error: {test_result.error}",
             })
-            continue
-
-        actual = test_result.stdout.strip()
-        if actual == expected:
-            result.passed.append({
-                "name": name,
-                "expected": expected,
-                "actual": actual,
-            })
         else:
-            result.failed.append({
-                "name": name,
-                "expected": expected,
-                "actual": actual,
-            })
+            actual = test_result.stdout.strip()
+            if matcher(actual):
+                result.passed.append({
+                    "name": name,
+                    "expected": expected,
+                    "actual": actual,
+                })
+            else:
+                result.failed.append({
+                    "name": name,
+                    "expected": expected,
+                    "actual": actual,
+                })
+
+        if fail_fast and result.failed:
+            result.skipped = len(test_cases) - index
+            test_results.close()  # Kills forked tests still running
+            break
 
     return result
 
 
-def validate_with_function(code, validator_fn, pre_code=""):
+def validate_with_function(code, validator_fn, pre_code="", namespace=None,
+                           step_budget=None, metrics=None, deterministic=False,
+                           coverage=False):
     """Validate code using a custom validator function.
 
     Args:
@@ -127,25 +352,117 @@ def validate_with_function(code, validator_fn, pre_code=""):
         validator_fn: Function that takes (namespace, stdout) and returns
                       (bool, message) tuple.
         pre_code: Setup code.
+        namespace: Optional namespace dict to run the user code in.
+        step_budget: Limit on executed lines for the run and for learner
+            code called by the validator (see run_code).
+        metrics: Resource accounting level (see run_code); the totals,
+            including the validator call, are in `result.metrics`.
+        deterministic: Make the run and the validator call reproducible
+            (see run_code).
+        coverage: Record which lines of the user code ran, as
+            `result.coverage`; the validator call counts as one test.
 
     Returns:
         ValidationResult
     """
     result = ValidationResult()
-
-    exec_result = run_code(code, pre_code=pre_code)
+    result.coverage = _new_coverage(coverage, pre_code)
+
+    exec_result = run_code(code, pre_code=pre_code, namespace=namespace,
+                           step_budget=step_budget, metrics=metrics,
+                           deterministic=deterministic, coverage=result.coverage)
+    _add_module_lines(result.coverage, exec_result)
+    result.add_metrics(exec_result.metrics)
+    result.add_limit(exec_result.limit)
     if not exec_result.success:
         result.error = exec_result.error
         return result
 
     try:
-        passed, message = validator_fn(exec_result.namespace, exec_result.stdout)
+        with measure(metrics) as usage, _deterministic(deterministic), \
+                _step_budget(step_budget, namespace=exec_result.namespace), \
+                _record_lines(result.coverage) as lines_run:
+            passed, message = validator_fn(exec_result.namespace, exec_result.stdout)
+        result.add_metrics(usage)
+        if lines_run is not None:
+            result.coverage.add_test("Custom validation", lines_run)
         entry = {"name": "Custom validation", "expected": "Pass", "actual": message}
         if passed:
             result.passed.append(entry)
         else:
             result.failed.append(entry)
-    except Exception as e:
-        result.error = f"Validator error: {e}"
+    except StepBudgetExceeded as e:
+        result.error = f"StepBudgetExceeded: {e}"
+        result.limit = "steps"
+    except (Exception, CPULimitExceeded, FileSizeLimitExceeded) as e:
+        limit = classify_exception(e)
+        if limit is None:
+            result.error = f"Validator error: {e}"
+        else:
+            result.error = f"{type(e).__name__}: {LIMIT_MESSAGES[limit]}"
+            result.limit = limit
+
+    return result
 
+
+def _dispatch(namespace, exercise, code, options):
+    """Run the check the exercise defines; namespace may be None."""
+    options = dict(options, namespace=namespace)
+    fail_fast = options.pop("fail_fast", False)
+    if namespace is None:
+        options["pre_code"] = exercise.pre_code
+    if exercise.validator:
+        return validate_with_function(code, exercise.validator, **options)
+    if exercise.test_cases:
+        return validate_with_tests(code, exercise.test_cases, fail_fast=fail_fast,
+                                   isolation=exercise.test_isolation,
+                                   match=exercise.match, **options)
+    if exercise.expected_output:
+        return validate_output(code, exercise.expected_output, match=exercise.match,
+                               **options)
+    return None
+
+
+def validate_exercise(exercise, code, step_budget=None, metrics=None,
+                      throwaway=False, coverage=False, fail_fast=False):
+    """Validate code using whichever check the exercise defines.
+
+    Args:
+        exercise: An Exercise with a validator, test_cases or expected_output.
+        code: User's code string.
+        step_budget: Line budget used when the exercise does not set its
+            own `step_budget`.
+        metrics: Resource accounting level (see run_code).
+        throwaway: The calling process is discarded afterwards, so a
+            pre_code snapshot can be used without forking (see
+            pylearn.engine.snapshots).
+        coverage: Record line coverage of the user code as
+            `result.coverage`.
+        fail_fast: Stop at the first failing test case (see
+            validate_with_tests()).
+
+    Runs are deterministic unless the exercise sets `deterministic=False`.
+    An exercise's pre_code is run once per process and reused from a
+    snapshot where possible.
+
+    Returns:
+        ValidationResult, or None if the exercise has no validation.
+    """
+    budget = exercise.step_budget or step_budget
+    options = {"step_budget": budget, "metrics": metrics,
+               "deterministic": exercise.deterministic, "coverage": coverage,
+               "fail_fast": fail_fast}
+    snapshot = get_snapshot(exercise.pre_code, exercise.deterministic)
+    if snapshot is None:
+        return _dispatch(None, exercise, code, options)
+
+    reply = call_in_snapshot(snapshot, _dispatch, exercise, code, options,
+                             throwaway=throwaway)
+    if reply is None:
+        return _dispatch(None, exercise, code, options)
+    status, value = reply
+    if status == "ok":
+        return value
+    result = ValidationResult()
+    result.error, result.limit = failure_details(status, value)
     return result
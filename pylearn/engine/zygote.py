@@ -0,0 +1,252 @@
+"""Zygote process that forks a fresh, pre-warmed child for every run.
+
+The zygote is spawned once, imports the engine, the stdlib modules the
+curriculum uses and the curriculum itself, then calls gc.freeze() so
+those objects sit in the permanent generation and stay shared
+copy-on-write with every child. Each job is run in its own forked child,
+which gives per-run isolation at the cost of a fork() rather than an
+interpreter startup. A job that cannot be unpickled or forked fails on
+its own, with an "error" reply; the zygote keeps serving the others.
+POSIX only.
+
+Usage:
+    with Zygote() as zygote:
+        result = zygote.run_code("print('hi')")
+"""
+
+import atexit
+import gc
+import importlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.connection import wait
+
+from pylearn.config import EXECUTION_TIMEOUT, ZYGOTE_PRELOAD
+from pylearn.engine.backends import ExecutionBackend
+from pylearn.engine.determinism import hash_seed_environment
+from pylearn.engine.forking import CAN_FORK, fork_call
+from pylearn.engine.pool import ExecutionCancelled, ExecutionTimeout, WorkerCrashed
+from pylearn.engine.sandbox import user_processes
+
+# Extra seconds the client waits beyond a job's timeout before giving up
+# on the zygote itself.
+_CLIENT_GRACE = 5
+
+
+def _preload(modules):
+    """Import modules and the curriculum, then freeze the heap for forking."""
+    for name in modules:
+        importlib.import_module(name)
+    from pylearn.curriculum import discover_modules
+    from pylearn.engine.snapshots import preload_snapshots
+    for module in discover_modules():
+        preload_snapshots(module.exercises)
+    gc.collect()
+    gc.freeze()
+
+
+def _zygote_main(conn, preload):
+    """Zygote loop: fork a child per job and relay replies to the client."""
+    _preload(preload)
+    running = {}  # ForkedCall -> (job_id, deadline, timeout)
+
+    while True:
+        now = time.monotonic()
+        deadlines = [deadline for _, deadline, _ in running.values()]
+        wait_for = max(0, min(deadlines) - now) if deadlines else None
+
+        for ready in wait([conn, *running], timeout=wait_for):
+            if ready is conn:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    message = ("stop",)
+                if message[0] == "stop":
+                    for call in running:
+                        call.kill()
+                    return
+                if message[0] == "cancel":
+                    for call, (job_id, _, _) in list(running.items()):
+                        if job_id == message[1]:
+                            call.kill()
+                            del running[call]
+                    continue
+                _, job_id, job, timeout = message
+                try:
+                    func, args, kwargs = pickle.loads(job)
+                except Exception as e:
+                    # e.g. the job's function cannot be imported here
+                    conn.send((job_id, "error", f"Could not receive job: {e}"))
+                    continue
+                user_processes()  # Counted here, not in every child (see sandbox)
+                try:
+                    call = fork_call(func, *args, **kwargs)
+                except OSError as e:
+                    conn.send((job_id, "error", f"Could not fork a child for the job: {e}"))
+                    continue
+                running[call] = (job_id, time.monotonic() + timeout, timeout)
+            elif ready in running and ready.read_available():
+                job_id, _, _ = running.pop(ready)
+                conn.send((job_id, *ready.reply()))
+
+        now = time.monotonic()
+        for call, (job_id, deadline, timeout) in list(running.items()):
+            if deadline <= now:
+                call.kill()
+                del running[call]
+                conn.send((job_id, "timeout", timeout))
+
+
+class Zygote(ExecutionBackend):
+    """Client for a zygote process; same call interface as WorkerPool.
+
+    Any number of jobs may be in flight; each runs in its own child.
+    """
+
+    # Children are thrown away, so hard limits can be lowered too.
+    restores_limits = False
+
+    def __init__(self, timeout=EXECUTION_TIMEOUT, preload=ZYGOTE_PRELOAD):
+        if not CAN_FORK:
+            raise RuntimeError("Zygote requires os.fork() (POSIX only)")
+        self.timeout = timeout
+        self.preload = tuple(preload)
+        self.concurrency = os.cpu_count() or 1
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._pending = {}
+        self._conn = None
+        self._process = None
+        self._closed = False
+        self._start()
+
+    def _start(self):
+        self._conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(
+            target=_zygote_main, args=(child_conn, self.preload), daemon=True,
+        )
+        # Forked children inherit the zygote's hash seed.
+        with hash_seed_environment():
+            self._process.start()
+        child_conn.close()
+        threading.Thread(
+            target=self._read_replies, args=(self._conn,), daemon=True,
+        ).start()
+
+    def _read_replies(self, conn):
+        """Resolve pending futures from zygote replies."""
+        while True:
+            try:
+                job_id, status, value = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is not None:
+                future.set_result((status, value))
+
+        # The zygote is gone: fail everything still waiting on it.
+        with self._lock:
+            if conn is self._conn:
+                self._conn = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_result(("crashed", "zygote process exited"))
+
+    def _abandon(self, job_id):
+        with self._lock:
+            self._pending.pop(job_id, None)
+        self._send(("cancel", job_id))
+
+    def _wait(self, job_id, future, timeout, cancel_event):
+        deadline = time.monotonic() + timeout + _CLIENT_GRACE
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                self._abandon(job_id)
+                raise ExecutionCancelled("Execution cancelled")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._abandon(job_id)
+                raise WorkerCrashed("Zygote did not reply in time")
+            step = remaining if cancel_event is None else min(remaining, 0.05)
+            try:
+                return future.result(step)
+            except FutureTimeout:
+                continue
+
+    def _send(self, message):
+        with self._lock:
+            if self._conn is None:
+                if self._closed:
+                    raise RuntimeError("Zygote is closed")
+                self._start()
+            try:
+                self._conn.send(message)
+            except OSError as e:
+                raise WorkerCrashed(f"Zygote process exited unexpectedly: {e}")
+
+    def call(self, func, *args, timeout=None, cancel_event=None, **kwargs):
+        """Run func(*args, **kwargs) in a freshly forked child.
+
+        Raises:
+            ExecutionTimeout: The job ran longer than `timeout` seconds.
+            ExecutionCancelled: cancel_event was set before the job ended.
+            WorkerCrashed: The child died or the job raised an exception.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        # Pickled apart from the message, so the zygote can reply to a
+        # job it fails to unpickle.
+        job = pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+        job_id = next(self._job_ids)
+        future = Future()
+        with self._lock:
+            self._pending[job_id] = future
+        self._send(("run", job_id, job, timeout))
+
+        status, value = self._wait(job_id, future, timeout, cancel_event)
+        if status == "ok":
+            return value
+        if status == "timeout":
+            raise ExecutionTimeout(
+                f"Execution timed out after {value}s (infinite loop?)"
+            )
+        if status == "crashed":
+            raise WorkerCrashed(f"Worker process exited unexpectedly: {value}")
+        raise WorkerCrashed(value)
+
+    def close(self):
+        """Stop the zygote and any children it is running."""
+        with self._lock:
+            self._closed = True
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        if self._process is not None:
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.kill()
+
+
+_default_zygote = None
+_default_zygote_lock = threading.Lock()
+
+
+def get_zygote():
+    """Return the shared Zygote, starting it on first use."""
+    global _default_zygote
+    with _default_zygote_lock:
+        if _default_zygote is None:
+            _default_zygote = Zygote()
+            atexit.register(_default_zygote.close)
+        return _default_zygote
@@ -20,6 +20,7 @@ def _default_progress():
         "lessons_completed": [],     # List of "module_id/lesson_id"
         "exercises_completed": [],    # List of "module_id/exercise_id"
         "exercise_attempts": {},      # "module_id/exercise_id" -> count
+        "test_failures": {},          # "module_id/exercise_id" -> {"last": [names], "counts": {name: n}}
         "quiz_scores": {},            # "module_id" -> {"score": X, "total": Y, "pct": Z}
         "streak": {
             "current": 0,
@@ -120,6 +121,28 @@ def record_exercise_attempt(module_id, exercise_id):
     save_progress(data)
 
 
+def record_test_results(module_id, exercise_id, failed_names):
+    """Record which tests failed on an attempt (an empty list if none did)."""
+    data = load_progress()
+    key = f"{module_id}/{exercise_id}"
+    history = data.setdefault("test_failures", {}).setdefault(
+        key, {"last": [], "counts": {}}
+    )
+    history["last"] = list(failed_names)
+    for name in failed_names:
+        history["counts"][name] = history["counts"].get(name, 0) + 1
+    save_progress(data)
+
+
+def get_test_history(module_id, exercise_id):
+    """Return (tests that failed last attempt, {test name: times failed})."""
+    data = load_progress()
+    history = data.get("test_failures", {}).get(f"{module_id}/{exercise_id}")
+    if history is None:
+        return [], {}
+    return history["last"], history["counts"]
+
+
 def record_quiz_score(module_id, score, total):
     """Record a quiz score."""
     data = load_progress()
@@ -0,0 +1,116 @@
+"""Every execution backend runs and grades the curriculum like in-process."""
+
+import threading
+import time
+
+import pytest
+
+from pylearn.curriculum import discover_modules
+from pylearn.curriculum.base import Exercise
+from pylearn.engine.backends import BACKENDS, InProcessBackend, create_backend
+from pylearn.engine.forking import CAN_FORK
+from pylearn.engine.remote import WorkerCluster, WorkerServer
+
+AUTHKEY = "pylearn-tests"
+
+SOLUTIONS = [
+    (f"{module.id}/{exercise.id}", exercise)
+    for module in discover_modules()
+    for exercise in module.exercises
+    if exercise.solution
+]
+
+
+def run_fields(result):
+    return (result.success, result.stdout, result.stderr, result.error, result.limit)
+
+
+def validation_fields(result):
+    if result is None:
+        return None
+    return (result.success, result.error, result.limit, result.summary,
+            [p["name"] for p in result.passed],
+            [(f["name"], f["expected"], f["actual"]) for f in result.failed])
+
+
+def check(backend, exercise):
+    run = backend.run_code(exercise.solution, pre_code=exercise.pre_code,
+                           deterministic=exercise.deterministic)
+    return run_fields(run), validation_fields(backend.validate(exercise, exercise.solution))
+
+
+@pytest.fixture(scope="module")
+def reference():
+    with create_backend("inprocess") as backend:
+        return {key: check(backend, exercise) for key, exercise in SOLUTIONS}
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = WorkerServer("127.0.0.1:0", authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.close()
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def backend(request):
+    if request.param == "zygote" and not CAN_FORK:
+        pytest.skip("the zygote backend needs fork()")
+    if request.param == "remote":
+        backend = WorkerCluster([request.getfixturevalue("server").address],
+                                authkey=AUTHKEY)
+    else:
+        backend = create_backend(request.param)
+    with backend:
+        yield backend
+
+
+def test_solutions_match_inprocess(backend, reference):
+    mismatched = {key: (reference[key], fields)
+                  for key, exercise in SOLUTIONS
+                  if (fields := check(backend, exercise)) != reference[key]}
+    assert not mismatched
+
+
+def test_pre_code_runs_first(backend):
+    result = backend.run_code("print(answer)", pre_code="answer = 6 * 7")
+    assert result.success, result.error
+    assert result.stdout.strip() == "42"
+
+
+@pytest.mark.parametrize("code", ["while True:\n    pass\n", 'exec("while True: pass")\n'])
+def test_runaway_loop_is_stopped(backend, code):
+    if "exec" in code and backend.in_process and not isinstance(backend, InProcessBackend):
+        pytest.skip("subinterpreters only stop code under the step budget")
+    result = backend.run_code(code, timeout_hint=1)
+    assert not result.success
+    assert result.limit
+
+
+def test_wrong_code_fails(backend):
+    key, exercise = next((key, exercise) for key, exercise in SOLUTIONS
+                         if exercise.test_cases)
+    result = backend.validate(exercise, "pass\n")
+    assert not result.success, key
+
+
+def test_inprocess_timeout_ends_the_whole_job():
+    # Each test is quick, but together they outlast the job's timeout.
+    exercise = Exercise(
+        id="slow_tests", title="Slow tests", description="",
+        test_cases=[{"name": f"Test {i}", "input_code": "spin()", "expected": "done"}
+                    for i in range(200)],
+    )
+    code = ("import time\n"
+            "def spin():\n"
+            "    end = time.perf_counter() + 0.01\n"
+            "    while time.perf_counter() < end:\n"
+            "        pass\n"
+            "    print('done')\n")
+    backend = InProcessBackend(step_budget=None, timeout=0.3)
+    start = time.monotonic()
+    result = backend.validate(exercise, code)
+    assert time.monotonic() - start < 1.5
+    assert result.limit == "timeout"
+    assert result.error.startswith("ExecutionTimeout")
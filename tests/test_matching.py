@@ -0,0 +1,111 @@
+"""Output matchers accept equivalent output and reject everything else."""
+
+import pytest
+
+from pylearn.engine.matching import Matcher, compile_matcher, matcher_for_test
+
+
+def test_exact_compares_stripped_text():
+    assert compile_matcher("  hello \n")("hello")
+    assert not compile_matcher("hello")("Hello")
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("[1, 2]", "[1,2]"),
+    ("{'a': 1, 'b': 2}", "{'b': 2, 'a': 1}"),
+    ("(1, 'x')", "(1,'x')"),
+    ("[1, 2]", "[1, 2,]"),
+])
+def test_literal_accepts_equal_values(expected, actual):
+    assert compile_matcher(expected, "literal")(actual)
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("[1, 2]", "[2, 1]"),
+    ("[1, 2]", "(1, 2)"),
+    ("True", "1"),
+    ("[True, False]", "[1, 0]"),
+    ("[1, 2]", "[1, 2"),            # Malformed output
+    ("[1, 2]", "[1, 2] extra"),
+    ("[1, 2]", "__import__('os')"),
+    ("[1, 2]", ""),
+])
+def test_literal_rejects_other_values_and_malformed_output(expected, actual):
+    assert not compile_matcher(expected, "literal")(actual)
+
+
+def test_literal_rejects_a_malformed_expected_value():
+    with pytest.raises(ValueError, match="not a Python literal"):
+        Matcher("[1, 2", "literal")
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("0.3", "0.30000000000000004"),
+    ("[0.1, 0.2]", "[0.1, 0.20000000000000004]"),
+    ("{'x': 1.0}", "{'x': 1.0000000000001}"),
+    ("Area: 3.14", "Area: 3.1400000000001"),
+    ("1e999", "1e999"),                      # inf equals inf
+    ("[1.0, inf]", "[1.0000000001, inf]"),   # Not a literal: compared as text
+    ("Result: nan", "Result: nan"),
+])
+def test_float_accepts_numbers_within_tolerance(expected, actual):
+    assert compile_matcher(expected, "float")(actual)
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("0.1", "0.30000000000000004"),
+    ("1e999", "1e308"),
+    ("[1.0, inf]", "[1.0, 1e308]"),
+    ("[0.5]", "[nan]"),
+    ("Result: nan", "Result: 0.0"),
+    ("[1.0]", "[True]"),
+    ("(1, 2)", "[1, 2]"),
+    ("Area: 3.14", "Size: 3.14"),
+    ("[0.1, 0.2]", "[0.1, 0.2"),
+])
+def test_float_rejects_other_values(expected, actual):
+    assert not compile_matcher(expected, "float")(actual)
+
+
+def test_float_tolerance_comes_from_the_test():
+    matcher = matcher_for_test({"expected": "3.14", "match": "float", "tolerance": 0.01})
+    assert matcher("3.141")
+    assert not matcher("3.2")
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("[1, 2, 3]", "[3, 1, 2]"),
+    ("{1, 2}", "[2, 1]"),
+    ("[[1], [2]]", "[[2], [1]]"),
+    ("[1, True]", "[True, 1]"),
+])
+def test_unordered_accepts_any_order(expected, actual):
+    assert compile_matcher(expected, "unordered")(actual)
+
+
+@pytest.mark.parametrize("expected, actual", [
+    ("[1, 1, 2]", "[1, 2, 2]"),
+    ("[1, 2]", "[1, 2, 3]"),
+    ("[1, True]", "[1, 1]"),
+    ("[1, 2]", "3"),
+    ("[1, 2]", "[1, 2"),
+])
+def test_unordered_rejects_other_items(expected, actual):
+    assert not compile_matcher(expected, "unordered")(actual)
+
+
+def test_unordered_needs_a_collection():
+    with pytest.raises(ValueError, match="unordered match needs"):
+        Matcher("42", "unordered")
+
+
+def test_lines_ignores_order_blank_lines_and_indentation():
+    matcher = compile_matcher("a\nb", "lines")
+    assert matcher("b\n\n  a")
+    assert not matcher("a")
+    assert not matcher("a\nb\nc")
+
+
+def test_unknown_mode_is_refused():
+    with pytest.raises(ValueError, match="unknown match mode"):
+        Matcher("x", "fuzzy")
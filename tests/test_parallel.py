@@ -0,0 +1,33 @@
+"""Tests split over several workers grade like a sequential run."""
+
+import pytest
+
+from pylearn.curriculum.base import Exercise
+from pylearn.engine.parallel import validate_parallel
+from pylearn.engine.pool import WorkerPool
+
+EXERCISE = Exercise(
+    id="parallel_square", title="Square", description="",
+    test_cases=[{"name": f"square({n})", "input_code": f"print(square({n}))",
+                 "expected": str(n * n)} for n in range(8)],
+)
+# Wrong for 3 and 6, which land in different chunks.
+CODE = "def square(n):\n    return n + n if n in (3, 6) else n * n\n"
+
+
+def outcome(result):
+    return ([t["name"] for t in result.passed], [t["name"] for t in result.failed],
+            result.skipped, result.error)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with WorkerPool(size=2) as pool:
+        yield pool
+
+
+@pytest.mark.parametrize("fail_fast", [False, True])
+def test_parallel_matches_sequential(pool, fail_fast):
+    sequential = pool.validate(EXERCISE, CODE, fail_fast=fail_fast)
+    parallel = validate_parallel(pool, EXERCISE, CODE, workers=4, fail_fast=fail_fast)
+    assert outcome(parallel) == outcome(sequential)
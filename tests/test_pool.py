@@ -0,0 +1,51 @@
+"""WorkerPool jobs cannot see what earlier jobs did to a worker."""
+
+import threading
+
+import pytest
+
+from pylearn.curriculum import discover_modules
+from pylearn.engine.pool import ExecutionCancelled, ExecutionTimeout, WorkerPool
+
+
+def _patch_matcher():
+    from pylearn.engine.matching import Matcher
+
+    Matcher.__call__ = lambda self, actual: True
+
+
+def _sleep(seconds):
+    import time
+
+    time.sleep(seconds)
+
+
+def _exercise(exercise_id):
+    return next(exercise for module in discover_modules()
+                for exercise in module.exercises if exercise.id == exercise_id)
+
+
+@pytest.fixture
+def pool():
+    with WorkerPool(size=1) as pool:
+        yield pool
+
+
+def test_monkeypatching_does_not_reach_the_next_job(pool):
+    pool.call(_patch_matcher)
+    result = pool.validate(_exercise("two_sum"), "def two_sum(nums, target):\n    return None\n")
+    assert not result.success
+
+
+def test_timeout_keeps_the_pool_usable(pool):
+    with pytest.raises(ExecutionTimeout):
+        pool.call(_sleep, 10, timeout=0.5)
+    assert pool.run_code("print(1)").stdout.strip() == "1"
+
+
+def test_cancel_keeps_the_pool_usable(pool):
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    with pytest.raises(ExecutionCancelled):
+        pool.call(_sleep, 10, timeout=20, cancel_event=cancel)
+    assert pool.run_code("print(2)").stdout.strip() == "2"
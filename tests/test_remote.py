@@ -0,0 +1,127 @@
+"""Worker servers authenticate every client and outlast a busy queue."""
+
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from pylearn.engine import remote
+from pylearn.engine.pool import WorkerPool
+from pylearn.engine.remote import RemoteWorker, WorkerServer, WorkerUnreachable
+from pylearn.engine.shared_inputs import SharedArray
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture(autouse=True)
+def key_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "keys" / "worker.key")
+    monkeypatch.setattr(remote, "WORKER_AUTHKEY", None)
+    monkeypatch.setattr(remote, "WORKER_KEY_FILE", path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with WorkerPool(size=1) as pool:
+        yield pool
+
+
+def _serve(address, pool, authkey=None):
+    server = WorkerServer(address, authkey=authkey, pool=pool)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_generated_key_is_private_and_shared(pool, key_file):
+    server = _serve("127.0.0.1:0", pool)
+    try:
+        assert stat.S_IMODE(os.stat(key_file).st_mode) == 0o600
+        with RemoteWorker(server.address) as worker:
+            assert worker.call(_sleep, 0) == 0
+    finally:
+        server.close()
+
+
+def test_clients_without_the_key_are_refused(pool):
+    server = _serve("127.0.0.1:0", pool)
+    try:
+        with RemoteWorker(server.address, authkey="wrong") as worker:
+            with pytest.raises(WorkerUnreachable):
+                worker.call(_sleep, 0)
+    finally:
+        server.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Unix sockets are POSIX only")
+def test_unix_socket_is_owner_only(pool, tmp_path):
+    server = _serve(str(tmp_path / "worker.sock"), pool)
+    try:
+        assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+    finally:
+        server.close()
+
+
+def test_queued_jobs_are_not_declared_unreachable(pool, monkeypatch):
+    monkeypatch.setattr(remote, "_CLIENT_GRACE", 0)
+    server = _serve("127.0.0.1:0", pool)
+    try:
+        with RemoteWorker(server.address) as worker:
+            results = []
+            jobs = [threading.Thread(target=lambda: results.append(
+                worker.call(_sleep, 1, timeout=1.5))) for _ in range(2)]
+            for job in jobs:
+                job.start()
+            for job in jobs:
+                job.join()
+        assert results == [1, 1]  # The second waited ~1s in the server's queue
+    finally:
+        server.close()
+
+
+def test_silent_connection_does_not_block_others(pool, monkeypatch):
+    monkeypatch.setattr(remote, "_HANDSHAKE_TIMEOUT", 30)
+    server = _serve("127.0.0.1:0", pool)
+    host, port = remote.parse_address(server.address)
+    try:
+        with socket.create_connection((host, port)):  # Never answers the challenge
+            with RemoteWorker(server.address) as worker:
+                start = time.monotonic()
+                assert worker.call(_sleep, 0) == 0
+                assert time.monotonic() - start < 5
+    finally:
+        server.close()
+
+
+def test_silent_connection_is_dropped(pool, monkeypatch):
+    monkeypatch.setattr(remote, "_HANDSHAKE_TIMEOUT", 0.2)
+    server = _serve("127.0.0.1:0", pool)
+    try:
+        with socket.create_connection(remote.parse_address(server.address)) as sock:
+            sock.settimeout(5)
+            while sock.recv(4096):  # The challenge, then EOF
+                pass
+    finally:
+        server.close()
+
+
+def _total(values):
+    return sum(values.view())
+
+
+def test_shared_arrays_reach_other_hosts(pool):
+    values = SharedArray(range(100))
+    values.name = "psm_not_on_this_host"  # As seen from another host
+    server = _serve("127.0.0.1:0", pool)
+    try:
+        with RemoteWorker(server.address) as worker:
+            assert worker.call(_total, values) == sum(range(100))
+    finally:
+        server.close()
+        values.close()
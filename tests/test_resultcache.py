@@ -0,0 +1,69 @@
+"""The result cache only shares results between equivalent submissions."""
+
+from dataclasses import replace
+
+from pylearn.curriculum import discover_modules
+from pylearn.engine.backends import InProcessBackend
+from pylearn.engine.resultcache import ResultCache, exercise_digest, validate_cached
+
+
+def _exercise(exercise_id):
+    return next(exercise for module in discover_modules()
+                for exercise in module.exercises if exercise.id == exercise_id)
+
+
+def test_docstrings_are_part_of_the_fingerprint():
+    exercise = _exercise("comments_exercise")
+    cache = ResultCache()
+    backend = InProcessBackend()
+    documented = 'def add(a, b):\n    """Add a and b."""\n    return a + b\n'
+    undocumented = "def add(a, b):\n    return a + b\n"
+
+    assert validate_cached(backend, exercise, documented, cache=cache).success
+    assert not validate_cached(backend, exercise, undocumented, cache=cache).success
+
+
+def test_layout_and_local_names_share_a_result():
+    exercise = _exercise("comments_exercise")
+    cache = ResultCache()
+    first, _ = cache.lookup(exercise, 'def add(a, b):\n    """Add."""\n    total = a + b\n'
+                                      "    return total\n")
+    second, _ = cache.lookup(exercise, 'def add(a, b):  # sum\n    """Add."""\n\n'
+                                       "    result = a + b\n    return result\n")
+    assert first.key == second.key
+
+
+def test_exercise_digest_ignores_reference_counts():
+    # marshal marks objects referenced more than once, so its output
+    # changed as soon as anything else held on to the constants.
+    namespace = {}
+    exec("def check(namespace, stdout):\n"
+         "    return stdout.strip() in {'alpha', 'beta'}, ('ok', 1)\n", namespace)
+    exercise = replace(_exercise("comments_exercise"), validator=namespace["check"])
+    before = exercise_digest(exercise)
+    held = list(namespace["check"].__code__.co_consts)
+    assert exercise_digest(exercise) == before
+    assert held
+
+
+def test_parallel_tests_changes_the_key():
+    exercise = _exercise("comments_exercise")
+    assert exercise_digest(exercise) != exercise_digest(replace(exercise, parallel_tests=4))
+
+
+def test_coverage_requests_share_failing_results():
+    exercise = _exercise("comments_exercise")
+    cache = ResultCache()
+    backend = InProcessBackend()
+    wrong = "def add(a, b):\n    return a - b\n"
+    right = 'def add(a, b):\n    """Add a and b."""\n    return a + b\n'
+
+    assert not validate_cached(backend, exercise, wrong, cache=cache, coverage=True).success
+    assert not validate_cached(backend, exercise, wrong, cache=cache, coverage=True).success
+    assert cache.stats()["hits"] == 1
+
+    # A pass shows coverage, so it is validated again with its own.
+    validate_cached(backend, exercise, right, cache=cache, coverage=True)
+    result = validate_cached(backend, exercise, right, cache=cache, coverage=True)
+    assert result.success
+    assert result.coverage is not None
@@ -0,0 +1,27 @@
+"""The process limit's count of the user's threads is reused, not rescanned."""
+
+from pylearn.engine import sandbox
+
+
+def test_thread_count_is_reused(monkeypatch):
+    scans = []
+    monkeypatch.setattr(sandbox, "_user_processes_counted", None)
+    monkeypatch.setattr(sandbox, "_count_user_threads", lambda: scans.append(1) or 7)
+
+    assert sandbox.user_processes() == 7
+    assert sandbox.user_processes() == 7
+    assert len(scans) == 1
+
+
+def test_forked_children_count_themselves(monkeypatch):
+    monkeypatch.setattr(sandbox, "_count_user_threads", lambda: 7)
+    monkeypatch.setattr(sandbox, "_user_processes_counted", None)
+    sandbox.user_processes()
+    monkeypatch.setattr(sandbox.os, "getpid", lambda: -1)  # As in a forked child
+    assert sandbox.user_processes() == 8
+
+
+def test_stale_counts_are_refreshed(monkeypatch):
+    monkeypatch.setattr(sandbox, "_count_user_threads", lambda: 7)
+    monkeypatch.setattr(sandbox, "_user_processes_counted", (3, -1e9, sandbox.os.getpid()))
+    assert sandbox.user_processes() == 7
@@ -0,0 +1,27 @@
+"""SharedArrays pickle as references, or with their values for other hosts."""
+
+import pickle
+
+from pylearn.engine.shared_inputs import SharedArray, copied_data, resolve_inputs
+
+
+def test_pickles_as_a_reference():
+    values = SharedArray(range(1000))
+    try:
+        assert len(pickle.dumps(values)) < 200
+        assert list(pickle.loads(pickle.dumps(values)).view()) == list(range(1000))
+    finally:
+        values.close()
+
+
+def test_copied_data_outlives_the_block():
+    values = SharedArray([1.5, 2.5], typecode="d")
+    with copied_data():
+        data = pickle.dumps(values)
+    values.close()
+
+    copy = pickle.loads(data)
+    assert list(copy.view()) == [1.5, 2.5]
+    # It carries its values on to the next process too.
+    assert list(pickle.loads(pickle.dumps(copy)).view()) == [1.5, 2.5]
+    assert resolve_inputs({"nums": copy})["nums"].readonly
@@ -0,0 +1,52 @@
+"""pre_code snapshots match the runs that use them, even when fork() is refused."""
+
+import pytest
+
+from pylearn.config import FROZEN_TIME
+from pylearn.curriculum.base import Exercise
+from pylearn.engine import snapshots
+from pylearn.engine.batch import _run_batch_job
+from pylearn.engine.forking import CAN_FORK
+from pylearn.engine.validator import validate_exercise
+
+pytestmark = pytest.mark.skipif(not CAN_FORK, reason="snapshots need fork()")
+
+PRE_CODE = "prices = {'apple': 3, 'pear': 5}\n"
+
+EXERCISE = Exercise(
+    id="snapshot_fallback", title="Total", description="", pre_code=PRE_CODE,
+    test_cases=[{"name": "Total", "input_code": "print(total())", "expected": "8"}],
+)
+
+
+@pytest.fixture(autouse=True)
+def refuse_fork(monkeypatch):
+    def fork_call(*args, **kwargs):
+        raise BlockingIOError(11, "Resource temporarily unavailable")
+    monkeypatch.setattr(snapshots, "fork_call", fork_call)
+
+
+def test_run_code_runs_pre_code_inline():
+    result = snapshots.run_code_in_snapshot(snapshots.get_snapshot(PRE_CODE),
+                                            "print(prices['pear'])")
+    assert result.success, result.error
+    assert result.stdout.strip() == "5"
+
+
+def test_validate_runs_pre_code_inline():
+    result = validate_exercise(EXERCISE, "def total():\n    return sum(prices.values())\n")
+    assert result.success, result.error
+
+
+def test_batch_runs_pre_code_inline():
+    result = _run_batch_job("total = sum(prices.values())\n", ["print(total)"], PRE_CODE)
+    assert result.success
+    assert result.results[0].stdout.strip() == "8"
+
+
+def test_snapshot_follows_the_deterministic_flag():
+    pre_code = "import time\nstarted = time.time()\n"
+    frozen = snapshots.get_snapshot(pre_code, deterministic=True)
+    live = snapshots.get_snapshot(pre_code, deterministic=False)
+    assert frozen.namespace["started"] == FROZEN_TIME
+    assert live.namespace["started"] != FROZEN_TIME
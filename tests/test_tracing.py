@@ -0,0 +1,84 @@
+"""Step budgets and in-process timeouts stop runaway code and clean up."""
+
+import signal
+import sys
+import time
+
+import pytest
+
+from pylearn.engine import sandbox, tracing
+from pylearn.engine.backends import InProcessBackend
+from pylearn.engine.codecache import compile_cached
+from pylearn.engine.runner import run_code
+
+needs_alarm = pytest.mark.skipif(not hasattr(signal, "setitimer"),
+                                 reason="in-process timeouts need SIGALRM")
+
+LOOPS = ["while True:\n    pass\n", "while True: pass\n", "n = 0\nwhile True:\n    n += 1\n"]
+
+
+def _tracing_is_off(code):
+    """Whether the budget's tracer is gone from the interpreter and `code`."""
+    if tracing._active_callback is not None:
+        return False
+    if tracing._HAS_MONITORING and tracing._tool_id is not None:
+        compiled = compile_cached(code, tracing.USER_FILENAME)
+        return all(sys.monitoring.get_local_events(tracing._tool_id, co) == 0
+                   for co in tracing.user_code_objects(compiled))
+    return sys.gettrace() is None
+
+
+@pytest.mark.parametrize("code", LOOPS)
+def test_budget_stops_runaway_loops(code):
+    result = run_code(code, step_budget=10_000)
+    assert result.limit == "steps"
+    assert result.error.startswith("StepBudgetExceeded")
+    assert _tracing_is_off(code)
+
+
+def test_budget_counts_steps_of_finished_runs():
+    code = "total = 0\nfor i in range(10):\n    total += i\nprint(total)\n"
+    with tracing.step_budget(1000, compile_cached(code, tracing.USER_FILENAME)) as budget:
+        exec(compile_cached(code, tracing.USER_FILENAME), {})
+    assert 20 <= budget.used < 1000
+    assert _tracing_is_off(code)
+
+
+def test_budget_reaches_functions_defined_earlier():
+    namespace = {}
+    run_code("def spin():\n    while True:\n        pass\n", namespace=namespace)
+    result = run_code("spin()\n", namespace=namespace, step_budget=10_000)
+    assert result.limit == "steps"
+
+
+def test_inprocess_reports_steps_for_traced_loops():
+    backend = InProcessBackend(step_budget=10_000, timeout=5)
+    result = backend.run_code("while True:\n    pass\n")
+    assert result.limit == "steps"
+
+
+@needs_alarm
+def test_inprocess_reports_timeout_for_untraced_loops():
+    backend = InProcessBackend(step_budget=10_000, timeout=0.2)
+    start = time.monotonic()
+    result = backend.run_code('exec("while True: pass")\n')
+    assert time.monotonic() - start < 2
+    assert result.limit == "timeout"
+    assert result.error.startswith("ExecutionTimeout")
+
+
+@needs_alarm
+def test_inprocess_timeout_restores_the_process():
+    handler = signal.getsignal(signal.SIGALRM)
+    code = 'exec("while True: pass")\n'
+    backend = InProcessBackend(step_budget=10_000, timeout=0.2)
+    real_time = time.time
+
+    result = backend.run_code(code, deterministic=True)
+
+    assert result.limit == "timeout"
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+    assert signal.getsignal(signal.SIGALRM) is handler
+    assert sandbox._time_limits == []
+    assert time.time is real_time
+    assert _tracing_is_off(code)
@@ -0,0 +1,34 @@
+"""Tests isolated with test_isolation="fork" get their own process."""
+
+import pytest
+
+from pylearn.curriculum.base import Exercise
+from pylearn.engine import validator
+from pylearn.engine.forking import CAN_FORK
+from pylearn.engine.pool import WorkerPool
+
+pytestmark = pytest.mark.skipif(not CAN_FORK, reason="fork isolation needs fork()")
+
+# Each test appends to the same list; only separate processes keep it short.
+EXERCISE = Exercise(
+    id="fork_isolation", title="Append", description="", test_isolation="fork",
+    test_cases=[{"name": f"Test {i}", "input_code": "seen.append(1)\nprint(len(seen))",
+                 "expected": "1"} for i in range(3)],
+)
+CODE = "seen = []\n"
+
+
+def test_forked_tests_do_not_share_state():
+    with WorkerPool(size=1) as pool:
+        result = pool.validate(EXERCISE, CODE)
+    assert result.success, result.summary
+    assert result.fork_fallbacks == 0
+
+
+def test_failed_forks_are_counted(monkeypatch):
+    def fork_call(*args, **kwargs):
+        raise BlockingIOError(11, "Resource temporarily unavailable")
+    monkeypatch.setattr(validator, "fork_call", fork_call)
+
+    result = validator.validate_exercise(EXERCISE, CODE)
+    assert result.fork_fallbacks == 3
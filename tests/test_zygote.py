@@ -0,0 +1,32 @@
+"""A job the zygote cannot run fails alone; the zygote keeps serving."""
+
+import pytest
+
+from pylearn.engine.forking import CAN_FORK
+from pylearn.engine.pool import WorkerCrashed
+
+pytestmark = pytest.mark.skipif(not CAN_FORK, reason="the zygote needs fork()")
+
+
+def _refuse():
+    raise ImportError("not importable here")
+
+
+class Unloadable:
+    """Pickles fine, but fails to unpickle in the zygote."""
+
+    def __reduce__(self):
+        return _refuse, ()
+
+
+def _echo(value):
+    return value
+
+
+def test_unpicklable_job_fails_alone():
+    from pylearn.engine.zygote import Zygote
+
+    with Zygote(preload=()) as zygote:
+        with pytest.raises(WorkerCrashed, match="Could not receive job"):
+            zygote.call(_echo, Unloadable(), timeout=5)
+        assert zygote.call(_echo, 42, timeout=5) == 42